@@ -1,11 +1,24 @@
+import argparse
+import hashlib
 import json
 import os
-import re
+import random
+import shutil
+import tempfile
 import time
+import zlib
 import logging
-from collections import Counter, defaultdict
-from datetime import datetime
-from nltk.stem import RSLPStemmer
+from collections import Counter, defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from functools import lru_cache, partial
+from itertools import chain
+from operator import itemgetter
+
+from catalogo_produtos import FONTES as FONTES_CATALOGO, carregar_produtos, chaves_de_modelo
+from armazem_logs import ARMAZEM_DIR, ArmazemLogs
+from encerramentos import carregar_tabela
+from processamento_texto import STOPWORDS, limpar_texto, st, stem
 
 # ===== Caminhos =====
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -13,6 +26,10 @@ CHAT_LOG_PATH = os.path.join(ROOT_DIR, "chat_logs.json")
 OUTPUT_PATH = os.path.join(ROOT_DIR, "backend_py", "analise_logs.json")
 RESUMO_DIARIO_PATH = os.path.join(ROOT_DIR, "backend_py", "resumo_diario.json")
 LOG_FILE_PATH = os.path.join(ROOT_DIR, "backend_py", "analise_logs.log")
+ESTADO_PATH = os.path.join(ROOT_DIR, "backend_py", "analise_estado.json")
+BUCKETS_DIR = os.path.join(ROOT_DIR, "backend_py", "buckets_diarios")
+PROFILE_PATH = os.path.join(ROOT_DIR, "backend_py", "analise_logs.prof")
+ENCERRADOS_PATH = os.path.join(ROOT_DIR, "encerramentos_intelbras_convertido.csv")
 
 # ===== Logging =====
 logging.basicConfig(
@@ -25,16 +42,6 @@ logging.basicConfig(
 )
 
 # ===== Configs =====
-st = RSLPStemmer()
-
-STOPWORDS = {
-    "a", "o", "e", "de", "da", "do", "que", "em", "um", "uma", "para",
-    "com", "os", "as", "na", "no", "se", "é", "foi", "ser", "ao", "à",
-    "n", "mais", "marca", "linha", "unidade", "família", "status",
-    "indicação", "segmento", "undefined", "qual", "melhor", "boa", "bem",
-    "muito", "algum", "haver", "ter", "saber", "como", "ppa", "favor"
-}
-
 PALAVRAS_POSITIVAS = {"bom", "ótimo", "excelente", "perfeito", "ajudou", "obrigado", "sucesso", "solução", "rápido"}
 PALAVRAS_NEGATIVAS = {"ruim", "péssimo", "erro", "problema", "lento", "demora", "não", "impossível", "horrível"}
 
@@ -49,48 +56,520 @@ SEGMENTOS = {
     "SEGURANCA ELETRONICA": ["cftv", "camera", "alarme", "sensor"]
 }
 
-def limpar_texto(texto):
-    texto = texto.lower().replace('\n', ' ').replace('\r', ' ')
-    texto = re.sub(r"[^a-zà-ú0-9\s]", " ", texto)
-    return texto
+# ===== Tokenização e stemming =====
+STEM_INTELBRAS = stem("intelbras")
+STEM_CODIGO = stem("código")
 
-def get_sentimento(texto):
-    palavras = set(limpar_texto(texto).split())
-    
-    positivos = len(palavras.intersection(PALAVRAS_POSITIVAS))
-    negativos = len(palavras.intersection(PALAVRAS_NEGATIVAS))
-    
+# ===== Classificação (segmento + sentimento numa passada) =====
+ResultadoClassificacao = namedtuple("ResultadoClassificacao", "segmento positivos negativos ocorrencias")
+CLASSIFICADOR_CACHE_MAX = 50_000
+
+class ClassificadorTexto:
+    """Segmento, sentimento e ocorrências de palavras-chave numa passada pelos tokens.
+
+    Uma palavra-chave sem espaço só pode casar dentro de um token do texto
+    limpo, então as que cabem em cada token distinto são calculadas uma vez
+    (cache LRU, como o stem) e a mensagem vira uma consulta por token, sem
+    depender de quantas palavras-chave existem. As poucas com espaço ("painel
+    solar") continuam com `in` no texto. O resultado é o mesmo do laço
+    original: segmento = o primeiro de `segmentos` com alguma ocorrência;
+    sentimento = palavras inteiras distintas.
+    """
+    def __init__(self, segmentos, positivas, negativas, cache_max=CLASSIFICADOR_CACHE_MAX):
+        self.segmentos = list(segmentos)
+        self.simples = {}     # palavra-chave -> prioridade do segmento (a menor)
+        self.compostas = []   # (palavra-chave com espaço, prioridade)
+        for prioridade, keywords in enumerate(segmentos.values()):
+            for kw in keywords:
+                if kw.split() == [kw]:
+                    self.simples.setdefault(kw, prioridade)
+                else:
+                    self.compostas.append((kw, prioridade))
+        self.polaridade = {p: "negativo" for p in negativas}
+        self.polaridade.update({p: "positivo" for p in positivas})
+        self.keywords_do_token = lru_cache(maxsize=cache_max)(self._keywords_do_token)
+
+    def _keywords_do_token(self, token):
+        return tuple((kw, prioridade) for kw, prioridade in self.simples.items() if kw in token)
+
+    def analisar(self, pergunta_limpa, resposta_limpa=""):
+        """Recebe textos já passados por limpar_texto(); o segmento vem só da pergunta."""
+        melhor = len(self.segmentos)
+        ocorrencias = Counter()
+        for token in pergunta_limpa.split():
+            for kw, prioridade in self.keywords_do_token(token):
+                ocorrencias[kw] += 1
+                if prioridade < melhor: melhor = prioridade
+        for kw, prioridade in self.compostas:
+            if kw in pergunta_limpa:
+                ocorrencias[kw] += 1
+                if prioridade < melhor: melhor = prioridade
+
+        polaridade = self.polaridade
+        positivos, negativos = set(), set()
+        for texto in (pergunta_limpa, resposta_limpa):
+            for token in texto.split():
+                if token in polaridade:
+                    (positivos if polaridade[token] == "positivo" else negativos).add(token)
+
+        segmento = self.segmentos[melhor] if melhor < len(self.segmentos) else "OUTRO"
+        return ResultadoClassificacao(segmento, len(positivos), len(negativos), ocorrencias)
+
+def sentimento_por_contagem(positivos, negativos):
     if positivos > negativos: return "positivo"
     if negativos > positivos: return "negativo"
     return "neutro"
 
+CLASSIFICADOR = ClassificadorTexto(SEGMENTOS, PALAVRAS_POSITIVAS, PALAVRAS_NEGATIVAS)
+
+def get_sentimento(texto):
+    r = CLASSIFICADOR.analisar(limpar_texto(texto))
+    return sentimento_por_contagem(r.positivos, r.negativos)
+
 def classificar_segmento(texto):
-    texto = limpar_texto(texto)
-    for segmento, keywords in SEGMENTOS.items():
-        for kw in keywords:
-            if kw in texto:
-                return segmento
-    return "OUTRO"
+    texto_limpo = limpar_texto(texto)
+    return obter_classificador_produtos().segmento(texto_limpo) or CLASSIFICADOR.analisar(texto_limpo).segmento
 
-def carregar_chat_logs():
-    dados = []
+# ===== Segmento pelos produtos citados (catálogo + descontinuados) =====
+# A chave é a pergunta inteira: só as repetidas (em geral recentes) acertam, e 50 mil
+# entradas seguravam ~10 MB com ~1% de acerto
+PRODUTOS_CACHE_MAX = 5_000
+PROPORCAO_MIN_UNIDADE = 0.8   # chave de modelo dividida entre unidades não decide nada
+TAMANHO_MIN_CODIGO = 7
+
+def fontes_de_produtos():
+    # O que alimenta o índice token -> unidade; entra na assinatura do checkpoint
+    return [caminho for _, caminho in FONTES_CATALOGO] + [ENCERRADOS_PATH]
+
+def carregar_encerrados(caminho=ENCERRADOS_PATH):
+    """(código, descrição, unidade) de cada produto descontinuado, da tabela indexada de encerramentos."""
     try:
-        with open(CHAT_LOG_PATH, "r", encoding="utf-8") as f:
-            for linha in f:
-                linha = linha.strip()
-                if not linha: continue
-                try:
-                    dados.append(json.loads(linha))
-                except json.JSONDecodeError as e:
-                    logging.warning(f"Erro JSON: {linha[:50]}... -> {e}")
-        return dados
-    except FileNotFoundError:
-        logging.error(f"Arquivo {CHAT_LOG_PATH} não encontrado.")
+        tabela = carregar_tabela(caminho)
+    except (OSError, KeyError) as e:
+        logging.warning(f"Não foi possível ler os produtos descontinuados ({e}).")
         return []
+    return list(zip(tabela.codigo, tabela.produto, tabela.unidade))
+
+class ClassificadorProdutos:
+    """Segmento (a `unidade` do catálogo) pelos modelos e códigos citados na pergunta.
+
+    O índice é montado uma vez: cada código e cada chave de modelo das
+    descrições (chaves_de_modelo: "mhdx 1108" -> mhdx1108) aponta para a
+    unidade do produto; chaves que aparecem em unidades diferentes sem uma
+    maioria clara ficam de fora. Na pergunta, as mesmas chaves são geradas e
+    a unidade mais citada vence (empate: a citada primeiro). O resultado é
+    guardado por pergunta normalizada; None quando nada resolve.
+    """
+    def __init__(self, produtos, cache_max=PRODUTOS_CACHE_MAX):
+        votos = defaultdict(Counter)
+        for codigo, descricao, unidade in produtos:
+            if not unidade:
+                continue
+            votos[codigo][unidade] += 1
+            for chave in chaves_de_modelo(descricao):
+                votos[chave][unidade] += 1
+        self.unidade_por_chave = {}
+        for chave, unidades in votos.items():
+            unidade, n = unidades.most_common(1)[0]
+            if n / sum(unidades.values()) >= PROPORCAO_MIN_UNIDADE:
+                self.unidade_por_chave[chave] = unidade
+        self._segmento = lru_cache(maxsize=cache_max)(self._resolver)
+
+    @classmethod
+    def do_indice(cls, unidade_por_chave, cache_max=PRODUTOS_CACHE_MAX):
+        """A partir de um unidade_por_chave já montado (o do processo principal, no pool)."""
+        classificador = cls([], cache_max)
+        classificador.unidade_por_chave = unidade_por_chave
+        return classificador
+
+    def _resolver(self, pergunta_normalizada):
+        unidade_por_chave = self.unidade_por_chave
+        votos = Counter()
+        codigos = [t for t in pergunta_normalizada.split() if t.isdigit() and len(t) >= TAMANHO_MIN_CODIGO]
+        for chave in codigos + chaves_de_modelo(pergunta_normalizada):
+            unidade = unidade_por_chave.get(chave)
+            if unidade:
+                votos[unidade] += 1
+        return votos.most_common(1)[0][0] if votos else None
+
+    def segmento(self, pergunta_limpa):
+        """Recebe a pergunta já passada por limpar_texto()."""
+        return self._segmento(" ".join(pergunta_limpa.split()))
+
+    def cache_info(self):
+        return self._segmento.cache_info()
+
+_classificador_produtos = None
+
+def obter_classificador_produtos():
+    global _classificador_produtos
+    if _classificador_produtos is None:
+        produtos = [(p.codigo, p.descricao, p.unidade) for p in carregar_produtos(FONTES_CATALOGO)]
+        _classificador_produtos = ClassificadorProdutos(produtos + carregar_encerrados())
+        logging.info(f"Índice de produtos: {len(_classificador_produtos.unidade_por_chave)} códigos/modelos.")
+    return _classificador_produtos
+
+def instalar_classificador_produtos(unidade_por_chave):
+    # initializer do pool: com spawn (o padrão no Windows) o worker não herda
+    # nada do processo principal; o índice chega pronto em vez de ser remontado
+    # a partir dos catálogos em cada processo
+    global _classificador_produtos
+    _classificador_produtos = ClassificadorProdutos.do_indice(unidade_por_chave)
+
+def assinatura_produtos():
+    """Hash das fontes do índice: se o catálogo mudar, o checkpoint não vale mais."""
+    sha256 = hashlib.sha256()
+    for caminho in fontes_de_produtos():
+        try:
+            with open(caminho, "rb") as f:
+                sha256.update(f.read())
+        except OSError:
+            sha256.update(b"-")
+    return sha256.hexdigest()
+
+class LeitorChatLogs:
+    """Itera o JSONL a partir do byte `inicio` sem carregar o arquivo na memória.
+
+    Só consome linhas terminadas em '\n': uma linha final incompleta (o Node
+    ainda está escrevendo) fica para a próxima execução. `offset` aponta para
+    o fim da última linha consumida. Com `fim`, para no primeiro início de
+    linha >= fim (usado para fatiar o arquivo entre processos).
+    """
+    def __init__(self, caminho=CHAT_LOG_PATH, inicio=0, fim=None):
+        self.caminho = caminho
+        self.offset = inicio
+        self.fim = fim
+        self.lidas = 0
+
+    def __iter__(self):
+        try:
+            with open(self.caminho, "rb") as f:
+                f.seek(self.offset)
+                for bruta in f:
+                    if self.fim is not None and self.offset >= self.fim:
+                        break
+                    if not bruta.endswith(b"\n"):
+                        break
+                    self.offset += len(bruta)
+                    linha = bruta.decode("utf-8", errors="replace").strip()
+                    if not linha: continue
+                    try:
+                        entry = json.loads(linha)
+                    except json.JSONDecodeError as e:
+                        logging.warning(f"Erro JSON: {linha[:50]}... -> {e}")
+                        continue
+                    self.lidas += 1
+                    yield entry
+        except FileNotFoundError:
+            logging.error(f"Arquivo {self.caminho} não encontrado.")
+
+def carregar_chat_logs():
+    return list(LeitorChatLogs())
+
+def dividir_em_fatias(caminho, inicio, partes):
+    """Divide [inicio, tamanho) em até `partes` intervalos alinhados em início de linha."""
+    try:
+        tamanho = os.path.getsize(caminho)
+    except OSError:
+        return [(inicio, None)]
+    limites = [inicio]
+    with open(caminho, "rb") as f:
+        for i in range(1, partes):
+            alvo = inicio + (tamanho - inicio) * i // partes
+            if alvo <= limites[-1]: continue
+            f.seek(alvo - 1)
+            f.readline()  # avança até o fim da linha que contém `alvo - 1`
+            corte = f.tell()
+            if limites[-1] < corte < tamanho:
+                limites.append(corte)
+    limites.append(None)
+    return list(zip(limites[:-1], limites[1:]))
 
 def gerar_ngrams(palavras, n):
     return [tuple(palavras[i:i+n]) for i in range(len(palavras)-n+1)]
 
+# ===== Top-k aproximado (Space-Saving) =====
+class TopKAproximado:
+    """Contador de memória limitada para vocabulários sem fim (palavras, bigramas, trigramas).
+
+    Variante do Space-Saving com poda em lote: o dicionário cresce até
+    2 × capacidade e então mantém só as `capacidade` chaves mais frequentes.
+    `piso` guarda a maior contagem descartada; chaves novas entram com
+    piso + 1, então as contagens nunca subestimam e o erro de cada uma é
+    no máximo `piso`.
+    """
+    def __init__(self, capacidade, contagens=None, piso=0):
+        self.capacidade = capacidade
+        self.contagens = dict(contagens or {})
+        self.piso = piso
+
+    def update(self, itens):
+        contagens = self.contagens
+        for item in itens:
+            if item in contagens:
+                contagens[item] += 1
+            else:
+                contagens[item] = self.piso + 1
+        if len(contagens) > 2 * self.capacidade:
+            self._podar()
+
+    def _podar(self):
+        ordenados = sorted(self.contagens.items(), key=itemgetter(1), reverse=True)
+        descartados = ordenados[self.capacidade:]
+        if descartados:
+            self.piso = max(self.piso, descartados[0][1])
+        self.contagens = dict(ordenados[:self.capacidade])
+
+    def mesclar(self, outro):
+        # Summaries mescláveis: uma chave ausente de um lado pode ter contagem
+        # real até o piso daquele lado, então o piso entra na soma.
+        contagens = {k: c + outro.contagens.get(k, outro.piso) for k, c in self.contagens.items()}
+        for k, c in outro.contagens.items():
+            if k not in contagens:
+                contagens[k] = c + self.piso
+        self.contagens = contagens
+        self.piso += outro.piso
+        if len(contagens) > 2 * self.capacidade:
+            self._podar()
+
+    def items(self):
+        return self.contagens.items()
+
+    def most_common(self, n=None):
+        ordenados = sorted(self.contagens.items(), key=itemgetter(1), reverse=True)
+        return ordenados if n is None else ordenados[:n]
+
+    def __len__(self):
+        return len(self.contagens)
+
+# ===== Agrupamento de perguntas quase iguais (MinHash/LSH) =====
+NUM_PERMUTACOES = 32       # posições da assinatura (one-permutation hashing: uma permutação, 32 partições)
+BANDAS = 8                 # 8 bandas de 4 linhas: par com Jaccard ~0,6 colide em alguma banda com ~60% de chance
+LIMIAR_JACCARD = 0.6
+PRIMO_MINHASH = (1 << 61) - 1
+_rng = random.Random(1108)
+PERMUTACAO = (_rng.randrange(1, PRIMO_MINHASH), _rng.randrange(PRIMO_MINHASH))
+DESLOCAMENTO_VAZIA = PRIMO_MINHASH // NUM_PERMUTACOES + 1   # acima de qualquer valor de partição
+TAMANHO_MAX_PERGUNTA = 200
+MIN_STEMS_PERGUNTA = 3     # "boa tarde!", "ok, obrigado": curtas/genéricas demais para virar pergunta frequente
+GRUPOS_MAX = 2000          # acima disso os menores grupos são descartados
+VARIANTES_MAX = 8          # variações guardadas por grupo (o representante e os exemplos saem daqui)
+SEM_VAGA_MAX = 20_000      # chaves já atribuídas a um grupo cheio, lembradas para não recalcular
+PALAVRAS_GENERICAS = {"oi", "olá", "ola", "opa", "bom", "boa", "dia", "tarde", "noite", "obrigado", "obrigada",
+                      "valeu", "tudo", "bem", "ok", "certo", "sim", "tchau", "até", "logo"}
+STEMS_GENERICOS = frozenset(stem(p) for p in PALAVRAS_GENERICAS)
+
+def stems_da_pergunta(stems):
+    """Stems que identificam a pergunta, sem saudações; None se sobrar pouco para agrupar."""
+    stems = [s for s in stems if s not in STEMS_GENERICOS]
+    return stems if len(stems) >= MIN_STEMS_PERGUNTA else None
+
+def shingles_da_pergunta(stems):
+    """Stems da pergunta e seus bigramas, cada um como crc32 (estável entre processos e execuções)."""
+    return frozenset(zlib.crc32(s.encode("utf-8")) for s in chain(stems, map(" ".join, zip(stems, stems[1:]))))
+
+def faixas_minhash(shingles):
+    """
+    Assinatura por one-permutation hashing: cada shingle é permutado uma vez
+    só e cai numa das NUM_PERMUTACOES partições, que guarda o menor valor.
+    Partições vazias copiam a próxima preenchida (densificação por rotação),
+    somando DESLOCAMENTO_VAZIA por posição de distância. Cada faixa vira um int
+    (hash de tupla de ints é estável); uma colisão de hash só acrescenta uma
+    candidata, que o Jaccard exato descarta.
+    """
+    a, b = PERMUTACAO
+    minimos = [None] * NUM_PERMUTACOES
+    for x in shingles:
+        particao, valor = divmod((a * x + b) % PRIMO_MINHASH, DESLOCAMENTO_VAZIA)
+        if minimos[particao] is None or valor < minimos[particao]:
+            minimos[particao] = valor
+    assinatura = list(minimos)
+    for i in range(NUM_PERMUTACOES):
+        distancia = 0
+        while minimos[(i + distancia) % NUM_PERMUTACOES] is None:
+            distancia += 1
+        assinatura[i] = minimos[(i + distancia) % NUM_PERMUTACOES] + distancia * DESLOCAMENTO_VAZIA
+    linhas = NUM_PERMUTACOES // BANDAS
+    return [hash((banda, *assinatura[banda * linhas:(banda + 1) * linhas])) for banda in range(BANDAS)]
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+class AgrupadorPerguntas:
+    """Agrupa perguntas quase iguais ("diferença do mhdx 1108 para o 1208" e variações).
+
+    Online e com memória limitada: cada grupo guarda o total de mensagens e
+    até VARIANTES_MAX variações (chave de stems -> [primeiro texto, contagem,
+    ordem de chegada]). As variações guardadas formam o índice LSH: a
+    assinatura MinHash é cortada em BANDAS faixas e cada faixa aponta para
+    todas as variações que a têm. Uma pergunta que ainda não é variação de
+    nenhum grupo é comparada (Jaccard exato dos shingles) com todas as que
+    colidem com ela em alguma faixa; os grupos que passam do LIMIAR_JACCARD
+    são unidos (fica o id do mais antigo) e ela entra nele. Sem nenhum, funda
+    um grupo. Acima de GRUPOS_MAX grupos os menores (empate: os mais antigos)
+    são descartados, então `variacoes` e os grupos pequenos são aproximados.
+    Uma chave já vista vai direto para o grupo dela, sem MinHash: as guardadas
+    pelo grupo_da_chave, as que chegaram com o grupo cheio pelo `sem_vaga`
+    (até SEM_VAGA_MAX, enquanto o grupo existir).
+
+    O resultado depende da ordem das perguntas. Com `arquivo` o agrupador só
+    anota (chave, texto) nele: é o modo dos workers, e o processo principal
+    repassa os arquivos das fatias na ordem do log (mesclar). Assim o
+    paralelo agrupa igual ao serial, e o incremental continua do estado do
+    checkpoint (só os grupos, limitado).
+    """
+    def __init__(self, arquivo=None):
+        self.arquivo = arquivo
+        self._saida = None
+        self.grupos = {}          # id -> {"total": n, "variantes": {chave: [texto, contagem, ordem]}}
+        self.grupo_da_chave = {}  # chave guardada -> id do grupo
+        self.shingles = {}        # chave guardada -> shingles (para o Jaccard das candidatas)
+        self.bandas = {}          # faixa -> chaves guardadas que a têm
+        self.sem_vaga = {}        # chave contada num grupo já cheio -> id do grupo
+        self.proximo_id = 0
+        self.ordem = 0
+
+    def registrar(self, stems, texto, contagem=1):
+        """`stems` são os de stems_da_pergunta; a chave da pergunta é eles unidos por espaço."""
+        chave = " ".join(stems)
+        texto = " ".join(texto.split())[:TAMANHO_MAX_PERGUNTA]
+        if self.arquivo:
+            if self._saida is None:
+                os.makedirs(os.path.dirname(self.arquivo), exist_ok=True)
+                self._saida = open(self.arquivo, "a", encoding="utf-8")
+            self._saida.write(json.dumps([chave, texto], ensure_ascii=False) + "\n")
+            return
+        shingles = None
+        gid = self.grupo_da_chave.get(chave)
+        if gid is None:
+            gid = self.sem_vaga.get(chave)
+            if gid not in self.grupos:
+                shingles = shingles_da_pergunta(stems)
+                gid = self._grupo_parecido(shingles)
+        grupo = self.grupos[gid]
+        grupo["total"] += contagem
+        variante = grupo["variantes"].get(chave)
+        if variante is not None:
+            variante[1] += contagem
+        elif len(grupo["variantes"]) < VARIANTES_MAX:
+            self.sem_vaga.pop(chave, None)
+            self._guardar(gid, chave, [texto, contagem, self.ordem], shingles)
+            self.ordem += 1
+        else:
+            self._lembrar_sem_vaga(chave, gid)
+        if len(self.grupos) > GRUPOS_MAX:
+            self._podar()
+
+    def _lembrar_sem_vaga(self, chave, gid):
+        self.sem_vaga.pop(chave, None)
+        self.sem_vaga[chave] = gid
+        if len(self.sem_vaga) > SEM_VAGA_MAX:
+            # Ficam as lembradas mais recentemente (a ordem do dict é a de inserção)
+            for antiga in list(self.sem_vaga)[:SEM_VAGA_MAX // 4]:
+                del self.sem_vaga[antiga]
+
+    def fechar(self):
+        if self._saida is not None:
+            self._saida.close()
+            self._saida = None
+
+    def mesclar(self, outro):
+        """Repassa, na ordem, as perguntas que `outro` (o agrupador de um worker) anotou em arquivo."""
+        outro.fechar()
+        if not outro.arquivo or not os.path.exists(outro.arquivo):
+            return
+        with open(outro.arquivo, "r", encoding="utf-8") as f:
+            for linha in f:
+                chave, texto = json.loads(linha)
+                self.registrar(chave.split(), texto)
+
+    def _grupo_parecido(self, shingles):
+        candidatas = sorted({c for faixa in faixas_minhash(shingles) for c in self.bandas.get(faixa, ())})
+        parecidos = set()
+        for candidata in candidatas:
+            gid = self.grupo_da_chave[candidata]
+            if gid not in parecidos and jaccard(shingles, self.shingles[candidata]) >= LIMIAR_JACCARD:
+                parecidos.add(gid)
+        if not parecidos:
+            gid = self.proximo_id
+            self.proximo_id += 1
+            self.grupos[gid] = {"total": 0, "variantes": {}}
+            return gid
+        destino, *outros = sorted(parecidos)
+        for gid in outros:
+            self._unir(destino, gid)
+        return destino
+
+    def _guardar(self, gid, chave, variante, shingles=None):
+        self.grupos[gid]["variantes"][chave] = variante
+        self.grupo_da_chave[chave] = gid
+        if shingles is None:
+            shingles = shingles_da_pergunta(chave.split())
+        self.shingles[chave] = shingles
+        for faixa in faixas_minhash(shingles):
+            self.bandas.setdefault(faixa, []).append(chave)
+
+    def _esquecer(self, chave):
+        del self.grupo_da_chave[chave]
+        for faixa in faixas_minhash(self.shingles.pop(chave)):
+            chaves = self.bandas[faixa]
+            chaves.remove(chave)
+            if not chaves:
+                del self.bandas[faixa]
+
+    def _unir(self, destino, origem):
+        # As variações dos dois grupos disputam as VARIANTES_MAX vagas: ficam as mais frequentes
+        grupo, absorvido = self.grupos[destino], self.grupos.pop(origem)
+        grupo["total"] += absorvido["total"]
+        variantes = {**grupo["variantes"], **absorvido["variantes"]}
+        ordenadas = sorted(variantes.items(), key=lambda item: (-item[1][1], item[1][2]))
+        for chave, _ in ordenadas[VARIANTES_MAX:]:
+            self._esquecer(chave)
+        grupo["variantes"] = dict(sorted(ordenadas[:VARIANTES_MAX], key=lambda item: item[1][2]))
+        for chave in grupo["variantes"]:
+            self.grupo_da_chave[chave] = destino
+
+    def _podar(self):
+        # Folga de 1/4 para não podar a cada pergunta nova
+        ordenados = sorted(self.grupos, key=lambda gid: (self.grupos[gid]["total"], gid))
+        for gid in ordenados[:len(ordenados) - GRUPOS_MAX * 3 // 4]:
+            for chave in self.grupos.pop(gid)["variantes"]:
+                self._esquecer(chave)
+
+    def clusters(self, n=None):
+        """[{tamanho, variacoes, representante, exemplos}] do maior para o menor (empate: o que apareceu antes)."""
+        grupos = sorted(self.grupos.items(), key=lambda g: (-g[1]["total"], g[0]))
+        saida = []
+        for _, grupo in grupos[:n]:
+            ordenadas = sorted(grupo["variantes"].values(), key=lambda v: (-v[1], v[2]))
+            saida.append({
+                "tamanho": grupo["total"],
+                "variacoes": len(ordenadas),
+                "representante": ordenadas[0][0],
+                "exemplos": [texto for texto, _, _ in ordenadas[1:4]]
+            })
+        return saida
+
+    def para_json(self):
+        return {"proximo_id": self.proximo_id, "ordem": self.ordem,
+                "grupos": [[gid, grupo["total"], [[chave, *variante] for chave, variante in grupo["variantes"].items()]]
+                           for gid, grupo in self.grupos.items()],
+                "sem_vaga": [[chave, gid] for chave, gid in self.sem_vaga.items() if gid in self.grupos]}
+
+    @classmethod
+    def de_json(cls, dados):
+        agrupador = cls()
+        agrupador.proximo_id, agrupador.ordem = dados["proximo_id"], dados["ordem"]
+        for gid, total, variantes in dados["grupos"]:
+            agrupador.grupos[gid] = {"total": total, "variantes": {}}
+            for chave, texto, contagem, ordem in variantes:
+                agrupador._guardar(gid, chave, [texto, contagem, ordem])
+        agrupador.sem_vaga = dict(dados["sem_vaga"])
+        return agrupador
+
+    def __len__(self):
+        return len(self.grupos)
+
 # ===== Função de formatação ÚNICA e CORRETA =====
 def formatar_contagem(counter, stem_to_original, tipo="palavra"):
     if tipo == "palavra":
@@ -100,138 +579,748 @@ def formatar_contagem(counter, stem_to_original, tipo="palavra"):
     elif tipo == "trigrama":
         return [{"trigrama": " ".join(stem_to_original.get(s, s) for s in p), "contagem": c} for p, c in counter]
 
-# ===== Função principal =====
-def analisar_chat():
-    inicio = time.time()
-    logging.info("Iniciando análise do chat...")
+# ===== Estado acumulado (mesclável e serializável) =====
+CATEGORIAS = ("palavras", "bigramas", "trigramas")
+ESTAGIOS = ("indice", "carga", "limpeza", "classificacao", "stem", "ngramas", "contagem", "agrupamento", "serializacao")
+ESCOPOS = ("geral", "usuario", "gpt")
+ESTADO_VERSAO = 5
+ASSINATURA_BYTES = 4096
 
-    logs = carregar_chat_logs()
-    if not logs:
-        logging.info("Nenhum log encontrado. Encerrando.")
-        return
+def novo_contador(cat, topk=None):
+    # Com --topk-aproximado todas as categorias usam o sketch: o vocabulário de
+    # palavras (nomes, códigos de produto, erros de digitação) também não tem fim.
+    if topk:
+        return TopKAproximado(topk)
+    return Counter()
+
+def novos_contadores(topk=None):
+    return {cat: {escopo: novo_contador(cat, topk) for escopo in ESCOPOS} for cat in CATEGORIAS}
+
+def novo_segmento(topk=None):
+    return {"analise_sentimento": {"positivo": 0, "negativo": 0, "neutro": 0}, **novos_contadores(topk)}
 
-    stem_to_original = {}
-    
-    uso_por_usuario = Counter()
-    
-    resultado = {
-        "total_mensagens": len(logs),
+def novo_estado(topk=None, agrupar=True):
+    return {
+        "topk": topk,
+        "total_mensagens": 0,
         "palavras_chave": {"intelbras": 0, "codigo": 0},
         "analise_sentimento_geral": {"positivo": 0, "negativo": 0, "neutro": 0},
         "analise_sentimento_temporal": Counter(),
-        "palavras": {"geral": [], "usuario": [], "gpt": []},
-        "bigramas": {"geral": [], "usuario": [], "gpt": []},
-        "trigramas": {"geral": [], "usuario": [], "gpt": []},
-        "por_segmento": defaultdict(lambda: {
-            "analise_sentimento": {"positivo":0, "negativo":0, "neutro":0},
-            "palavras": {"geral": [], "usuario": [], "gpt": []},
-            "bigramas": {"geral": [], "usuario": [], "gpt": []},
-            "trigramas": {"geral": [], "usuario": [], "gpt": []}
-        })
+        **novos_contadores(topk),
+        "por_segmento": defaultdict(partial(novo_segmento, topk)),
+        "uso_por_usuario": Counter(),
+        "stem_to_original": {},
+        "limite_stems": LIMITE_STEMS_POR_TOPK * topk if topk else None,
+        "perguntas": AgrupadorPerguntas() if agrupar else None,  # None: sem agrupamento (--sem-agrupamento)
+        # Agregados parciais por dia ("AAAA-MM-DD"): só os desta execução, persistidos à parte (salvar_buckets)
+        "por_dia": BucketsDiarios(topk),
+        # Segundos gastos em cada estágio (ESTAGIOS) nesta execução; não vão para o checkpoint
+        "tempos": Counter()
     }
 
-    for entry in logs:
-        texto = " ".join(filter(None, [entry.get("pergunta"), entry.get("resposta")]))
-        sentimento = get_sentimento(texto)
-        resultado["analise_sentimento_geral"][sentimento] += 1
-        
-        username = entry.get("username")
-        if username:
-            uso_por_usuario[username] += 1
+def novo_bucket(topk=None):
+    """Agregado de um dia: o que as consultas por período (--desde/--ate) somam."""
+    return {
+        "total_mensagens": 0,
+        "palavras_chave": {"intelbras": 0, "codigo": 0},
+        "analise_sentimento": {"positivo": 0, "negativo": 0, "neutro": 0},
+        "por_segmento": Counter(),
+        "uso_por_usuario": Counter(),
+        **{cat: novo_contador(cat, topk) for cat in CATEGORIAS},
+        "stem_to_original": {},
+        "limite_stems": LIMITE_STEMS_POR_TOPK * topk if topk else None
+    }
+
+# ===== Grafias dos stems (modo top-k) =====
+LIMITE_STEMS_POR_TOPK = 4
+
+def sketches_do_estado(estado):
+    for bloco in (estado, *estado["por_segmento"].values()):
+        for cat in CATEGORIAS:
+            for escopo in ESCOPOS:
+                yield cat, bloco[cat][escopo]
+
+def sketches_do_bucket(bucket):
+    return ((cat, bucket[cat]) for cat in CATEGORIAS)
+
+def podar_stem_to_original(dono, sketches):
+    """
+    Modo top-k: quando stem_to_original passa de dono["limite_stems"], esquece
+    os stems que nenhum dos `sketches` conta mais — a grafia só é usada na
+    saída, para chaves que estão nos sketches. O limite passa a ser o dobro do
+    que sobrou (nunca menor que o anterior), para a poda não rodar a cada
+    mensagem enquanto os sketches ainda contam quase tudo.
+    """
+    limite = dono["limite_stems"]
+    if limite is None or len(dono["stem_to_original"]) <= limite:
+        return
+    contados = set()
+    for cat, sketch in sketches:
+        if cat == "palavras":
+            contados.update(sketch.contagens)
+        else:
+            for ngrama in sketch.contagens:
+                contados.update(ngrama)
+    dono["stem_to_original"] = {s: o for s, o in dono["stem_to_original"].items() if s in contados}
+    dono["limite_stems"] = max(limite, 2 * len(dono["stem_to_original"]))
+
+DIAS_EM_MEMORIA = 2   # o dia corrente e o anterior (mensagens perto da meia-noite podem chegar fora de ordem)
+
+class BucketsDiarios:
+    """Buckets por dia desta execução, com no máximo DIAS_EM_MEMORIA em memória.
+
+    O log é cronológico: quando chega um dia novo, o mais antigo já terminou e
+    é descarregado num pedaço em `diretorio` (AAAA-MM-DD.<n>.json; um dia que
+    reapareça fora de ordem gera outro pedaço, sem reler o anterior). Sem
+    `diretorio` tudo fica em memória. juntar_parciais soma os pedaços no final.
+    """
+    def __init__(self, topk=None, diretorio=None):
+        self.topk = topk
+        self.diretorio = diretorio
+        self.dias = {}
+        self.pedacos = Counter()
+
+    def __getitem__(self, dia):
+        bucket = self.dias.get(dia)
+        if bucket is None:
+            while self.diretorio and len(self.dias) >= DIAS_EM_MEMORIA:
+                self._descarregar(min(self.dias))
+            bucket = self.dias[dia] = novo_bucket(self.topk)
+        return bucket
+
+    def _descarregar(self, dia):
+        bucket = self.dias.pop(dia)
+        self.pedacos[dia] += 1
+        os.makedirs(self.diretorio, exist_ok=True)
+        _gravar_json(os.path.join(self.diretorio, f"{dia}.{self.pedacos[dia]}.json"), bucket_para_json(bucket))
+
+    def descarregar(self):
+        """Grava os dias que ainda estão em memória (fim da fatia ou da execução)."""
+        for dia in sorted(self.dias):
+            self._descarregar(dia)
+
+def classificar_entrada(pergunta_limpa, resposta_limpa):
+    """(segmento, sentimento) de uma mensagem, com os textos já passados por limpar_texto()."""
+    classificacao = CLASSIFICADOR.analisar(pergunta_limpa, resposta_limpa)
+    # Produto citado na pergunta decide o segmento; as palavras-chave só quando nada resolve
+    segmento = obter_classificador_produtos().segmento(pergunta_limpa) or classificacao.segmento
+    return segmento, sentimento_por_contagem(classificacao.positivos, classificacao.negativos)
+
+def dia_da_entrada(entry):
+    """Data (datetime.date) do campo "data" da entrada; None se ausente ou inválido."""
+    timestamp = entry.get("data")
+    if not timestamp:
+        return None
+    try:
+        return datetime.fromisoformat(timestamp.replace('Z', '+00:00')).date()
+    except (ValueError, TypeError, AttributeError):
+        logging.warning(f"Erro ao processar data: {timestamp}")
+        return None
+
+def processar_entrada(estado, entry):
+    tempos = estado["tempos"]
+    t0 = time.perf_counter()
+    pergunta = entry.get("pergunta")
+    resposta = entry.get("resposta")
+    pergunta_limpa = limpar_texto(pergunta) if pergunta else ""
+    resposta_limpa = limpar_texto(resposta) if resposta else ""
+    # Mesmos tokens de limpar_texto(pergunta + " " + resposta).split().
+    tokens_pergunta = pergunta_limpa.split()
+    tokens = tokens_pergunta + resposta_limpa.split()
+    t1 = time.perf_counter()
 
-        timestamp = entry.get("data")
-        if timestamp:
-            try:
-                dia = datetime.fromisoformat(timestamp.replace('Z', '+00:00')).date()
-                resultado["analise_sentimento_temporal"][f"{dia}-{sentimento}"] += 1
-            except (ValueError, TypeError):
-                logging.warning(f"Erro ao processar data: {timestamp}")
+    segmento, sentimento = classificar_entrada(pergunta_limpa, resposta_limpa)
+    dia = dia_da_entrada(entry)
+    t2 = time.perf_counter()
 
-        segmento = classificar_segmento(entry.get("pergunta", ""))
+    palavras_originais = [p for p in tokens if p not in STOPWORDS and len(p) > 1]
+    palavras_stemmed = [stem(p) for p in palavras_originais]
+    # Os stems da pergunta são o começo da lista (a pergunta vem antes da resposta nos tokens)
+    stems_pergunta = palavras_stemmed[:sum(1 for p in tokens_pergunta if p not in STOPWORDS and len(p) > 1)]
+    t3 = time.perf_counter()
 
-        texto_limpo = limpar_texto(texto)
-        palavras_originais = [p for p in texto_limpo.split() if p not in STOPWORDS and len(p) > 1]
-        palavras_stemmed = [st.stem(p) for p in palavras_originais]
+    bigramas = gerar_ngrams(palavras_stemmed, 2)
+    trigramas = gerar_ngrams(palavras_stemmed, 3)
+    t4 = time.perf_counter()
 
+    estado["total_mensagens"] += 1
+    estado["analise_sentimento_geral"][sentimento] += 1
+
+    username = entry.get("username")
+    if username:
+        estado["uso_por_usuario"][username] += 1
+
+    if dia:
+        estado["analise_sentimento_temporal"][f"{dia}-{sentimento}"] += 1
+
+    stem_to_original = estado["stem_to_original"]
+    for o, s in zip(palavras_originais, palavras_stemmed):
+        if s not in stem_to_original: stem_to_original[s] = o
+
+    cita_intelbras = STEM_INTELBRAS in palavras_stemmed
+    cita_codigo = STEM_CODIGO in palavras_stemmed
+    if cita_intelbras:
+        estado["palavras_chave"]["intelbras"] += 1
+    if cita_codigo:
+        estado["palavras_chave"]["codigo"] += 1
+
+    escopo = "gpt" if entry.get("origem", "usuario").lower() == "gpt" else "usuario"
+    dados_segmento = estado["por_segmento"][segmento]
+    for cat, ngram in zip(CATEGORIAS, [palavras_stemmed, bigramas, trigramas]):
+        estado[cat]["geral"].update(ngram)
+        estado[cat][escopo].update(ngram)
+        dados_segmento[cat]["geral"].update(ngram)
+        dados_segmento[cat][escopo].update(ngram)
+    podar_stem_to_original(estado, sketches_do_estado(estado))
+
+    dados_segmento["analise_sentimento"][sentimento] += 1
+
+    if dia:
+        bucket = estado["por_dia"][dia.isoformat()]
+        bucket["total_mensagens"] += 1
+        bucket["analise_sentimento"][sentimento] += 1
+        bucket["por_segmento"][segmento] += 1
+        if username:
+            bucket["uso_por_usuario"][username] += 1
+        if cita_intelbras:
+            bucket["palavras_chave"]["intelbras"] += 1
+        if cita_codigo:
+            bucket["palavras_chave"]["codigo"] += 1
+        for cat, ngram in zip(CATEGORIAS, [palavras_stemmed, bigramas, trigramas]):
+            bucket[cat].update(ngram)
+        stem_do_dia = bucket["stem_to_original"]
         for o, s in zip(palavras_originais, palavras_stemmed):
-            if s not in stem_to_original: stem_to_original[s] = o
-        
-        palavras_filtro_principais = [p for p in palavras_stemmed if p not in [st.stem("intelbras"), st.stem("codigo")]]
-
-        if st.stem("intelbras") in palavras_stemmed:
-            resultado["palavras_chave"]["intelbras"] += 1
-        if st.stem("código") in palavras_stemmed:
-            resultado["palavras_chave"]["codigo"] += 1
-
-        bigramas = gerar_ngrams(palavras_stemmed, 2)
-        trigramas = gerar_ngrams(palavras_stemmed, 3)
-
-        origem = entry.get("origem", "usuario").lower()
-        for cat, ngram in zip(["palavras", "bigramas", "trigramas"], [palavras_stemmed, bigramas, trigramas]):
-            resultado[cat]["geral"].extend(ngram)
-            if origem == "gpt":
-                resultado[cat]["gpt"].extend(ngram)
-            else:
-                resultado[cat]["usuario"].extend(ngram)
+            if s not in stem_do_dia: stem_do_dia[s] = o
+        podar_stem_to_original(bucket, sketches_do_bucket(bucket))
+    t5 = time.perf_counter()
 
-            resultado["por_segmento"][segmento][cat]["geral"].extend(ngram)
-            if origem == "gpt":
-                resultado["por_segmento"][segmento][cat]["gpt"].extend(ngram)
-            else:
-                resultado["por_segmento"][segmento][cat]["usuario"].extend(ngram)
+    stems_chave = stems_da_pergunta(stems_pergunta)
+    if stems_chave and estado["perguntas"] is not None:
+        estado["perguntas"].registrar(stems_chave, pergunta)
+    t6 = time.perf_counter()
+
+    tempos["limpeza"] += t1 - t0
+    tempos["classificacao"] += t2 - t1
+    tempos["stem"] += t3 - t2
+    tempos["ngramas"] += t4 - t3
+    tempos["contagem"] += t5 - t4
+    tempos["agrupamento"] += t6 - t5
+
+# ===== Mescla de estados parciais (processamento paralelo) =====
+def _mesclar_contador(destino, parcial):
+    if isinstance(destino, TopKAproximado):
+        destino.mesclar(parcial)
+    else:
+        destino.update(parcial)
+
+def _mesclar_contadores(destino, parcial):
+    for cat in CATEGORIAS:
+        for escopo in ESCOPOS:
+            _mesclar_contador(destino[cat][escopo], parcial[cat][escopo])
+
+def mesclar_estados(destino, parcial):
+    """Soma `parcial` em `destino`. Mesclando as fatias na ordem do arquivo, a
+    ordem de inserção dos Counters (critério de desempate do most_common) é a
+    mesma do processamento serial, então a saída exata sai byte a byte igual."""
+    destino["total_mensagens"] += parcial["total_mensagens"]
+    for bloco in ("palavras_chave", "analise_sentimento_geral"):
+        for chave, valor in parcial[bloco].items():
+            destino[bloco][chave] += valor
+    destino["analise_sentimento_temporal"].update(parcial["analise_sentimento_temporal"])
+    _mesclar_contadores(destino, parcial)
+    for segmento, data in parcial["por_segmento"].items():
+        dados_segmento = destino["por_segmento"][segmento]
+        for sentimento, valor in data["analise_sentimento"].items():
+            dados_segmento["analise_sentimento"][sentimento] += valor
+        _mesclar_contadores(dados_segmento, data)
+    destino["uso_por_usuario"].update(parcial["uso_por_usuario"])
+    stem_to_original = destino["stem_to_original"]
+    for s, o in parcial["stem_to_original"].items():
+        if s not in stem_to_original: stem_to_original[s] = o
+    podar_stem_to_original(destino, sketches_do_estado(destino))
+    if destino["perguntas"] is not None:
+        t0 = time.perf_counter()
+        destino["perguntas"].mesclar(parcial["perguntas"])
+        destino["tempos"]["agrupamento"] += time.perf_counter() - t0
+    for dia, bucket in parcial["por_dia"].dias.items():
+        mesclar_buckets(destino["por_dia"][dia], bucket)
+    destino["tempos"].update(parcial["tempos"])
+    return destino
+
+def mesclar_buckets(destino, parcial):
+    destino["total_mensagens"] += parcial["total_mensagens"]
+    for bloco in ("palavras_chave", "analise_sentimento"):
+        for chave, valor in parcial[bloco].items():
+            destino[bloco][chave] += valor
+    destino["por_segmento"].update(parcial["por_segmento"])
+    destino["uso_por_usuario"].update(parcial["uso_por_usuario"])
+    for cat in CATEGORIAS:
+        _mesclar_contador(destino[cat], parcial[cat])
+    stem_to_original = destino["stem_to_original"]
+    for s, o in parcial["stem_to_original"].items():
+        if s not in stem_to_original: stem_to_original[s] = o
+    podar_stem_to_original(destino, sketches_do_bucket(destino))
+    return destino
+
+def processar_leitor(estado, leitor):
+    # Streaming: cada entrada é lida, contabilizada e descartada. O tempo entre
+    # uma entrada e a próxima (leitura + json.loads) é o estágio "carga".
+    tempos = estado["tempos"]
+    antes = time.perf_counter()
+    for entry in leitor:
+        tempos["carga"] += time.perf_counter() - antes
+        processar_entrada(estado, entry)
+        antes = time.perf_counter()
+    tempos["carga"] += time.perf_counter() - antes
+
+def resumir_tempos(tempos, total):
+    medidos = sum(tempos.values())
+    partes = ", ".join(f"{estagio} {tempos[estagio]:.2f}s ({100 * tempos[estagio] / medidos:.0f}%)"
+                       for estagio in ESTAGIOS if medidos and estagio in tempos)
+    return f"Tempo por estágio ({medidos:.2f}s somados nos processos, {total:.2f}s de relógio): {partes}"
+
+def analisar_fatia(caminho, inicio, fim, topk, parcial, agrupar=True):
+    """
+    Tarefa de um worker: processa [inicio, fim) e devolve (estado, offset, lidas).
+    Os buckets diários e as perguntas da fatia vão para o diretório `parcial`,
+    não no estado (mesclar_estados e salvar_buckets os leem de lá, em ordem).
+    """
+    estado = novo_estado(topk, agrupar)
+    estado["por_dia"].diretorio = parcial
+    if agrupar:
+        estado["perguntas"] = AgrupadorPerguntas(os.path.join(parcial, PERGUNTAS_PARCIAIS))
+    leitor = LeitorChatLogs(caminho, inicio, fim)
+    processar_leitor(estado, leitor)
+    estado["por_dia"].descarregar()
+    if agrupar:
+        estado["perguntas"].fechar()
+    return estado, leitor.offset, leitor.lidas
+
+def _contador_para_json(contador, cat):
+    # Chaves de bigramas/trigramas são tuplas de stems (sem espaços): viram "a b c".
+    contagens = {(k if cat == "palavras" else " ".join(k)): c for k, c in contador.items()}
+    if isinstance(contador, TopKAproximado):
+        return {"capacidade": contador.capacidade, "piso": contador.piso, "contagens": contagens}
+    return contagens
+
+def _contador_de_json(dados, cat, topk):
+    if topk:
+        contagens = {(k if cat == "palavras" else tuple(k.split(" "))): c for k, c in dados["contagens"].items()}
+        return TopKAproximado(dados["capacidade"], contagens, dados["piso"])
+    return Counter({(k if cat == "palavras" else tuple(k.split(" "))): c for k, c in dados.items()})
+
+def _contadores_para_json(contadores):
+    return {cat: {escopo: _contador_para_json(contadores[cat][escopo], cat) for escopo in ESCOPOS} for cat in CATEGORIAS}
+
+def _contadores_de_json(dados, topk):
+    return {cat: {escopo: _contador_de_json(dados[cat][escopo], cat, topk) for escopo in ESCOPOS} for cat in CATEGORIAS}
+
+def estado_para_json(estado):
+    return {
+        "topk": estado["topk"],
+        "total_mensagens": estado["total_mensagens"],
+        "palavras_chave": estado["palavras_chave"],
+        "analise_sentimento_geral": estado["analise_sentimento_geral"],
+        "analise_sentimento_temporal": dict(estado["analise_sentimento_temporal"]),
+        **_contadores_para_json(estado),
+        "por_segmento": {
+            segmento: {"analise_sentimento": data["analise_sentimento"], **_contadores_para_json(data)}
+            for segmento, data in estado["por_segmento"].items()
+        },
+        "uso_por_usuario": dict(estado["uso_por_usuario"]),
+        "stem_to_original": estado["stem_to_original"],
+        "perguntas": estado["perguntas"] and estado["perguntas"].para_json()
+    }
+
+def estado_de_json(dados):
+    topk = dados["topk"]
+    estado = novo_estado(topk)
+    estado["total_mensagens"] = dados["total_mensagens"]
+    estado["palavras_chave"] = dados["palavras_chave"]
+    estado["analise_sentimento_geral"] = dados["analise_sentimento_geral"]
+    estado["analise_sentimento_temporal"] = Counter(dados["analise_sentimento_temporal"])
+    estado.update(_contadores_de_json(dados, topk))
+    for segmento, data in dados["por_segmento"].items():
+        estado["por_segmento"][segmento] = {"analise_sentimento": data["analise_sentimento"], **_contadores_de_json(data, topk)}
+    estado["uso_por_usuario"] = Counter(dados["uso_por_usuario"])
+    estado["stem_to_original"] = dados["stem_to_original"]
+    estado["perguntas"] = dados["perguntas"] and AgrupadorPerguntas.de_json(dados["perguntas"])
+    return estado
+
+def bucket_para_json(bucket):
+    return {
+        "total_mensagens": bucket["total_mensagens"],
+        "palavras_chave": bucket["palavras_chave"],
+        "analise_sentimento": bucket["analise_sentimento"],
+        "por_segmento": dict(bucket["por_segmento"]),
+        "uso_por_usuario": dict(bucket["uso_por_usuario"]),
+        **{cat: _contador_para_json(bucket[cat], cat) for cat in CATEGORIAS},
+        "stem_to_original": bucket["stem_to_original"]
+    }
+
+def bucket_de_json(dados, topk):
+    return {
+        "total_mensagens": dados["total_mensagens"],
+        "palavras_chave": dados["palavras_chave"],
+        "analise_sentimento": dados["analise_sentimento"],
+        "por_segmento": Counter(dados["por_segmento"]),
+        "uso_por_usuario": Counter(dados["uso_por_usuario"]),
+        **{cat: _contador_de_json(dados[cat], cat, topk) for cat in CATEGORIAS},
+        "stem_to_original": dados["stem_to_original"],
+        "limite_stems": LIMITE_STEMS_POR_TOPK * topk if topk else None
+    }
+
+# ===== Checkpoint do modo incremental =====
+def assinatura_log(caminho, offset):
+    """Identifica o trecho já processado: hash do início do arquivo até `offset`."""
+    with open(caminho, "rb") as f:
+        cabeca = f.read(min(offset, ASSINATURA_BYTES))
+    return hashlib.sha256(cabeca).hexdigest()
 
-        resultado["por_segmento"][segmento]["analise_sentimento"][sentimento] += 1
-    
+def carregar_checkpoint(caminho_logs=CHAT_LOG_PATH, caminho_estado=ESTADO_PATH, topk=None, agrupar=True):
+    """Devolve (estado, offset) do checkpoint, ou None se for preciso reconstruir tudo."""
+    try:
+        with open(caminho_estado, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (json.JSONDecodeError, OSError) as e:
+        logging.warning(f"Checkpoint ilegível ({e}). Reconstruindo do zero.")
+        return None
+
+    if checkpoint.get("versao") != ESTADO_VERSAO:
+        logging.info("Checkpoint de outra versão do analisador. Reconstruindo do zero.")
+        return None
+    if checkpoint["estado"]["topk"] != topk:
+        logging.info("Checkpoint gerado com outro --topk-aproximado. Reconstruindo do zero.")
+        return None
+    if (checkpoint["estado"]["perguntas"] is not None) != agrupar:
+        logging.info("Checkpoint gerado com outra opção de agrupamento de perguntas. Reconstruindo do zero.")
+        return None
+    if checkpoint.get("produtos") != assinatura_produtos():
+        logging.info("Catálogo de produtos mudou desde a última execução. Reconstruindo do zero.")
+        return None
+
+    offset = checkpoint["offset"]
+    try:
+        tamanho = os.path.getsize(caminho_logs)
+    except OSError:
+        return None
+    if tamanho < offset:
+        logging.info("Log truncado desde a última execução. Reconstruindo do zero.")
+        return None
+    if assinatura_log(caminho_logs, offset) != checkpoint["assinatura"]:
+        logging.info("Log rotacionado desde a última execução. Reconstruindo do zero.")
+        return None
+
+    return estado_de_json(checkpoint["estado"]), offset
+
+def salvar_checkpoint(estado, offset, caminho_logs=CHAT_LOG_PATH, caminho_estado=ESTADO_PATH):
+    checkpoint = {
+        "versao": ESTADO_VERSAO,
+        "offset": offset,
+        "assinatura": assinatura_log(caminho_logs, offset),
+        "produtos": assinatura_produtos(),
+        "estado": estado_para_json(estado)
+    }
+    temporario = caminho_estado + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, ensure_ascii=False)
+    os.replace(temporario, caminho_estado)
+
+# ===== Buckets diários =====
+# Um arquivo por dia em BUCKETS_DIR (AAAA-MM-DD.json) e um indice.json com os
+# dias existentes e o ponto do log (offset + assinatura) até onde eles contam.
+# O índice é gravado depois dos buckets e antes do checkpoint: se a execução
+# cair no meio, o offset dele não bate com o do checkpoint e a próxima
+# execução incremental reconstrói tudo em vez de contar mensagens duas vezes.
+BUCKETS_INDICE = "indice.json"
+BUCKETS_PARCIAIS = ".parciais"   # dias descarregados e perguntas anotadas durante a execução, um subdiretório por fatia
+PERGUNTAS_PARCIAIS = "perguntas.jsonl"
+
+def diretorio_parcial(fatia, diretorio=BUCKETS_DIR):
+    return os.path.join(diretorio, BUCKETS_PARCIAIS, str(fatia))
+
+def _gravar_json(caminho, dados):
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(temporario, caminho)
+
+def carregar_indice_buckets(diretorio=BUCKETS_DIR):
+    try:
+        with open(os.path.join(diretorio, BUCKETS_INDICE), "r", encoding="utf-8") as f:
+            indice = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return indice if indice.get("versao") == ESTADO_VERSAO else None
+
+def ler_bucket(caminho, topk):
+    with open(caminho, "r", encoding="utf-8") as f:
+        return bucket_de_json(json.load(f), topk)
+
+def carregar_bucket(dia, topk, diretorio=BUCKETS_DIR):
+    return ler_bucket(os.path.join(diretorio, f"{dia}.json"), topk)
+
+def juntar_parciais(parciais, topk, anterior=None):
+    """
+    (dia, bucket) em ordem cronológica, somando os pedaços que BucketsDiarios
+    descarregou em `parciais` (na ordem do arquivo), com um dia por vez em
+    memória. `anterior(dia)` devolve o bucket já existente do dia, ao qual os
+    pedaços são somados, ou None.
+    """
+    pedacos = defaultdict(list)
+    for parcial in parciais:
+        if not os.path.isdir(parcial):
+            continue
+        nomes = (nome.split(".") for nome in os.listdir(parcial) if nome.endswith(".json"))
+        for dia, n, _ in sorted(nomes, key=lambda partes: (partes[0], int(partes[1]))):
+            pedacos[dia].append(os.path.join(parcial, f"{dia}.{n}.json"))
+    for dia in sorted(pedacos):
+        bucket = anterior(dia) if anterior else None
+        for caminho in pedacos[dia]:
+            lido = ler_bucket(caminho, topk)
+            bucket = lido if bucket is None else mesclar_buckets(bucket, lido)
+        yield dia, bucket
+
+def buckets_em_dia(offset, topk, caminho_logs=CHAT_LOG_PATH, diretorio=BUCKETS_DIR):
+    """Os buckets gravados cobrem exatamente o log até `offset` (o do checkpoint)?"""
+    indice = carregar_indice_buckets(diretorio)
+    return bool(indice) and indice["topk"] == topk and indice["offset"] == offset \
+        and indice["assinatura"] == assinatura_log(caminho_logs, offset)
+
+def salvar_buckets(parciais, offset, topk, substituir, caminho_logs=CHAT_LOG_PATH, diretorio=BUCKETS_DIR):
+    """
+    Grava os buckets desta execução, descarregados em `parciais` (um diretório
+    por fatia, na ordem do arquivo; ver juntar_parciais). Com `substituir`
+    (análise completa) os dias que não vieram somem; senão cada dia é somado
+    ao que já estava em disco (o gravado antes, depois o novo: a ordem de
+    inserção continua cronológica).
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    indice = None if substituir else carregar_indice_buckets(diretorio)
+    dias = {} if indice is None else indice["dias"]
+    anterior = lambda dia: carregar_bucket(dia, topk, diretorio) if dia in dias else None
+    for dia, bucket in juntar_parciais(parciais, topk, anterior):
+        _gravar_json(os.path.join(diretorio, f"{dia}.json"), bucket_para_json(bucket))
+        dias[dia] = bucket["total_mensagens"]
+    if substituir:
+        for nome in os.listdir(diretorio):
+            if nome.endswith(".json") and nome != BUCKETS_INDICE and nome[:-len(".json")] not in dias:
+                os.remove(os.path.join(diretorio, nome))
+    _gravar_json(os.path.join(diretorio, BUCKETS_INDICE), {
+        "versao": ESTADO_VERSAO,
+        "topk": topk,
+        "offset": offset,
+        "assinatura": assinatura_log(caminho_logs, offset),
+        "dias": dict(sorted(dias.items()))
+    })
+    shutil.rmtree(os.path.join(diretorio, BUCKETS_PARCIAIS), ignore_errors=True)
+
+def consultar_periodo(desde=None, ate=None, diretorio=BUCKETS_DIR):
+    """
+    Resumo de [desde, ate] (strings "AAAA-MM-DD", inclusivas; None = sem
+    limite) somando só os buckets desses dias, sem reler o log.
+    """
+    indice = carregar_indice_buckets(diretorio)
+    if indice is None:
+        raise FileNotFoundError(f"Nenhum bucket diário em {diretorio}. Rode a análise antes.")
+    dias = [d for d in sorted(indice["dias"]) if (not desde or d >= desde) and (not ate or d <= ate)]
+    buckets = ((dia, carregar_bucket(dia, indice["topk"], diretorio)) for dia in dias)
+    return resumir_periodo(buckets, indice["topk"], desde, ate)
+
+def analisar_periodo(desde=None, ate=None, diretorio=ARMAZEM_DIR, topk=None):
+    """
+    Mesmo resumo de consultar_periodo, mas recontando as mensagens do período
+    direto do armazém segmentado (depois de ingerir o que o Node acrescentou):
+    só os segmentos cujo intervalo de datas cruza [desde, ate] são abertos.
+    Não depende de uma análise anterior nem dos buckets em disco.
+    """
+    armazem = ArmazemLogs(diretorio)
+    armazem.ingerir(CHAT_LOG_PATH)
+    estado = novo_estado(topk, agrupar=False)  # o resumo por período não tem clusters
+    leitor = armazem.leitor(desde and date.fromisoformat(desde), ate and date.fromisoformat(ate))
+    with tempfile.TemporaryDirectory(prefix="buckets_periodo_") as parcial:
+        estado["por_dia"].diretorio = parcial
+        processar_leitor(estado, leitor)
+        estado["por_dia"].descarregar()
+        logging.info(f"{leitor.lidas} mensagens do período lidas de {len(armazem.segmentos(leitor.desde, leitor.ate))} segmentos.")
+        return resumir_periodo(juntar_parciais([parcial], topk), topk, desde, ate)
+
+def resumir_periodo(buckets, topk, desde, ate):
+    """Soma os buckets [(dia, bucket)] em ordem cronológica no formato da consulta por período."""
+    total = novo_bucket(topk)
+    sentimento_por_dia = {}
+    for dia, bucket in buckets:
+        sentimento_por_dia[dia] = bucket["analise_sentimento"]
+        mesclar_buckets(total, bucket)
+
+    stem_to_original = total["stem_to_original"]
+    top_usuario = total["uso_por_usuario"].most_common(1)
+    return {
+        "periodo": {"desde": desde, "ate": ate, "dias": len(sentimento_por_dia)},
+        "total_mensagens": total["total_mensagens"],
+        "palavras_chave": total["palavras_chave"],
+        "analise_sentimento_geral": total["analise_sentimento"],
+        "analise_sentimento_diario": sentimento_por_dia,
+        **{f"top_{cat}_geral": formatar_contagem(total[cat].most_common(TOP_N), stem_to_original, TIPO_DA_CATEGORIA[cat])
+           for cat in CATEGORIAS},
+        "mensagens_por_segmento": dict(total["por_segmento"].most_common()),
+        "usuario_mais_ativo": {"username": top_usuario[0][0], "contagem": top_usuario[0][1]} if top_usuario else {"username": "N/A", "contagem": 0},
+        "ranking_usuarios": [{"username": user, "contagem": count} for user, count in total["uso_por_usuario"].most_common()]
+    }
+
+# ===== Saída =====
+TIPO_DA_CATEGORIA = {"palavras": "palavra", "bigramas": "bigrama", "trigramas": "trigrama"}
+TOP_N = 20
+
+def gerar_tops(contadores, stem_to_original):
+    """top_<categoria>_<escopo> de um bloco de contadores, na ordem: escopo e depois categoria."""
+    return {f"top_{cat}_{escopo}": formatar_contagem(contadores[cat][escopo].most_common(TOP_N), stem_to_original, TIPO_DA_CATEGORIA[cat])
+            for escopo in ESCOPOS for cat in CATEGORIAS}
+
+def gerar_saida(estado):
+    stem_to_original = estado["stem_to_original"]
+    uso_por_usuario = estado["uso_por_usuario"]
     top_usuario = uso_por_usuario.most_common(1)
-    
+
     output = {
-        "total_mensagens": resultado["total_mensagens"],
-        "palavras_chave": resultado["palavras_chave"],
-        "analise_sentimento_geral": resultado["analise_sentimento_geral"],
-        "analise_sentimento_temporal": dict(resultado["analise_sentimento_temporal"]),
-        "top_palavras_geral": formatar_contagem(Counter(resultado["palavras"]["geral"]).most_common(20), stem_to_original, "palavra"),
-        "top_bigramas_geral": formatar_contagem(Counter(resultado["bigramas"]["geral"]).most_common(20), stem_to_original, "bigrama"),
-        "top_trigramas_geral": formatar_contagem(Counter(resultado["trigramas"]["geral"]).most_common(20), stem_to_original, "trigrama"),
-        "top_palavras_usuario": formatar_contagem(Counter(resultado["palavras"]["usuario"]).most_common(20), stem_to_original, "palavra"),
-        "top_bigramas_usuario": formatar_contagem(Counter(resultado["bigramas"]["usuario"]).most_common(20), stem_to_original, "bigrama"),
-        "top_trigramas_usuario": formatar_contagem(Counter(resultado["trigramas"]["usuario"]).most_common(20), stem_to_original, "trigrama"),
-        "top_palavras_gpt": formatar_contagem(Counter(resultado["palavras"]["gpt"]).most_common(20), stem_to_original, "palavra"),
-        "top_bigramas_gpt": formatar_contagem(Counter(resultado["bigramas"]["gpt"]).most_common(20), stem_to_original, "bigrama"),
-        "top_trigramas_gpt": formatar_contagem(Counter(resultado["trigramas"]["gpt"]).most_common(20), stem_to_original, "trigrama"),
-        "por_segmento": {},
+        "total_mensagens": estado["total_mensagens"],
+        "palavras_chave": estado["palavras_chave"],
+        "analise_sentimento_geral": estado["analise_sentimento_geral"],
+        "analise_sentimento_temporal": dict(estado["analise_sentimento_temporal"]),
+        **gerar_tops(estado, stem_to_original),
+        "por_segmento": {
+            segmento: {"analise_sentimento": data["analise_sentimento"], **gerar_tops(data, stem_to_original)}
+            for segmento, data in estado["por_segmento"].items()
+        },
         "usuario_mais_ativo": {"username": top_usuario[0][0], "contagem": top_usuario[0][1]} if top_usuario else {"username": "N/A", "contagem": 0},
-        "ranking_usuarios": [{"username": user, "contagem": count} for user, count in uso_por_usuario.most_common()]
+        "ranking_usuarios": [{"username": user, "contagem": count} for user, count in uso_por_usuario.most_common()],
+        "clusters_perguntas": estado["perguntas"] and estado["perguntas"].clusters(TOP_N)
     }
+    return output
 
-    for segmento, data in resultado["por_segmento"].items():
-        output["por_segmento"][segmento] = {
-            "analise_sentimento": data["analise_sentimento"],
-            "top_palavras_geral": formatar_contagem(Counter(data["palavras"]["geral"]).most_common(20), stem_to_original, "palavra"),
-            "top_bigramas_geral": formatar_contagem(Counter(data["bigramas"]["geral"]).most_common(20), stem_to_original, "bigrama"),
-            "top_trigramas_geral": formatar_contagem(Counter(data["trigramas"]["geral"]).most_common(20), stem_to_original, "trigrama"),
-            "top_palavras_usuario": formatar_contagem(Counter(data["palavras"]["usuario"]).most_common(20), stem_to_original, "palavra"),
-            "top_bigramas_usuario": formatar_contagem(Counter(data["bigramas"]["usuario"]).most_common(20), stem_to_original, "bigrama"),
-            "top_trigramas_usuario": formatar_contagem(Counter(data["trigramas"]["usuario"]).most_common(20), stem_to_original, "trigrama"),
-            "top_palavras_gpt": formatar_contagem(Counter(data["palavras"]["gpt"]).most_common(20), stem_to_original, "palavra"),
-            "top_bigramas_gpt": formatar_contagem(Counter(data["bigramas"]["gpt"]).most_common(20), stem_to_original, "bigrama"),
-            "top_trigramas_gpt": formatar_contagem(Counter(data["trigramas"]["gpt"]).most_common(20), stem_to_original, "trigrama")
-        }
-
+def salvar_resultados(estado):
+    # JSON compacto: mesmo conteúdo de antes, sem a indentação (o dashboard só faz JSON.parse)
     with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=4, ensure_ascii=False)
+        json.dump(gerar_saida(estado), f, ensure_ascii=False, separators=(",", ":"))
 
     resumo_diario = defaultdict(lambda: {"positivo":0, "negativo":0, "neutro":0})
-    for key, count in resultado["analise_sentimento_temporal"].items():
+    for key, count in estado["analise_sentimento_temporal"].items():
         dia, sentimento = key.rsplit("-", 1)
         resumo_diario[dia][sentimento] += count
 
     with open(RESUMO_DIARIO_PATH, "w", encoding="utf-8") as f:
-        json.dump(resumo_diario, f, indent=4, ensure_ascii=False)
+        json.dump(resumo_diario, f, ensure_ascii=False, separators=(",", ":"))
+
+# ===== Função principal =====
+def analisar_chat(incremental=False, topk_aproximado=None, workers=1, agrupar_perguntas=True):
+    inicio = time.time()
+    logging.info("Iniciando análise do chat...")
+
+    checkpoint = carregar_checkpoint(CHAT_LOG_PATH, ESTADO_PATH, topk_aproximado, agrupar_perguntas) if incremental else None
+    if checkpoint and not buckets_em_dia(checkpoint[1], topk_aproximado, CHAT_LOG_PATH, BUCKETS_DIR):
+        logging.info("Buckets diários fora de sincronia com o checkpoint. Reconstruindo do zero.")
+        checkpoint = None
+    if checkpoint:
+        estado, offset = checkpoint
+        logging.info(f"Modo incremental: retomando do byte {offset} ({estado['total_mensagens']} mensagens já processadas).")
+    else:
+        estado, offset = novo_estado(topk_aproximado, agrupar_perguntas), 0
+
+    # Restos de uma execução interrompida não podem entrar nos buckets desta
+    shutil.rmtree(os.path.join(BUCKETS_DIR, BUCKETS_PARCIAIS), ignore_errors=True)
+    t0 = time.perf_counter()
+    classificador = obter_classificador_produtos()  # montado uma vez; o pool recebe o índice pronto
+    estado["tempos"]["indice"] += time.perf_counter() - t0
+    if workers > 1:
+        fatias = dividir_em_fatias(CHAT_LOG_PATH, offset, workers)
+        parciais = [diretorio_parcial(i, BUCKETS_DIR) for i in range(len(fatias))]
+        logging.info(f"Processando {len(fatias)} fatias em {workers} processos.")
+        lidas = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=instalar_classificador_produtos,
+                                 initargs=(classificador.unidade_por_chave,)) as pool:
+            tarefas = [pool.submit(analisar_fatia, CHAT_LOG_PATH, ini, fim, topk_aproximado, pasta, agrupar_perguntas)
+                       for (ini, fim), pasta in zip(fatias, parciais)]
+            # Redução determinística: sempre na ordem das fatias no arquivo.
+            for tarefa in tarefas:
+                parcial, offset, lidas_fatia = tarefa.result()
+                mesclar_estados(estado, parcial)
+                lidas += lidas_fatia
+    else:
+        parciais = [diretorio_parcial(0, BUCKETS_DIR)]
+        estado["por_dia"].diretorio = parciais[0]
+        leitor = LeitorChatLogs(CHAT_LOG_PATH, offset)
+        processar_leitor(estado, leitor)
+        estado["por_dia"].descarregar()
+        offset, lidas = leitor.offset, leitor.lidas
+
+    if not estado["total_mensagens"]:
+        logging.info("Nenhum log encontrado. Encerrando.")
+        return
+
+    if agrupar_perguntas:
+        logging.info(f"{len(estado['perguntas'])} grupos de perguntas parecidas.")
+
+    t0 = time.perf_counter()
+    salvar_resultados(estado)
+    salvar_buckets(parciais, offset, topk_aproximado, not checkpoint, CHAT_LOG_PATH, BUCKETS_DIR)
+    salvar_checkpoint(estado, offset, CHAT_LOG_PATH, ESTADO_PATH)
+    estado["tempos"]["serializacao"] += time.perf_counter() - t0
 
+    logging.info(f"Cache de stems: {stem.cache_info()}")
+    logging.info(f"Cache de segmentos por produto: {obter_classificador_produtos().cache_info()}")
     fim = time.time()
-    logging.info(f"✅ Análise concluída em {fim - inicio:.2f} segundos. Resultado salvo em {OUTPUT_PATH}")
-    logging.info(f"Resumo diário salvo em {RESUMO_DIARIO_PATH}")
+    logging.info(resumir_tempos(estado["tempos"], fim - inicio))
+    logging.info(f"✅ Análise concluída em {fim - inicio:.2f} segundos ({lidas} novas mensagens). Resultado salvo em {OUTPUT_PATH}")
+    logging.info(f"Resumo diário salvo em {RESUMO_DIARIO_PATH}; buckets por dia em {BUCKETS_DIR}")
+    return estado
 
 # ===== Execução =====
 if __name__ == "__main__":
-    analisar_chat()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Análise dos logs do assistente virtual.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="processa só as linhas novas desde o último checkpoint (reconstrói tudo se o log foi truncado/rotacionado)")
+    parser.add_argument("--topk-aproximado", type=int, metavar="K",
+                        help="conta palavras, bigramas e trigramas com um sketch Space-Saving de K chaves (memória limitada, contagens aproximadas)")
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="divide o log em N fatias processadas em paralelo (saída idêntica à serial no modo exato)")
+    parser.add_argument("--sem-agrupamento", action="store_true",
+                        help="não agrupa perguntas parecidas (clusters_perguntas sai null); acelera reconstruções completas")
+    parser.add_argument("--exportar-colunar", action="store_true",
+                        help="ao final, atualiza as tabelas colunares por dia (exportar_colunar.py)")
+    parser.add_argument("--desde", type=date.fromisoformat, metavar="AAAA-MM-DD",
+                        help="consulta: em vez de analisar o log, soma os buckets diários a partir deste dia")
+    parser.add_argument("--ate", type=date.fromisoformat, metavar="AAAA-MM-DD",
+                        help="consulta: soma os buckets diários até este dia (inclusive)")
+    parser.add_argument("--armazem", action="store_true",
+                        help="consulta: reconta o período direto dos segmentos do armazém de logs (armazem_logs.py) em vez dos buckets")
+    parser.add_argument("--saida", metavar="ARQUIVO", help="consulta: grava o resultado aqui em vez de imprimir")
+    parser.add_argument("--profile", nargs="?", const=PROFILE_PATH, metavar="ARQUIVO",
+                        help=f"roda a análise sob o cProfile e grava as estatísticas (padrão: {PROFILE_PATH}); "
+                             "os 25 maiores tempos acumulados vão para o log. Com --workers só o processo principal é medido")
+    args = parser.parse_args()
+    if args.desde or args.ate:
+        consulta = analisar_periodo if args.armazem else consultar_periodo
+        resultado = consulta(args.desde and args.desde.isoformat(), args.ate and args.ate.isoformat())
+        if args.saida:
+            with open(args.saida, "w", encoding="utf-8") as f:
+                json.dump(resultado, f, ensure_ascii=False, indent=4)
+        else:
+            print(json.dumps(resultado, ensure_ascii=False, indent=4))
+    else:
+        opcoes = dict(incremental=args.incremental, topk_aproximado=args.topk_aproximado, workers=args.workers,
+                      agrupar_perguntas=not args.sem_agrupamento)
+        if args.profile:
+            import cProfile, io, pstats
+            perfil = cProfile.Profile()
+            perfil.runcall(analisar_chat, **opcoes)
+            perfil.dump_stats(args.profile)
+            resumo = io.StringIO()
+            pstats.Stats(perfil, stream=resumo).sort_stats("cumulative").print_stats(25)
+            logging.info(f"Perfil salvo em {args.profile} (abrir com: python -m pstats {args.profile})\n{resumo.getvalue()}")
+        else:
+            analisar_chat(**opcoes)
+        if args.exportar_colunar:
+            from exportar_colunar import exportar
+            exportar()
@@ -0,0 +1,347 @@
+# armazem_logs.py
+# Armazenamento dos logs do chat em segmentos JSONL rotacionados.
+# O Node continua só acrescentando linhas em chat_logs.json; daqui, `ingerir`
+# copia as linhas completas novas (a partir do offset já ingerido) para o
+# segmento ativo em chat_logs_segmentos/. Um segmento é fechado ao passar de
+# SEGMENTO_MAX_BYTES ou SEGMENTO_MAX_LINHAS e os fechados mais antigos podem
+# ser comprimidos (gzip). O indice.json guarda, por segmento, o offset lógico
+# (bytes descomprimidos desde o início do armazém), o tamanho, o número de
+# linhas e o intervalo de datas, então uma consulta por período abre só os
+# segmentos que o cruzam.
+#
+# O índice é a fonte da verdade: quem lê para no tamanho registrado nele e
+# quem escreve grava as linhas, faz fsync e só então regrava o índice (escrita
+# atômica). Bytes além do registrado (escrita interrompida) são descartados
+# na próxima escrita. Escritores se excluem por flock no arquivo .trava.
+#
+# Uso: python armazem_logs.py [--ingerir] [--comprimir] [--desde AAAA-MM-DD] [--ate AAAA-MM-DD]
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos, só entre threads
+    fcntl = None
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHAT_LOG_PATH = os.path.join(ROOT_DIR, "chat_logs.json")
+ARMAZEM_DIR = os.path.join(ROOT_DIR, "backend_py", "chat_logs_segmentos")
+INDICE = "indice.json"
+TRAVA = ".trava"
+INDICE_VERSAO = 1
+SEGMENTO_MAX_BYTES = 16 * 1024 * 1024
+SEGMENTO_MAX_LINHAS = 100_000
+SEGMENTOS_QUENTES = 2   # fechados mais recentes que ficam sem compressão
+ASSINATURA_BYTES = 4096
+LOTE_INGESTAO = 10_000    # linhas gravadas por vez ao ingerir
+
+
+def momento(timestamp):
+    """datetime do campo "data" (ISO 8601, "Z" aceito); None se ausente ou inválido."""
+    if not timestamp or not isinstance(timestamp, str):
+        return None
+    try:
+        return datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def _dia(timestamp):
+    m = momento(timestamp)
+    return m.date() if m else None
+
+
+def _comparavel(m):
+    # Sem fuso = UTC, só para ordenar; o dia continua o do próprio timestamp (como no analisador)
+    return m if m.tzinfo else m.replace(tzinfo=timezone.utc)
+
+
+def _assinatura_origem(caminho, offset):
+    with open(caminho, "rb") as f:
+        return hashlib.sha256(f.read(min(offset, ASSINATURA_BYTES))).hexdigest()
+
+
+class ArmazemLogs:
+    def __init__(self, diretorio=ARMAZEM_DIR, max_bytes=SEGMENTO_MAX_BYTES, max_linhas=SEGMENTO_MAX_LINHAS):
+        self.diretorio = diretorio
+        self.max_bytes = max_bytes
+        self.max_linhas = max_linhas
+        self._lock = threading.Lock()
+
+    # ----- índice -----
+    def _caminho(self, nome):
+        return os.path.join(self.diretorio, nome)
+
+    def carregar_indice(self):
+        try:
+            with open(self._caminho(INDICE), "r", encoding="utf-8") as f:
+                indice = json.load(f)
+        except FileNotFoundError:
+            indice = None
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"Índice do armazém de logs ilegível ({e}).")
+            indice = None
+        if indice is None or indice.get("versao") != INDICE_VERSAO:
+            return {"versao": INDICE_VERSAO, "origem": None, "segmentos": []}
+        return indice
+
+    def _gravar_indice(self, indice):
+        temporario = self._caminho(INDICE + ".tmp")
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(indice, f, ensure_ascii=False, indent=1)
+        os.replace(temporario, self._caminho(INDICE))
+
+    @contextmanager
+    def _travado(self):
+        os.makedirs(self.diretorio, exist_ok=True)
+        with self._lock, open(self._caminho(TRAVA), "a") as trava:
+            if fcntl:
+                fcntl.flock(trava, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(trava, fcntl.LOCK_UN)
+
+    # ----- escrita -----
+    def _novo_segmento(self, indice):
+        segmentos = indice["segmentos"]
+        inicio = segmentos[-1]["inicio"] + segmentos[-1]["bytes"] if segmentos else 0
+        numero = int(segmentos[-1]["nome"].split(".")[0]) + 1 if segmentos else 1
+        segmento = {"nome": f"{numero:06d}.jsonl", "inicio": inicio, "bytes": 0, "linhas": 0,
+                    "data_min": None, "data_max": None, "dia_min": None, "dia_max": None,
+                    "fechado": False, "comprimido": False}
+        open(self._caminho(segmento["nome"]), "wb").close()
+        segmentos.append(segmento)
+        return segmento
+
+    def _segmento_ativo(self, indice):
+        segmentos = indice["segmentos"]
+        if not segmentos or segmentos[-1]["fechado"]:
+            return self._novo_segmento(indice)
+        return segmentos[-1]
+
+    def _acrescentar(self, indice, linhas):
+        """Grava `linhas` ([(bytes terminados em b"\\n", timestamp)]) rotacionando pelo caminho."""
+        gravadas = 0
+        while gravadas < len(linhas):
+            segmento = self._segmento_ativo(indice)
+            lote, tamanho = [], 0
+            for bruta, _ in linhas[gravadas:]:
+                cheio = segmento["bytes"] + tamanho >= self.max_bytes or segmento["linhas"] + len(lote) >= self.max_linhas
+                if cheio and (lote or segmento["linhas"]):
+                    break
+                lote.append(bruta)
+                tamanho += len(bruta)
+            if lote:
+                with open(self._caminho(segmento["nome"]), "r+b") as f:
+                    f.truncate(segmento["bytes"])  # sobra de uma escrita interrompida
+                    f.seek(segmento["bytes"])
+                    f.write(b"".join(lote))
+                    f.flush()
+                    os.fsync(f.fileno())
+                segmento["bytes"] += tamanho
+                segmento["linhas"] += len(lote)
+                for _, timestamp in linhas[gravadas:gravadas + len(lote)]:
+                    self._estender_datas(segmento, timestamp)
+                gravadas += len(lote)
+            if gravadas < len(linhas):
+                os.truncate(self._caminho(segmento["nome"]), segmento["bytes"])
+                segmento["fechado"] = True
+        return gravadas
+
+    @staticmethod
+    def _estender_datas(segmento, timestamp):
+        m = momento(timestamp)
+        if m is None:
+            return
+        dia = m.date().isoformat()
+        if segmento["data_min"] is None:
+            segmento["data_min"] = segmento["data_max"] = timestamp
+            segmento["dia_min"] = segmento["dia_max"] = dia
+            return
+        m = _comparavel(m)
+        if m < _comparavel(momento(segmento["data_min"])): segmento["data_min"] = timestamp
+        if m > _comparavel(momento(segmento["data_max"])): segmento["data_max"] = timestamp
+        segmento["dia_min"] = min(segmento["dia_min"], dia)
+        segmento["dia_max"] = max(segmento["dia_max"], dia)
+
+    def acrescentar(self, entradas):
+        """Acrescenta entradas (dicts) ao armazém. Devolve quantas foram gravadas."""
+        linhas = [((json.dumps(e, ensure_ascii=False) + "\n").encode("utf-8"), e.get("data")) for e in entradas]
+        with self._travado():
+            indice = self.carregar_indice()
+            gravadas = self._acrescentar(indice, linhas)
+            self._gravar_indice(indice)
+        return gravadas
+
+    def ingerir(self, origem=CHAT_LOG_PATH):
+        """
+        Copia as linhas completas novas de `origem` para o armazém. Uma linha
+        final sem "\\n" (o Node ainda escrevendo) fica para a próxima vez;
+        linhas que não são JSON válido são descartadas com aviso. Se a origem
+        foi truncada ou trocada, recomeça dela do início: o que já foi
+        ingerido continua nos segmentos.
+        """
+        with self._travado():
+            indice = self.carregar_indice()
+            ponto = indice["origem"] or {}
+            offset = ponto.get("offset", 0) if ponto.get("caminho") == os.path.abspath(origem) else 0
+            try:
+                tamanho = os.path.getsize(origem)
+            except OSError:
+                logging.error(f"Arquivo {origem} não encontrado.")
+                return 0
+            if offset and (tamanho < offset or _assinatura_origem(origem, offset) != ponto.get("assinatura")):
+                logging.info(f"{origem} foi truncado ou rotacionado. Ingerindo desde o início.")
+                offset = 0
+
+            linhas, gravadas = [], 0
+            with open(origem, "rb") as f:
+                f.seek(offset)
+                for bruta in f:
+                    if not bruta.endswith(b"\n"):
+                        break
+                    offset += len(bruta)
+                    bruta = bruta.strip()
+                    if not bruta:
+                        continue
+                    try:
+                        entry = json.loads(bruta)
+                    except ValueError as e:
+                        logging.warning(f"Erro JSON: {bruta[:50]!r}... -> {e}")
+                        continue
+                    linhas.append((bruta + b"\n", entry.get("data") if isinstance(entry, dict) else None))
+                    if len(linhas) >= LOTE_INGESTAO:
+                        gravadas += self._acrescentar(indice, linhas)
+                        linhas = []
+            gravadas += self._acrescentar(indice, linhas)
+            indice["origem"] = {"caminho": os.path.abspath(origem), "offset": offset,
+                                "assinatura": _assinatura_origem(origem, offset)}
+            self._gravar_indice(indice)
+        if gravadas:
+            logging.info(f"{gravadas} linhas novas de {origem} ingeridas em {self.diretorio}.")
+        return gravadas
+
+    def comprimir_frios(self, quentes=SEGMENTOS_QUENTES):
+        """Comprime (gzip) os segmentos fechados, menos os `quentes` mais recentes."""
+        comprimidos = 0
+        with self._travado():
+            indice = self.carregar_indice()
+            fechados = [s for s in indice["segmentos"] if s["fechado"]]
+            for segmento in fechados[:max(len(fechados) - quentes, 0)]:
+                if segmento["comprimido"]:
+                    continue
+                original = self._caminho(segmento["nome"])
+                nome = segmento["nome"] + ".gz"
+                with open(original, "rb") as entrada, gzip.open(self._caminho(nome + ".tmp"), "wb") as saida:
+                    shutil.copyfileobj(entrada, saida)
+                os.replace(self._caminho(nome + ".tmp"), self._caminho(nome))
+                segmento["nome"], segmento["comprimido"] = nome, True
+                self._gravar_indice(indice)  # antes de apagar o original: o índice nunca aponta para o vazio
+                os.remove(original)
+                comprimidos += 1
+        return comprimidos
+
+    # ----- leitura -----
+    def segmentos(self, desde=None, ate=None):
+        """Segmentos cujo intervalo de datas cruza [desde, ate] (datetime.date, inclusivas)."""
+        escolhidos = []
+        for segmento in self.carregar_indice()["segmentos"]:
+            if not segmento["linhas"]:
+                continue
+            if desde or ate:
+                primeiro, ultimo = segmento["dia_min"], segmento["dia_max"]
+                if primeiro is None or (desde and ultimo < desde.isoformat()) or (ate and primeiro > ate.isoformat()):
+                    continue
+            escolhidos.append(segmento)
+        return escolhidos
+
+    def leitor(self, desde=None, ate=None, inicio=0):
+        return LeitorArmazem(self, desde, ate, inicio)
+
+    def __len__(self):
+        return sum(s["linhas"] for s in self.carregar_indice()["segmentos"])
+
+
+class LeitorArmazem:
+    """Itera as entradas do armazém a partir do offset lógico `inicio`.
+
+    Lê cada segmento só até o tamanho registrado no índice (o que um escritor
+    ainda não confirmou não aparece) e ignora linha sem "\\n" no fim. Com
+    `desde`/`ate`, abre só os segmentos do período e descarta as entradas de
+    fora dele (inclusive as sem data). `offset` e `lidas` como no LeitorChatLogs.
+    """
+    def __init__(self, armazem, desde=None, ate=None, inicio=0):
+        self.armazem = armazem
+        self.desde = desde
+        self.ate = ate
+        self.offset = inicio
+        self.lidas = 0
+
+    def _abrir(self, segmento):
+        caminho = self.armazem._caminho(segmento["nome"])
+        if segmento["comprimido"]:
+            return gzip.open(caminho, "rb")
+        try:
+            return open(caminho, "rb")
+        except FileNotFoundError:  # comprimido depois que o índice foi lido
+            return gzip.open(caminho + ".gz", "rb")
+
+    def __iter__(self):
+        filtrar = self.desde or self.ate
+        for segmento in self.armazem.segmentos(self.desde, self.ate):
+            fim = segmento["inicio"] + segmento["bytes"]
+            if fim <= self.offset:
+                continue
+            posicao = max(self.offset, segmento["inicio"])
+            with self._abrir(segmento) as f:
+                f.seek(posicao - segmento["inicio"])
+                for bruta in f:
+                    if posicao + len(bruta) > fim or not bruta.endswith(b"\n"):
+                        break
+                    posicao += len(bruta)
+                    self.offset = posicao
+                    try:
+                        entry = json.loads(bruta)
+                    except ValueError as e:
+                        logging.warning(f"Erro JSON no segmento {segmento['nome']}: {bruta[:50]!r}... -> {e}")
+                        continue
+                    if filtrar:
+                        dia = _dia(entry.get("data"))
+                        if dia is None or (self.desde and dia < self.desde) or (self.ate and dia > self.ate):
+                            continue
+                    self.lidas += 1
+                    yield entry
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    parser = argparse.ArgumentParser(description="Armazém segmentado dos logs do chat.")
+    parser.add_argument("--diretorio", default=ARMAZEM_DIR)
+    parser.add_argument("--ingerir", action="store_true", help=f"copia as linhas novas de {CHAT_LOG_PATH}")
+    parser.add_argument("--comprimir", action="store_true", help="comprime os segmentos fechados antigos")
+    parser.add_argument("--quentes", type=int, default=SEGMENTOS_QUENTES, help="segmentos fechados mantidos sem compressão")
+    parser.add_argument("--desde", type=date.fromisoformat, metavar="AAAA-MM-DD")
+    parser.add_argument("--ate", type=date.fromisoformat, metavar="AAAA-MM-DD")
+    args = parser.parse_args()
+
+    armazem = ArmazemLogs(args.diretorio)
+    if args.ingerir:
+        armazem.ingerir()
+    if args.comprimir:
+        logging.info(f"{armazem.comprimir_frios(args.quentes)} segmentos comprimidos.")
+    segmentos = armazem.segmentos(args.desde, args.ate)
+    for s in segmentos:
+        print(f"{s['nome']:<16} {s['linhas']:>8} linhas {s['bytes'] / 1024:>9.0f} KiB  {s['data_min']} .. {s['data_max']}")
+    if args.desde or args.ate:
+        leitor = armazem.leitor(args.desde, args.ate)
+        print(f"{sum(1 for _ in leitor)} mensagens no período, em {len(segmentos)} segmentos.")
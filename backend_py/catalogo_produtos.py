@@ -0,0 +1,326 @@
+# catalogo_produtos.py
+# Catálogo de produtos em memória: carrega produtos_intelbras.json,
+# produtos_ppa.json e o snapshot de setembro uma vez, em registros compactos,
+# com índices por código, unidade/segmento, modelo e um índice invertido de
+# radicais da descrição. Os arquivos são recarregados sozinhos quando mudam.
+#
+# Uso: python catalogo_produtos.py "mhdx 1208" [--modo auto|exato|prefixo|fuzzy|texto] [--limite 10]
+import argparse
+import json
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+
+from processamento_texto import STOPWORDS, limpar_texto, stem
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Em ordem de precedência: um código presente em mais de uma fonte fica com a primeira
+FONTES = (
+    ("intelbras", os.path.join(ROOT_DIR, "produtos_intelbras.json")),
+    ("ppa", os.path.join(ROOT_DIR, "produtos_ppa.json")),
+    ("setembro", os.path.join(ROOT_DIR, "produtos_intelbras_september.json")),
+)
+INTERVALO_VERIFICACAO = 2.0   # segundos entre dois stat() dos arquivos
+TAMANHO_MIN_MODELO = 4
+FUZZY_CORTE = 0.75
+
+RE_ALFANUMERICO = re.compile(r"[a-z0-9]+")
+RE_SO_DIGITOS = re.compile(r"^\d+$")
+
+
+class Produto:
+    __slots__ = ("codigo", "descricao", "unidade", "segmento", "tabela", "psd", "pscf", "valor_tabela", "status", "fonte")
+
+    def __init__(self, codigo, descricao, unidade=None, segmento=None, tabela=None, psd=None, pscf=None,
+                 valor_tabela=None, status=None, fonte=None):
+        self.codigo = codigo
+        self.descricao = descricao
+        self.unidade = unidade
+        self.segmento = segmento
+        self.tabela = tabela
+        self.psd = psd
+        self.pscf = pscf
+        self.valor_tabela = valor_tabela
+        self.status = status
+        self.fonte = fonte
+
+    def para_dict(self):
+        return {campo: getattr(self, campo) for campo in self.__slots__ if getattr(self, campo) is not None}
+
+    def __repr__(self):
+        return f"Produto({self.codigo!r}, {self.descricao[:40]!r})"
+
+
+def _numero(valor):
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def produto_de_registro(registro, fonte):
+    # produtos_intelbras*.json: codigo/descricao/unidade/...; produtos_ppa.json: Código/Descrição/Valor Tabela
+    if "codigo" in registro:
+        return Produto(str(registro["codigo"]), registro.get("descricao") or "",
+                       unidade=registro.get("unidade") or None, segmento=registro.get("segmento") or None,
+                       tabela=registro.get("tabela") or None, psd=_numero(registro.get("psd")),
+                       pscf=_numero(registro.get("pscf")), status=registro.get("status") or None, fonte=fonte)
+    return Produto(str(registro["Código"]), registro.get("Descrição") or "", tabela="PPA",
+                   valor_tabela=_numero(registro.get("Valor Tabela")), fonte=fonte)
+
+
+def normalizar_modelo(texto):
+    # "MHDX 3108-C" -> "mhdx3108c"
+    return "".join(RE_ALFANUMERICO.findall(texto.lower()))
+
+
+def chaves_de_modelo(descricao):
+    """
+    Candidatos a modelo numa descrição: até três tokens seguidos,
+    concatenados, desde que a chave tenha letras e dígitos
+    ("Câmera VIPC 1230 D G2" -> vipc1230, vipc1230d, 1230dg2, ...), sem
+    repetição e na ordem em que aparecem.
+    """
+    tokens = RE_ALFANUMERICO.findall(descricao.lower())
+    chaves = {}
+    for i in range(len(tokens)):
+        chave = ""
+        for seguinte in tokens[i:i + 3]:
+            chave += seguinte
+            if len(chave) >= TAMANHO_MIN_MODELO and not chave.isdigit() and not chave.isalpha():
+                chaves[chave] = None
+    return list(chaves)
+
+
+def radicais(texto):
+    return [stem(p) for p in limpar_texto(texto).split() if p not in STOPWORDS and len(p) > 1]
+
+
+def trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def carregar_produtos(fontes=FONTES):
+    """Lê as fontes em ordem e devolve os Produto, sem códigos repetidos."""
+    produtos, vistos = [], set()
+    for fonte, caminho in fontes:
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                registros = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"Catálogo: não foi possível ler {caminho}: {e}")
+            continue
+        for registro in registros:
+            produto = produto_de_registro(registro, fonte)
+            if produto.codigo not in vistos:
+                vistos.add(produto.codigo)
+                produtos.append(produto)
+    return produtos
+
+
+class IndiceProdutos:
+    """Índices imutáveis sobre uma lista de Produto; o catálogo troca o índice inteiro ao recarregar."""
+
+    def __init__(self, produtos):
+        self.produtos = produtos
+        self.por_codigo = {p.codigo: p for p in produtos}
+        self.codigos = sorted(self.por_codigo)
+        self.por_unidade = defaultdict(list)
+        self.por_segmento = defaultdict(list)
+        self.por_modelo = defaultdict(list)      # chave de modelo -> posições em `produtos`
+        self.invertido = defaultdict(set)        # radical -> posições em `produtos`
+        for posicao, produto in enumerate(produtos):
+            if produto.unidade:
+                self.por_unidade[produto.unidade.upper()].append(produto)
+            if produto.segmento:
+                self.por_segmento[produto.segmento.upper()].append(produto)
+            for chave in chaves_de_modelo(produto.descricao):
+                self.por_modelo[chave].append(posicao)
+            for radical in radicais(produto.descricao):
+                self.invertido[radical].add(posicao)
+        self.modelos = sorted(self.por_modelo)
+        self.por_trigrama = defaultdict(list)
+        for chave in self.modelos:
+            for trigrama in trigramas(chave):
+                self.por_trigrama[trigrama].append(chave)
+
+    def _produtos(self, posicoes, limite):
+        return [self.produtos[p] for p in sorted(posicoes)[:limite]]
+
+    def obter(self, codigo):
+        return self.por_codigo.get(str(codigo).strip())
+
+    def buscar_codigo(self, prefixo, limite=10):
+        prefixo = str(prefixo).strip()
+        inicio = bisect_left(self.codigos, prefixo)
+        encontrados = []
+        for codigo in self.codigos[inicio:]:
+            if not codigo.startswith(prefixo) or len(encontrados) >= limite:
+                break
+            encontrados.append(self.por_codigo[codigo])
+        return encontrados
+
+    def buscar_modelo(self, consulta, modo="exato", limite=10):
+        chave = normalizar_modelo(consulta)
+        if len(chave) < 2:
+            return []
+        if modo == "exato":
+            return self._produtos(self.por_modelo.get(chave, ()), limite)
+        if modo == "prefixo":
+            posicoes = set()
+            for modelo in self.modelos[bisect_left(self.modelos, chave):]:
+                if not modelo.startswith(chave):
+                    break
+                posicoes.update(self.por_modelo[modelo])
+            return self._produtos(posicoes, limite)
+        if modo == "fuzzy":
+            # Só os modelos que dividem trigramas com a consulta passam pelo SequenceMatcher
+            comuns = Counter(m for t in trigramas(chave) for m in self.por_trigrama.get(t, ()))
+            pontuados = []
+            for modelo, _ in comuns.most_common(200):
+                razao = SequenceMatcher(None, chave, modelo).ratio()
+                if razao >= FUZZY_CORTE:
+                    pontuados.append((-razao, modelo))
+            vistos, encontrados = set(), []
+            for _, modelo in sorted(pontuados):
+                for posicao in self.por_modelo[modelo]:
+                    if posicao not in vistos and len(encontrados) < limite:
+                        vistos.add(posicao)
+                        encontrados.append(self.produtos[posicao])
+            return encontrados
+        raise ValueError(f"Modo de busca desconhecido: {modo}")
+
+    def buscar_texto(self, consulta, limite=10):
+        # Produtos com mais radicais da consulta primeiro; empate pela ordem das fontes
+        pontos = Counter()
+        for radical in set(radicais(consulta)):
+            pontos.update(self.invertido.get(radical, ()))
+        return [self.produtos[p] for p, _ in sorted(pontos.items(), key=lambda item: (-item[1], item[0]))[:limite]]
+
+    def buscar(self, consulta, limite=10):
+        """
+        Busca única para o chat: código (exato/prefixo), modelo exato,
+        prefixo de modelo, modelo fuzzy (se a consulta tem cara de modelo:
+        letras e dígitos) e por fim o texto da descrição.
+        Devolve (modo, produtos).
+        """
+        consulta = consulta.strip()
+        if RE_SO_DIGITOS.match(consulta):
+            produto = self.obter(consulta)
+            return ("codigo", [produto]) if produto else ("codigo_prefixo", self.buscar_codigo(consulta, limite))
+        chave = normalizar_modelo(consulta)
+        modos = ("exato", "prefixo", "fuzzy") if not chave.isdigit() and not chave.isalpha() else ("exato", "prefixo")
+        for modo in modos:
+            encontrados = self.buscar_modelo(consulta, modo, limite)
+            if encontrados:
+                return modo, encontrados
+        return "texto", self.buscar_texto(consulta, limite)
+
+
+class CatalogoProdutos:
+    """
+    Dono do IndiceProdutos atual. A cada consulta (no máximo a cada
+    `intervalo` segundos) confere mtime/tamanho das fontes e, se algo mudou,
+    monta um índice novo e troca a referência — quem já estava consultando
+    continua no índice antigo, sem travas na leitura.
+    """
+
+    def __init__(self, fontes=FONTES, intervalo=INTERVALO_VERIFICACAO):
+        self.fontes = fontes
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._assinatura = None
+        self._verificado = 0.0
+        self._indice = None
+        self.recarregar()
+
+    def _assinatura_fontes(self):
+        assinatura = []
+        for _, caminho in self.fontes:
+            try:
+                info = os.stat(caminho)
+                assinatura.append((info.st_mtime_ns, info.st_size))
+            except OSError:
+                assinatura.append(None)
+        return tuple(assinatura)
+
+    def recarregar(self):
+        with self._lock:
+            assinatura = self._assinatura_fontes()
+            inicio = time.perf_counter()
+            produtos = carregar_produtos(self.fontes)
+            self._indice = IndiceProdutos(produtos)
+            self._assinatura = assinatura
+            self._verificado = time.monotonic()
+            logging.info(f"Catálogo: {len(produtos)} produtos indexados em {time.perf_counter() - inicio:.2f}s")
+
+    @property
+    def indice(self):
+        agora = time.monotonic()
+        if agora - self._verificado >= self.intervalo:
+            self._verificado = agora
+            if self._assinatura_fontes() != self._assinatura:
+                self.recarregar()
+        return self._indice
+
+    def obter(self, codigo):
+        return self.indice.obter(codigo)
+
+    def por_unidade(self, unidade):
+        return list(self.indice.por_unidade.get(unidade.upper(), ()))
+
+    def por_segmento(self, segmento):
+        return list(self.indice.por_segmento.get(segmento.upper(), ()))
+
+    def buscar_codigo(self, prefixo, limite=10):
+        return self.indice.buscar_codigo(prefixo, limite)
+
+    def buscar_modelo(self, consulta, modo="exato", limite=10):
+        return self.indice.buscar_modelo(consulta, modo, limite)
+
+    def buscar_texto(self, consulta, limite=10):
+        return self.indice.buscar_texto(consulta, limite)
+
+    def buscar(self, consulta, limite=10):
+        return self.indice.buscar(consulta, limite)
+
+
+_catalogo = None
+_catalogo_lock = threading.Lock()
+
+
+def obter_catalogo():
+    # Instância única por processo, criada na primeira consulta
+    global _catalogo
+    with _catalogo_lock:
+        if _catalogo is None:
+            _catalogo = CatalogoProdutos()
+        return _catalogo
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Busca no catálogo de produtos.")
+    parser.add_argument("consulta")
+    parser.add_argument("--modo", choices=("auto", "exato", "prefixo", "fuzzy", "texto"), default="auto")
+    parser.add_argument("--limite", type=int, default=10)
+    args = parser.parse_args()
+
+    catalogo = obter_catalogo()
+    inicio = time.perf_counter()
+    if args.modo == "auto":
+        modo, produtos = catalogo.buscar(args.consulta, args.limite)
+    elif args.modo == "texto":
+        modo, produtos = "texto", catalogo.buscar_texto(args.consulta, args.limite)
+    else:
+        modo, produtos = args.modo, catalogo.buscar_modelo(args.consulta, args.modo, args.limite)
+    print(json.dumps({
+        "modo": modo,
+        "tempo_ms": round((time.perf_counter() - inicio) * 1000, 3),
+        "produtos": [p.para_dict() for p in produtos],
+    }, ensure_ascii=False, indent=2))
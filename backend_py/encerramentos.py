@@ -0,0 +1,265 @@
+# encerramentos.py
+# Produtos descontinuados e seus substitutos (encerramentos_intelbras_convertido.csv).
+# O CSV é lido uma vez para uma tabela em colunas, indexada por código,
+# nome normalizado e código do substituto; a cadeia de substituições
+# (A -> B -> C) de cada código já sai pronta, com detecção de ciclo.
+# A tabela é gravada em pickle ao lado do script e reaproveitada enquanto o
+# CSV não mudar (mtime + tamanho), então a partida a frio não reparseia nada.
+#
+# Uso: python encerramentos.py 1950419 4140038 ... [--nome "INVU 90128"] [--reconstruir]
+import argparse
+import csv
+import json
+import logging
+import os
+import pickle
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENCERRAMENTOS_PATH = os.path.join(ROOT_DIR, "encerramentos_intelbras_convertido.csv")
+INDICE_PATH = os.path.join(ROOT_DIR, "backend_py", "encerramentos_indice.pickle")
+INDICE_VERSAO = 2
+
+# "4950857 - NOME", "4600075-NOME", "4340003 – NOME", "(4615004) NOME"; "-" ou " - " = sem substituto
+RE_REFERENCIA = re.compile(r"^\s*\(?(\d{5,})\)?\s*[-–—]?\s*(.*?)\s*$", re.DOTALL)
+RE_ESPACOS = re.compile(r"\s+")
+RE_ALFANUMERICO = re.compile(r"[a-z0-9]+")
+
+COLUNAS = ("codigo", "produto", "unidade", "segmento", "familia", "uf_origem", "data",
+           "substituto", "substituto_nome", "indicacao", "indicacao_nome", "troca_expressa", "troca_expressa_nome")
+
+
+def ler_referencia(texto):
+    """"4950857 - GRAVADOR ..." -> ("4950857", "GRAVADOR ..."); vazio/"-" -> (None, None)."""
+    texto = (texto or "").strip()
+    if texto in ("", "-"):
+        return None, None
+    match = RE_REFERENCIA.match(texto)
+    if match:
+        return match.group(1), RE_ESPACOS.sub(" ", match.group(2)).strip(" -–") or None
+    return None, RE_ESPACOS.sub(" ", texto)
+
+
+def normalizar_nome(nome):
+    # "GRAVADOR DIG. DE VÍDEO INVU 90128-M1-FT" -> "gravador dig de video invu 90128 m1 ft"
+    sem_acento = unicodedata.normalize("NFKD", nome or "").encode("ascii", "ignore").decode("ascii")
+    return " ".join(RE_ALFANUMERICO.findall(sem_acento.lower()))
+
+
+def ler_registros(caminho=ENCERRAMENTOS_PATH):
+    # O CSV ou o JSON gêmeo de api/encerramentos/ (mesmas colunas)
+    if caminho.endswith(".json"):
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    with open(caminho, "r", encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+class TabelaEncerramentos:
+    """
+    Uma tupla por coluna (COLUNAS), alinhadas por posição, mais os índices:
+    código -> posição, nome normalizado -> posições, substituto -> códigos que
+    ele substitui, e a cadeia resolvida de cada código.
+    """
+
+    def __init__(self, registros):
+        linhas = []
+        for r in registros:
+            substituto, substituto_nome = ler_referencia(r.get("Substituto Direto"))
+            indicacao, indicacao_nome = ler_referencia(r.get("Indicação"))
+            troca, troca_nome = ler_referencia(r.get("Subs. Troca Expressa"))
+            linhas.append((
+                str(r.get("Código Produto", "")).strip(), RE_ESPACOS.sub(" ", r.get("Produto Descontinuado") or "").strip(),
+                (r.get("Unidade") or "").strip() or None, (r.get("Segmento") or "").strip() or None,
+                (r.get("Família") or "").strip() or None, (r.get("UF Origem") or "").strip() or None,
+                (r.get("Data") or "").strip() or None,
+                substituto, substituto_nome, indicacao, indicacao_nome, troca, troca_nome,
+            ))
+        colunas = list(zip(*linhas)) if linhas else [()] * len(COLUNAS)
+        for nome, valores in zip(COLUNAS, colunas):
+            setattr(self, nome, tuple(valores))
+
+        self.posicao = {}
+        for i, codigo in enumerate(self.codigo):
+            self.posicao.setdefault(codigo, i)   # código repetido: vale a primeira linha
+        self.por_nome = defaultdict(list)
+        for i, produto in enumerate(self.produto):
+            self.por_nome[normalizar_nome(produto)].append(i)
+        self.por_nome = dict(self.por_nome)
+        self.nomes = sorted(self.por_nome)
+        self.substituidos_por = defaultdict(list)
+        for codigo, substituto in zip(self.codigo, self.substituto):
+            if substituto:
+                self.substituidos_por[substituto].append(codigo)
+        self.substituidos_por = dict(self.substituidos_por)
+        self.cadeias = self._resolver_cadeias()
+
+    @classmethod
+    def do_estado(cls, estado):
+        # Reconstrói a partir de vars(tabela) sem reparsear nada
+        tabela = cls.__new__(cls)
+        tabela.__dict__.update(estado)
+        return tabela
+
+    def _resolver_cadeias(self):
+        """
+        codigo -> (cadeia, ciclo): a cadeia começa no próprio código e segue o
+        Substituto Direto enquanto o substituto também estiver descontinuado.
+        Cada código é percorrido uma vez; o sufixo já resolvido é reaproveitado.
+        """
+        cadeias = {}
+        for inicio in self.posicao:
+            if inicio in cadeias:
+                continue
+            caminho, vistos, atual = [], {}, inicio
+            ciclo = False
+            while atual is not None and atual not in cadeias:
+                if atual in vistos:
+                    ciclo = True
+                    break
+                vistos[atual] = len(caminho)
+                caminho.append(atual)
+                i = self.posicao.get(atual)
+                atual = self.substituto[i] if i is not None else None
+            if ciclo:
+                # A -> B -> A: cada código do laço percorre o laço inteiro uma vez,
+                # quem só leva até ele segue até o último antes de repetir
+                laco = vistos[atual]
+                for j, codigo in enumerate(caminho):
+                    cadeias[codigo] = (tuple(caminho[j:] + caminho[laco:j]), True)
+                continue
+            sufixo, sufixo_ciclo = cadeias.get(atual, ((), False)) if atual is not None else ((), False)
+            for j, codigo in enumerate(caminho):
+                cadeias[codigo] = (tuple(caminho[j:]) + sufixo, sufixo_ciclo)
+        return cadeias
+
+    def registro(self, codigo):
+        i = self.posicao.get(str(codigo).strip())
+        if i is None:
+            return None
+        return {nome: getattr(self, nome)[i] for nome in COLUNAS}
+
+    def resolver(self, codigo):
+        """
+        Situação de um código: se está descontinuado, o substituto direto, o
+        substituto final da cadeia (o primeiro que não está descontinuado, ou
+        o último da cadeia se ela termina sem substituto ativo) e a cadeia.
+        """
+        codigo = str(codigo).strip()
+        i = self.posicao.get(codigo)
+        if i is None:
+            return {"codigo": codigo, "descontinuado": False}
+        cadeia, ciclo = self.cadeias[codigo]
+        final = cadeia[-1] if len(cadeia) > 1 else None
+        if final is None:
+            final_nome = None
+        elif final in self.posicao:
+            final_nome = self.produto[self.posicao[final]]
+        else:
+            # Substituto ativo: o nome só aparece na linha de quem aponta para ele
+            final_nome = self.substituto_nome[self.posicao[cadeia[-2]]]
+        return {
+            "codigo": codigo,
+            "descontinuado": True,
+            "produto": self.produto[i],
+            "data": self.data[i],
+            "substituto_direto": self.substituto[i],
+            "substituto_direto_nome": self.substituto_nome[i],
+            "indicacao": self.indicacao[i],
+            "substituto_final": final,
+            "substituto_final_nome": final_nome,
+            "substituto_final_descontinuado": final is not None and final in self.posicao,
+            "cadeia": list(cadeia),
+            "ciclo": ciclo,
+        }
+
+    def resolver_varios(self, codigos):
+        """Resolve um lote inteiro de códigos: {código: resolver(código)}."""
+        return {str(c).strip(): self.resolver(c) for c in codigos}
+
+    def buscar_nome(self, nome, prefixo=False, limite=20):
+        chave = normalizar_nome(nome)
+        if not prefixo:
+            return [self.codigo[i] for i in self.por_nome.get(chave, ())][:limite]
+        encontrados = []
+        for nome_indice in self.nomes[bisect_left(self.nomes, chave):]:
+            if not nome_indice.startswith(chave) or len(encontrados) >= limite:
+                break
+            encontrados.extend(self.codigo[i] for i in self.por_nome[nome_indice])
+        return encontrados[:limite]
+
+    def substitui(self, codigo):
+        """Códigos descontinuados que têm `codigo` como Substituto Direto."""
+        return list(self.substituidos_por.get(str(codigo).strip(), ()))
+
+    def __len__(self):
+        return len(self.codigo)
+
+
+def _assinatura(caminho):
+    info = os.stat(caminho)
+    return (INDICE_VERSAO, os.path.abspath(caminho), info.st_mtime_ns, info.st_size)
+
+
+def carregar_tabela(caminho=ENCERRAMENTOS_PATH, caminho_indice=INDICE_PATH, reconstruir=False):
+    """
+    A tabela do pickle, se ele foi gerado a partir deste mesmo CSV (mtime e
+    tamanho iguais); senão reparseia o CSV e regrava o pickle (escrita atômica).
+    O pickle guarda só tuplas e dicts (vars da tabela), nunca a instância: assim
+    ele não depende do módulo em que a classe estava (__main__ na CLI).
+    """
+    assinatura = _assinatura(caminho)
+    if not reconstruir:
+        try:
+            with open(caminho_indice, "rb") as f:
+                if pickle.load(f) == assinatura:
+                    return TabelaEncerramentos.do_estado(pickle.load(f))
+        except FileNotFoundError:
+            pass
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+            logging.warning(f"Índice de encerramentos ilegível ({e}). Reconstruindo.")
+
+    tabela = TabelaEncerramentos(ler_registros(caminho))
+    temporario = caminho_indice + ".tmp"
+    try:
+        with open(temporario, "wb") as f:
+            pickle.dump(assinatura, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(vars(tabela), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporario, caminho_indice)
+    except OSError as e:
+        logging.warning(f"Não foi possível gravar o índice de encerramentos ({e}).")
+    return tabela
+
+
+_tabela = None
+_tabela_assinatura = None
+_tabela_lock = threading.Lock()
+
+
+def obter_tabela(caminho=ENCERRAMENTOS_PATH):
+    # Uma tabela por processo; recarrega se o CSV mudar
+    global _tabela, _tabela_assinatura
+    with _tabela_lock:
+        assinatura = _assinatura(caminho)
+        if _tabela is None or assinatura != _tabela_assinatura:
+            _tabela = carregar_tabela(caminho)
+            _tabela_assinatura = assinatura
+        return _tabela
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consulta de produtos descontinuados e substitutos.")
+    parser.add_argument("codigos", nargs="*")
+    parser.add_argument("--nome", help="busca pelo nome do produto descontinuado (prefixo, normalizado)")
+    parser.add_argument("--reconstruir", action="store_true", help="ignora o índice em pickle e reparseia o CSV")
+    args = parser.parse_args()
+
+    tabela = carregar_tabela(reconstruir=args.reconstruir)
+    codigos = list(args.codigos)
+    if args.nome:
+        codigos += tabela.buscar_nome(args.nome, prefixo=True)
+    print(json.dumps(tabela.resolver_varios(codigos), ensure_ascii=False, indent=2))
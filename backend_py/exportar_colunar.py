@@ -0,0 +1,259 @@
+# exportar_colunar.py
+# Exporta chat_logs.json e comparison_logs.json em tabelas colunares
+# particionadas por dia, mais as agregações prontas por dia e por
+# dia x segmento. O dashboard e as consultas avulsas leem só as colunas e os
+# dias de que precisam em vez do analise_logs.json inteiro.
+#
+# Com pyarrow instalado as partições são Parquet; sem ele, JSON colunar
+# ({"linhas": n, "colunas": {nome: [valores]}}), lido pela mesma ler_tabela().
+#
+#   colunar/
+#     manifesto.json                          formato, colunas e partições (linhas + hash) de cada tabela
+#     chat_logs/dia=2025-09-07/dados.parquet
+#     comparacoes/dia=2025-09-07/dados.parquet
+#     agregados_dia/dados.parquet
+#     agregados_dia_segmento/dados.parquet
+#
+# Partição cujo conteúdo não mudou (mesmo hash no manifesto) não é reescrita.
+#
+# Uso: python exportar_colunar.py [--destino pasta] [--formato parquet|json]
+#      python exportar_colunar.py --ler chat_logs --desde 2025-09-01 --ate 2025-09-07 --colunas dia,segmento
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+from collections import Counter, defaultdict
+
+from analisar_logs import CHAT_LOG_PATH, ROOT_DIR, LeitorChatLogs, classificar_entrada, dia_da_entrada
+from processamento_texto import limpar_texto
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+COMPARACOES_PATH = os.path.join(ROOT_DIR, "comparison_logs.json")
+DESTINO_PADRAO = os.path.join(ROOT_DIR, "backend_py", "colunar")
+MANIFESTO = "manifesto.json"
+SEM_DATA = "sem-data"   # partição das entradas sem "data" válida
+SENTIMENTOS = ("positivo", "negativo", "neutro")
+
+COLUNAS_CHAT = ("data", "dia", "username", "origem", "segmento", "sentimento", "pergunta", "resposta")
+COLUNAS_COMPARACOES = ("data", "dia", "camera1", "camera2", "resultado")
+COLUNAS_AGREGADOS_DIA = ("dia", "mensagens", "usuarios", "comparacoes", *SENTIMENTOS)
+COLUNAS_AGREGADOS_SEGMENTO = ("dia", "segmento", "mensagens", "usuarios", "origem_usuario", "origem_gpt", *SENTIMENTOS)
+
+
+def formato_padrao():
+    return "parquet" if pa is not None else "json"
+
+
+def _nova_tabela(colunas):
+    return {coluna: [] for coluna in colunas}
+
+
+def _dia(entry):
+    dia = dia_da_entrada(entry)
+    return dia.isoformat() if dia else SEM_DATA
+
+
+def colunas_do_chat(caminho=CHAT_LOG_PATH):
+    """Lê o chat em streaming e devolve {dia: {coluna: [valores]}}, já classificado."""
+    por_dia = defaultdict(lambda: _nova_tabela(COLUNAS_CHAT))
+    for entry in LeitorChatLogs(caminho):
+        pergunta = entry.get("pergunta") or ""
+        resposta = entry.get("resposta") or ""
+        segmento, sentimento = classificar_entrada(limpar_texto(pergunta) if pergunta else "",
+                                                   limpar_texto(resposta) if resposta else "")
+        dia = _dia(entry)
+        tabela = por_dia[dia]
+        tabela["data"].append(entry.get("data"))
+        tabela["dia"].append(dia)
+        tabela["username"].append(entry.get("username"))
+        tabela["origem"].append("gpt" if (entry.get("origem") or "usuario").lower() == "gpt" else "usuario")
+        tabela["segmento"].append(segmento)
+        tabela["sentimento"].append(sentimento)
+        tabela["pergunta"].append(pergunta)
+        tabela["resposta"].append(resposta)
+    return dict(por_dia)
+
+
+def colunas_das_comparacoes(caminho=COMPARACOES_PATH):
+    # comparison_logs.json tem o mesmo formato JSONL do chat (uma linha por comparação)
+    por_dia = defaultdict(lambda: _nova_tabela(COLUNAS_COMPARACOES))
+    for entry in LeitorChatLogs(caminho):
+        dia = _dia(entry)
+        tabela = por_dia[dia]
+        tabela["data"].append(entry.get("data"))
+        tabela["dia"].append(dia)
+        for coluna in ("camera1", "camera2", "resultado"):
+            tabela[coluna].append(entry.get(coluna))
+    return dict(por_dia)
+
+
+def agregar(chat, comparacoes):
+    """As duas tabelas de agregados (por dia e por dia x segmento), uma linha por chave, em ordem."""
+    por_dia = _nova_tabela(COLUNAS_AGREGADOS_DIA)
+    por_segmento = _nova_tabela(COLUNAS_AGREGADOS_SEGMENTO)
+    for dia in sorted(set(chat) | set(comparacoes)):
+        tabela = chat.get(dia) or _nova_tabela(COLUNAS_CHAT)
+        sentimentos = Counter(tabela["sentimento"])
+        por_dia["dia"].append(dia)
+        por_dia["mensagens"].append(len(tabela["dia"]))
+        por_dia["usuarios"].append(len({u for u in tabela["username"] if u}))
+        por_dia["comparacoes"].append(len(comparacoes.get(dia, {}).get("dia", ())))
+        for sentimento in SENTIMENTOS:
+            por_dia[sentimento].append(sentimentos[sentimento])
+
+        linhas = defaultdict(list)
+        for i, segmento in enumerate(tabela["segmento"]):
+            linhas[segmento].append(i)
+        for segmento in sorted(linhas):
+            indices = linhas[segmento]
+            sentimentos = Counter(tabela["sentimento"][i] for i in indices)
+            origens = Counter(tabela["origem"][i] for i in indices)
+            por_segmento["dia"].append(dia)
+            por_segmento["segmento"].append(segmento)
+            por_segmento["mensagens"].append(len(indices))
+            por_segmento["usuarios"].append(len({tabela["username"][i] for i in indices if tabela["username"][i]}))
+            por_segmento["origem_usuario"].append(origens["usuario"])
+            por_segmento["origem_gpt"].append(origens["gpt"])
+            for sentimento in SENTIMENTOS:
+                por_segmento[sentimento].append(sentimentos[sentimento])
+    return por_dia, por_segmento
+
+
+# ===== Escrita e leitura das partições =====
+def _hash_colunas(colunas):
+    return hashlib.sha256(json.dumps(colunas, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _arquivo(formato):
+    return "dados.parquet" if formato == "parquet" else "dados.json"
+
+
+def _gravar(caminho, colunas, formato):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = caminho + ".tmp"
+    if formato == "parquet":
+        pq.write_table(pa.table(colunas), temporario, compression="zstd")
+    else:
+        linhas = len(next(iter(colunas.values()), ()))
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"linhas": linhas, "colunas": colunas}, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(temporario, caminho)
+
+
+def _ler(caminho, formato, colunas=None):
+    if formato == "parquet":
+        return pq.read_table(caminho, columns=list(colunas) if colunas else None).to_pydict()
+    with open(caminho, "r", encoding="utf-8") as f:
+        dados = json.load(f)["colunas"]
+    return {c: dados[c] for c in colunas} if colunas else dados
+
+
+def carregar_manifesto(destino=DESTINO_PADRAO):
+    try:
+        with open(os.path.join(destino, MANIFESTO), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def exportar(destino=DESTINO_PADRAO, formato=None, caminho_chat=CHAT_LOG_PATH, caminho_comparacoes=COMPARACOES_PATH):
+    """Gera (ou atualiza) as tabelas em `destino` e devolve o manifesto gravado."""
+    formato = formato or formato_padrao()
+    if formato == "parquet" and pa is None:
+        raise RuntimeError("Formato parquet exige o pacote pyarrow (pip install pyarrow).")
+    anterior = carregar_manifesto(destino) or {}
+    if anterior.get("formato") != formato:
+        # Trocou o formato: regrava tudo, sem deixar arquivos do formato antigo para trás
+        for nome in anterior.get("tabelas", {}):
+            shutil.rmtree(os.path.join(destino, nome), ignore_errors=True)
+        anterior = {}
+
+    chat = colunas_do_chat(caminho_chat)
+    comparacoes = colunas_das_comparacoes(caminho_comparacoes)
+    agregados_dia, agregados_segmento = agregar(chat, comparacoes)
+    tabelas = {
+        "chat_logs": (COLUNAS_CHAT, chat),
+        "comparacoes": (COLUNAS_COMPARACOES, comparacoes),
+        "agregados_dia": (COLUNAS_AGREGADOS_DIA, {None: agregados_dia}),
+        "agregados_dia_segmento": (COLUNAS_AGREGADOS_SEGMENTO, {None: agregados_segmento}),
+    }
+
+    manifesto = {"formato": formato, "tabelas": {}}
+    gravadas = 0
+    for nome, (colunas, particoes) in tabelas.items():
+        antigas = anterior.get("tabelas", {}).get(nome, {}).get("particoes", {})
+        novas = {}
+        for dia in sorted(particoes, key=lambda d: d or ""):
+            relativo = os.path.join(nome, f"dia={dia}" if dia else "", _arquivo(formato))
+            chave = dia or "*"
+            digest = _hash_colunas(particoes[dia])
+            if antigas.get(chave, {}).get("sha256") != digest or not os.path.exists(os.path.join(destino, relativo)):
+                _gravar(os.path.join(destino, relativo), particoes[dia], formato)
+                gravadas += 1
+            novas[chave] = {"arquivo": relativo, "linhas": len(particoes[dia][colunas[0]]), "sha256": digest}
+        # Dias que sumiram do log (log rotacionado/truncado) saem do disco também
+        for chave, info in antigas.items():
+            if chave not in novas:
+                shutil.rmtree(os.path.dirname(os.path.join(destino, info["arquivo"])), ignore_errors=True)
+        manifesto["tabelas"][nome] = {"colunas": list(colunas), "particionada": nome in ("chat_logs", "comparacoes"), "particoes": novas}
+
+    os.makedirs(destino, exist_ok=True)
+    temporario = os.path.join(destino, MANIFESTO + ".tmp")
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, os.path.join(destino, MANIFESTO))
+    logging.info(f"Exportação colunar ({formato}) em {destino}: {gravadas} partições gravadas, "
+                 f"{sum(len(t['particoes']) for t in manifesto['tabelas'].values()) - gravadas} sem mudança.")
+    return manifesto
+
+
+def ler_tabela(nome, desde=None, ate=None, colunas=None, destino=DESTINO_PADRAO):
+    """
+    {coluna: [valores]} da tabela `nome`, só com as partições em [desde, ate]
+    (strings "AAAA-MM-DD") e só com as `colunas` pedidas. Nas tabelas de
+    agregados (uma partição só) o filtro de dia é aplicado linha a linha.
+    """
+    manifesto = carregar_manifesto(destino)
+    if not manifesto or nome not in manifesto["tabelas"]:
+        raise FileNotFoundError(f"Tabela {nome} não exportada em {destino}.")
+    info = manifesto["tabelas"][nome]
+    colunas = list(colunas) if colunas else info["colunas"]
+    dentro = lambda dia: dia != SEM_DATA and (not desde or dia >= desde) and (not ate or dia <= ate)
+    filtrar = bool(desde or ate)
+
+    resultado = _nova_tabela(colunas)
+    for chave, particao in sorted(info["particoes"].items()):
+        if info["particionada"] and filtrar and not dentro(chave):
+            continue
+        lidas = _ler(os.path.join(destino, particao["arquivo"]), manifesto["formato"],
+                     colunas if info["particionada"] or not filtrar else sorted(set(colunas) | {"dia"}))
+        if not info["particionada"] and filtrar:
+            manter = [i for i, dia in enumerate(lidas["dia"]) if dentro(dia)]
+            lidas = {c: [lidas[c][i] for i in manter] for c in colunas}
+        for coluna in colunas:
+            resultado[coluna].extend(lidas[coluna])
+    return resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exportação colunar (por dia) dos logs do chat e das comparações.")
+    parser.add_argument("--destino", default=DESTINO_PADRAO)
+    parser.add_argument("--formato", choices=("parquet", "json"), help="padrão: parquet se o pyarrow estiver instalado, senão json")
+    parser.add_argument("--ler", metavar="TABELA", help="em vez de exportar, lê uma tabela já exportada e imprime em JSON")
+    parser.add_argument("--desde", metavar="AAAA-MM-DD")
+    parser.add_argument("--ate", metavar="AAAA-MM-DD")
+    parser.add_argument("--colunas", help="colunas separadas por vírgula (com --ler)")
+    args = parser.parse_args()
+
+    if args.ler:
+        colunas = args.colunas.split(",") if args.colunas else None
+        print(json.dumps(ler_tabela(args.ler, args.desde, args.ate, colunas, args.destino), ensure_ascii=False))
+    else:
+        exportar(args.destino, args.formato)
@@ -0,0 +1,28 @@
+# processamento_texto.py
+# Limpeza, stopwords e stemming (RSLP) compartilhados pelos scripts de
+# backend_py: a análise dos logs do chat e o catálogo de produtos.
+import re
+from functools import lru_cache
+from nltk.stem import RSLPStemmer
+
+st = RSLPStemmer()
+
+STOPWORDS = frozenset({
+    "a", "o", "e", "de", "da", "do", "que", "em", "um", "uma", "para",
+    "com", "os", "as", "na", "no", "se", "é", "foi", "ser", "ao", "à",
+    "n", "mais", "marca", "linha", "unidade", "família", "status",
+    "indicação", "segmento", "undefined", "qual", "melhor", "boa", "bem",
+    "muito", "algum", "haver", "ter", "saber", "como", "ppa", "favor"
+})
+
+RE_NAO_TOKEN = re.compile(r"[^a-zà-ú0-9\s]")
+STEM_CACHE_MAX = 50_000
+
+@lru_cache(maxsize=STEM_CACHE_MAX)
+def stem(palavra):
+    # O vocabulário (chat, descrições do catálogo) é pequeno e repetitivo: o RSLP roda uma vez por forma.
+    return st.stem(palavra)
+
+def limpar_texto(texto):
+    texto = texto.lower().replace('\n', ' ').replace('\r', ' ')
+    return RE_NAO_TOKEN.sub(" ", texto)
@@ -0,0 +1,76 @@
+# bench_classificador.py — classificação de segmento/sentimento: laço de `in` original vs. ClassificadorTexto
+#
+# Uso: python benchmarks/bench_classificador.py [--fator 10] [--repeticoes 200]
+#
+# Multiplica as palavras-chave de SEGMENTOS por `--fator` (palavras sintéticas
+# aleatórias, que quase nunca aparecem no texto: o laço original precisa varrer
+# todas) e confere que os dois caminhos devolvem o mesmo segmento e sentimento.
+import argparse
+import os
+import random
+import sys
+import time
+
+from sinteticos import ROOT_DIR, CHAT_LOG_PATH, carregar_modelos_de_mensagem
+
+sys.path.insert(0, os.path.join(ROOT_DIR, "backend_py"))
+import analisar_logs as a
+
+def classificar_original(segmentos, pergunta, resposta):
+    segmento = "OUTRO"
+    for nome, keywords in segmentos.items():
+        if any(kw in pergunta for kw in keywords):
+            segmento = nome
+            break
+    palavras = set(f"{pergunta} {resposta}".split())
+    positivos = len(palavras.intersection(a.PALAVRAS_POSITIVAS))
+    negativos = len(palavras.intersection(a.PALAVRAS_NEGATIVAS))
+    return segmento, positivos, negativos
+
+def ampliar_segmentos(fator, semente=0):
+    rng = random.Random(semente)
+    letras = "abcdefghijklmnopqrstuvwxyzçãéó"
+    return {
+        nome: keywords + ["".join(rng.choice(letras) for _ in range(rng.randint(4, 9)))
+                          for _ in range((fator - 1) * len(keywords))]
+        for nome, keywords in a.SEGMENTOS.items()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do classificador de segmento/sentimento.")
+    parser.add_argument("--fator", type=int, default=10, help="multiplicador do número de palavras-chave")
+    parser.add_argument("--repeticoes", type=int, default=200)
+    args = parser.parse_args()
+
+    segmentos = ampliar_segmentos(args.fator)
+    classificador = a.ClassificadorTexto(segmentos, a.PALAVRAS_POSITIVAS, a.PALAVRAS_NEGATIVAS)
+    textos = []
+    for entry in carregar_modelos_de_mensagem(CHAT_LOG_PATH):
+        textos.append((a.limpar_texto(entry.get("pergunta") or ""), a.limpar_texto(entry.get("resposta") or "")))
+
+    for pergunta, resposta in textos:
+        r = classificador.analisar(pergunta, resposta)
+        esperado = classificar_original(segmentos, pergunta, resposta)
+        assert (r.segmento, r.positivos, r.negativos) == esperado, (pergunta[:60], r, esperado)
+
+    inicio = time.perf_counter()
+    for _ in range(args.repeticoes):
+        for pergunta, resposta in textos:
+            classificar_original(segmentos, pergunta, resposta)
+    antes = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for _ in range(args.repeticoes):
+        for pergunta, resposta in textos:
+            classificador.analisar(pergunta, resposta)
+    depois = time.perf_counter() - inicio
+
+    total = len(textos) * args.repeticoes
+    n_keywords = sum(len(k) for k in segmentos.values())
+    print(f"{n_keywords} palavras-chave de segmento ({args.fator}x), {len(textos)} mensagens × {args.repeticoes}")
+    print(f"laço de `in` : {total / antes:>10.0f} mensagens/s")
+    print(f"classificador: {total / depois:>10.0f} mensagens/s  ({antes / depois:.1f}x)")
+    print("resultados idênticos em todas as mensagens")
+
+if __name__ == "__main__":
+    main()
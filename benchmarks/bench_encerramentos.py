@@ -0,0 +1,53 @@
+# bench_encerramentos.py — partida a frio da tabela de encerramentos e resolução em lote
+#
+# Uso: python benchmarks/bench_encerramentos.py [--codigos 100000]
+#
+# Compara o parse do CSV (com montagem dos índices e das cadeias) com a
+# leitura do índice em pickle, confere que as duas tabelas resolvem igual e
+# mede códigos/s de resolver_varios com um lote misturando descontinuados,
+# substitutos ativos e códigos desconhecidos.
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sinteticos import ROOT_DIR
+
+sys.path.insert(0, os.path.join(ROOT_DIR, "backend_py"))
+import encerramentos as e
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da tabela de produtos descontinuados.")
+    parser.add_argument("--codigos", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        indice = os.path.join(pasta, "encerramentos_indice.pickle")
+        inicio = time.perf_counter()
+        do_csv = e.carregar_tabela(caminho_indice=indice, reconstruir=True)
+        tempo_csv = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        do_pickle = e.carregar_tabela(caminho_indice=indice)
+        tempo_pickle = time.perf_counter() - inicio
+        tamanho = os.path.getsize(indice)
+
+    rng = random.Random(7)
+    candidatos = list(do_csv.codigo) + [c for c in do_csv.substituidos_por if c not in do_csv.posicao]
+    lote = [rng.choice(candidatos) if rng.random() < 0.9 else str(rng.randint(1_000_000, 9_999_999))
+            for _ in range(args.codigos)]
+    assert do_csv.resolver_varios(lote) == do_pickle.resolver_varios(lote), "pickle resolve diferente do CSV"
+
+    inicio = time.perf_counter()
+    resolvidos = do_pickle.resolver_varios(lote)
+    vazao = len(lote) / (time.perf_counter() - inicio)
+
+    cadeias = [len(c) for c, _ in do_csv.cadeias.values()]
+    print(f"{len(do_csv)} produtos, cadeia mais longa {max(cadeias)}, {sum(ci for _, ci in do_csv.cadeias.values())} em ciclo")
+    print(f"CSV + índices : {tempo_csv * 1000:>7.1f} ms")
+    print(f"pickle        : {tempo_pickle * 1000:>7.1f} ms  ({tempo_csv / tempo_pickle:.0f}x, {tamanho / 1024:.0f} KiB)")
+    print(f"resolver_varios: {vazao:>10.0f} códigos/s ({len(resolvidos)} distintos no lote)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# bench_memoria_analise.py — pico de RSS do analisar_chat() em função do número de mensagens
+#
+# Uso: python benchmarks/bench_memoria_analise.py [--tamanhos 20000 40000 80000] [--topk 2000] [--crescimento-max-mb 12]
+#
+# Cada medição roda num processo novo, então o pico de RSS reportado é só
+# daquela execução. Com contagem exata ele cresce com o vocabulário. Com o
+# sketch (--topk) tudo o que acumula tem teto — sketches de 2 × K chaves,
+# grafias dos stems podadas, caches LRU, agrupador de perguntas —, e o pico
+# sobe só até eles encherem (as primeiras ~20 mil mensagens do gerador
+# sintético); dali em diante fica estável. O benchmark falha (código 1) se o
+# pico com o sketch crescer mais que --crescimento-max-mb entre o menor e o
+# maior tamanho.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from sinteticos import ROOT_DIR, gerar_chat_logs
+
+BACKEND_DIR = os.path.join(ROOT_DIR, "backend_py")
+
+FILHO = """
+import json, resource, sys, time
+sys.path.insert(0, {backend!r})
+import analisar_logs as a
+a.CHAT_LOG_PATH = {logs!r}
+a.OUTPUT_PATH = {saida!r} + ".json"
+a.RESUMO_DIARIO_PATH = {saida!r} + ".resumo.json"
+a.ESTADO_PATH = {saida!r} + ".estado.json"
+a.BUCKETS_DIR = {saida!r} + ".buckets"
+inicio = time.perf_counter()
+a.analisar_chat(topk_aproximado={topk!r})
+duracao = time.perf_counter() - inicio
+pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin": pico //= 1024
+print(json.dumps({{"segundos": duracao, "pico_rss_kb": pico}}))
+"""
+
+def medir(caminho_logs, pasta, topk):
+    codigo = FILHO.format(backend=BACKEND_DIR, logs=caminho_logs, saida=os.path.join(pasta, "saida"), topk=topk)
+    saida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True)
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de memória do analisador de logs.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[20000, 40000, 80000])
+    parser.add_argument("--topk", type=int, default=2000, help="capacidade do sketch Space-Saving")
+    parser.add_argument("--crescimento-max-mb", type=float, default=12.0,
+                        help="crescimento máximo do pico de RSS com o sketch entre o menor e o maior tamanho")
+    args = parser.parse_args()
+
+    if sys.platform.startswith("win"):
+        print("Este benchmark usa o módulo 'resource' e só roda em Linux/macOS.")
+        sys.exit(1)
+
+    print(f"{'mensagens':>10} | {'modo':>12} | {'tempo (s)':>9} | {'pico RSS (MB)':>13}")
+    picos = {None: [], args.topk: []}
+    with tempfile.TemporaryDirectory() as pasta:
+        for total in sorted(args.tamanhos):
+            caminho_logs = gerar_chat_logs(os.path.join(pasta, f"chat_{total}.json"), total)
+            for modo, topk in (("exato", None), (f"topk={args.topk}", args.topk)):
+                r = medir(caminho_logs, pasta, topk)
+                picos[topk].append(r["pico_rss_kb"] / 1024)
+                print(f"{total:>10} | {modo:>12} | {r['segundos']:>9.2f} | {r['pico_rss_kb'] / 1024:>13.1f}")
+
+    exato = picos[None][-1] - picos[None][0]
+    crescimento = picos[args.topk][-1] - picos[args.topk][0]
+    print(f"crescimento do pico de {min(args.tamanhos)} a {max(args.tamanhos)} mensagens: "
+          f"exato {exato:+.1f} MB, topk={args.topk} {crescimento:+.1f} MB (máximo {args.crescimento_max_mb:.1f} MB)")
+    if crescimento > args.crescimento_max_mb:
+        print(f"FALHOU: com o sketch o pico de RSS cresceu {crescimento:.1f} MB")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# bench_normalizacao.py — normalização campo a campo vs. normalizar_em_lote
+#
+# Uso: python benchmarks/bench_normalizacao.py [--datasheets 20000] [--pasta uploads] [--distintos 0.05] [--repeticoes 3]
+#
+# Extrai os valores brutos dos PDFs da pasta como o analisar_datasheet os vê
+# e imprime a proporção de valores distintos por coluna — é ela que decide o
+# ganho do lote, que só normaliza cada distinto uma vez. Depois monta um
+# catálogo sintético (os brutos reais mais variações geradas com semente fixa:
+# pesos, temperaturas em °C/°F, lentes fixas e varifocais, resoluções, listas
+# de protocolos...) com essa mesma proporção de distintos por coluna (ou a de
+# --distintos), confere que normalizar_em_lote devolve em cada posição o mesmo
+# que normalizar_campo item a item e mede valores normalizados/s dos dois caminhos.
+# A paridade nos PDFs reais está em tests/test_normalizacao.py.
+import argparse
+import os
+import random
+import sys
+import time
+
+from sinteticos import ROOT_DIR
+
+sys.path.insert(0, os.path.join(ROOT_DIR, "comparador_datasheet"))
+import analisador as a
+from catalogo_specs import listar_pdfs
+
+def brutos_dos_pdfs(pasta):
+    """{chave: [valores brutos]} dos PDFs da pasta, como o analisar_datasheet os vê."""
+    colunas = {}
+    for caminho in listar_pdfs(pasta):
+        texto = a.extrair_texto_do_pdf(caminho)
+        if not texto:
+            continue
+        motor = a.motor_do_fabricante(a.identificar_fabricante(texto))
+        for (_, chave), valor in motor.extrair(texto).items():
+            colunas.setdefault(chave, []).append(valor)
+        colunas.setdefault("temperatura_operacao", []).append(a.buscar_temperatura(texto))
+        lente = a.RE_LENTE.search(texto)
+        colunas.setdefault("distancia_focal", []).append(lente.group(1) if lente else "")
+    return colunas
+
+def proporcao_distintos(colunas):
+    """{chave: valores distintos / total} de cada coluna."""
+    return {chave: len(set(valores)) / len(valores) for chave, valores in colunas.items() if valores}
+
+def variacoes(rng):
+    """Geradores de valores brutos plausíveis por coluna."""
+    numero = lambda lo, hi, casas=1: f"{rng.uniform(lo, hi):.{casas}f}".replace(".", rng.choice(".,"))
+    return {
+        "peso": lambda: rng.choice([f"{rng.randint(150, 2500)} g", f"{numero(0.2, 3)} kg", f"{numero(0.5, 6)} lb",
+                                    f"Aprox. {rng.randint(300, 900)}g (sem suporte)", "N/A"]),
+        "temperatura_operacao": lambda: rng.choice([
+            f"-{rng.randint(10, 40)} °C a +{rng.randint(40, 60)} °C",
+            f"–{rng.randint(10, 40)} °C to {rng.randint(40, 60)} °C / umidade < {rng.randint(80, 95)}%",
+            f"-{rng.randint(4, 40)} °F to {rng.randint(104, 140)} °F (Fahrenheit)",
+            f"(-){rng.randint(10, 30)} °C ~ {rng.randint(45, 60)} °C", f"{rng.randint(0, 10)} °C a {rng.randint(40, 50)} °C"]),
+        "distancia_focal": lambda: rng.choice([f"{rng.choice(['2.8', '3.6', '6', '2,8'])} mm",
+                                               f"{numero(2, 3)} mm - {numero(10, 14)} mm", f"{numero(2, 3)} to {numero(10, 14)} mm",
+                                               f"{numero(5, 6)} mm ~ {numero(40, 50)} mm"]),
+        "resolucao_maxima": lambda: rng.choice([f"{w} x {h}" for w, h in ((1920, 1080), (2688, 1520), (3840, 2160), (1280, 720), (2560, 1440))]
+                                               + [f"{rng.randint(1, 8)} MP", "H x V", "320 x 240"]),
+        "protocolos": lambda: "; ".join(rng.sample(["HTTP", "HTTPS", "RTSP", "RTP", "TCP", "UDP", "ONVIF", "DHCP", "DNS", "NTP", "SMTP", "IPv4", "IPv6", "FTP"], rng.randint(3, 9))),
+        "navegador": lambda: ", ".join(rng.sample(["Chrome", "Firefox", "Edge", "Safari", "IE 11"], rng.randint(1, 4))),
+        "wdr": lambda: rng.choice([f"{rng.choice([100, 120, 130, 140])} dB", f"WDR real {rng.choice([120, 140])}dB, BLC, HLC", "DWDR"]),
+        "consumo_potencia": lambda: rng.choice([f"Máx. {numero(2, 12)} W", f"< {numero(3, 8)}W (IR ligado)", f"12 VDC, {numero(0.2, 1, 2)} A, máx. {numero(3, 10)} W"]),
+        "compressao_video": lambda: " / ".join(rng.sample(["H.265+", "H.265", "H.264+", "H.264 (Baseline/Main/High)", "MJPEG", "Smart Codec"], rng.randint(1, 5))),
+        "sensor_imagem": lambda: f'1/{rng.choice(["2.7", "2.8", "3"])}" Progressive Scan CMOS',
+    }
+
+def catalogo_sintetico(n, colunas_pdfs, proporcoes, padrao, semente=42):
+    rng = random.Random(semente)
+    geradores = variacoes(rng)
+    # Cada coluna tem tantos brutos distintos quanto a proporção pede (ou quantos o
+    # gerador consegue produzir): todos aparecem ao menos uma vez, o resto repete
+    colunas = {}
+    for chave, gerar in geradores.items():
+        tamanho = max(round(n * proporcoes.get(chave, padrao)), 1)
+        pool = dict.fromkeys(colunas_pdfs.get(chave, []))
+        for _ in range(tamanho * 10):
+            if len(pool) >= tamanho:
+                break
+            pool[gerar()] = None
+        pool = list(pool)[:tamanho]
+        valores = pool + [rng.choice(pool) for _ in range(n - len(pool))]
+        rng.shuffle(valores)
+        colunas[chave] = valores
+    return colunas
+
+def normalizar_item_a_item(colunas):
+    # A referência é a normalização do analisar_datasheet, campo a campo (não o normalizador_da_coluna do lote)
+    saida = {}
+    for chave, valores in colunas.items():
+        if chave == "resolucao_maxima":
+            saida[chave] = [a.formatar_resolucao(a.normalizar_campo(chave, v)) for v in valores]
+        elif chave == "temperatura_operacao":
+            saida[chave] = [a.normalizar_temperatura(v) for v in valores]
+        elif chave == "distancia_focal":
+            saida[chave] = [a.normalizar_lente(v) for v in valores]
+        else:
+            saida[chave] = [a.normalizar_campo(chave, v) for v in valores]
+    return saida
+
+def medir(funcao, colunas, repeticoes):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(colunas)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da normalização em lote dos campos dos datasheets.")
+    parser.add_argument("--datasheets", type=int, default=20_000)
+    parser.add_argument("--pasta", default=os.path.join(ROOT_DIR, "uploads"))
+    parser.add_argument("--distintos", type=float, default=None,
+                        help="proporção de valores distintos por coluna (padrão: a medida nos PDFs da pasta)")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    colunas_pdfs = brutos_dos_pdfs(args.pasta)
+    reais = proporcao_distintos(colunas_pdfs)
+    if reais:
+        total_pdfs = sum(len(v) for v in colunas_pdfs.values())
+        distintos_pdfs = sum(len(set(v)) for v in colunas_pdfs.values())
+        print(f"PDFs em {args.pasta}: {len(next(iter(colunas_pdfs.values())))} datasheets, "
+              f"{distintos_pdfs}/{total_pdfs} valores distintos ({distintos_pdfs / total_pdfs:.0%})")
+        for chave, proporcao in sorted(reais.items(), key=lambda item: item[1]):
+            print(f"  {chave:<22} {proporcao:>5.0%}")
+        padrao = distintos_pdfs / total_pdfs
+    else:
+        print(f"Nenhum PDF em {args.pasta}: sem proporção real, todos os valores distintos")
+        padrao = 1.0
+    if args.distintos is not None:
+        reais, padrao = {}, args.distintos
+
+    colunas = catalogo_sintetico(args.datasheets, colunas_pdfs, reais, padrao)
+    esperado = normalizar_item_a_item(colunas)
+    obtido = a.normalizar_em_lote(colunas)
+    assert obtido == esperado, "normalizar_em_lote diverge da normalização item a item"
+    for valores in obtido.values():
+        mutaveis = [v for v in valores if isinstance(v, (dict, list))]
+        assert len({id(v) for v in mutaveis}) == len(mutaveis), "linhas compartilhando o mesmo objeto"
+
+    total = sum(len(v) for v in colunas.values())
+    distintos = sum(len(set(v)) for v in colunas.values())
+    item = medir(normalizar_item_a_item, colunas, args.repeticoes)
+    lote = medir(a.normalizar_em_lote, colunas, args.repeticoes)
+    alvo = sum(max(round(args.datasheets * reais.get(chave, padrao)), 1) for chave in colunas)
+    print(f"{args.datasheets} datasheets × {len(colunas)} colunas = {total} valores; paridade OK")
+    limitado = ", limitado pelos geradores" if distintos < alvo else ""
+    print(f"distintos   : {distintos} ({distintos / total:.1%}; alvo {alvo / total:.1%}{limitado})")
+    print(f"item a item : {total / item:>12.0f} valores/s ({item:.2f} s)")
+    print(f"em lote     : {total / lote:>12.0f} valores/s ({lote:.2f} s, {item / lote:.1f}x)")
+
+if __name__ == "__main__":
+    main()
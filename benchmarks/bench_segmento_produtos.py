@@ -0,0 +1,87 @@
+# bench_segmento_produtos.py — vazão do classificador de segmento por produto citado
+#
+# Uso: python benchmarks/bench_segmento_produtos.py [--mensagens 20000] [--repeticoes 5]
+#
+# Gera perguntas sintéticas citando produtos reais do catálogo (código ou
+# trecho da descrição), modelos inexistentes e as perguntas do chat_logs.json.
+# Mede a montagem do índice, o classificador sem cache (todas as perguntas
+# inéditas) e com cache, e compara com o laço principal (processar_entrada),
+# que já inclui o estágio: ele tem que acompanhar o resto da análise.
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+from sinteticos import ROOT_DIR, CHAT_LOG_PATH, PREFIXOS_MODELO, carregar_modelos_de_mensagem
+
+sys.path.insert(0, os.path.join(ROOT_DIR, "backend_py"))
+import analisar_logs as a
+from catalogo_produtos import carregar_produtos
+
+MODELOS_DE_PERGUNTA = [
+    "qual a diferença do {0} para o {1}?",
+    "o {0} ainda é fabricado?",
+    "preço do código {2}",
+    "tem substituto para o {0}",
+    "o {0} funciona com o {1}",
+]
+
+def gerar_perguntas(total, semente=7):
+    rng = random.Random(semente)
+    produtos = [p for p in carregar_produtos() if p.unidade]
+    reais = [entry.get("pergunta") or "" for entry in carregar_modelos_de_mensagem(CHAT_LOG_PATH)]
+    perguntas = []
+    for i in range(total):
+        sorteio = rng.random()
+        if sorteio < 0.6:
+            p1, p2 = rng.choice(produtos), rng.choice(produtos)
+            trecho = lambda p: " ".join(p.descricao.split()[:rng.randint(2, 4)])
+            perguntas.append(rng.choice(MODELOS_DE_PERGUNTA).format(trecho(p1), trecho(p2), p1.codigo) + f" #{i}")
+        elif sorteio < 0.8:
+            modelo = f"{rng.choice(PREFIXOS_MODELO)} {rng.randint(1000, 9999)}"
+            perguntas.append(f"alguém conhece o {modelo}? #{i}")
+        else:
+            perguntas.append(f"{rng.choice(reais)} #{i}")
+    return perguntas
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do classificador de segmento por produto.")
+    parser.add_argument("--mensagens", type=int, default=20000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    classificador = a.obter_classificador_produtos()
+    montagem = time.perf_counter() - inicio
+
+    perguntas = [a.limpar_texto(p) for p in gerar_perguntas(args.mensagens)]
+    inicio = time.perf_counter()
+    resolvidos = [classificador.segmento(p) for p in perguntas]
+    frio = len(perguntas) / (time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    for _ in range(args.repeticoes):
+        for p in perguntas:
+            classificador.segmento(p)
+    quente = len(perguntas) * args.repeticoes / (time.perf_counter() - inicio)
+
+    origem = Counter("produto" if r else ("palavra-chave" if a.CLASSIFICADOR.analisar(p).segmento != "OUTRO" else "OUTRO")
+                     for p, r in zip(perguntas, resolvidos))
+
+    entradas = [{"pergunta": p, "resposta": "", "data": "2025-09-01T10:00:00.000Z"} for p in gerar_perguntas(args.mensagens, semente=8)]
+    estado = a.novo_estado()
+    inicio = time.perf_counter()
+    for entry in entradas:
+        a.processar_entrada(estado, entry)
+    laco = len(entradas) / (time.perf_counter() - inicio)
+
+    print(f"índice: {len(classificador.unidade_por_chave)} códigos/modelos, montado em {montagem:.2f}s")
+    print(f"classificador sem cache: {frio:>10.0f} perguntas/s")
+    print(f"classificador com cache: {quente:>10.0f} perguntas/s")
+    print(f"laço principal completo: {laco:>10.0f} mensagens/s (estágio de produto = {100 * laco / frio:.0f}% do tempo por mensagem)")
+    print("segmento decidido por: " + ", ".join(f"{k} {100 * v / len(perguntas):.0f}%" for k, v in origem.most_common()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# bench_stemming.py — mensagens/s do laço principal do analisador, antes e depois do cache de stems
+#
+# Uso: python benchmarks/bench_stemming.py [--repeticoes 200]
+#
+# Os dois lados rodam o processar_entrada() atual: "antes" troca o stem em
+# cache e a limpeza com regex compilada pelas versões originais
+# (RSLPStemmer.stem() em toda palavra, re.sub sem compilar); "depois" usa
+# as atuais.
+import argparse
+import os
+import re
+import sys
+import time
+
+from sinteticos import ROOT_DIR, CHAT_LOG_PATH, carregar_modelos_de_mensagem
+
+sys.path.insert(0, os.path.join(ROOT_DIR, "backend_py"))
+import analisar_logs as a
+
+def limpar_texto_original(texto):
+    texto = texto.lower().replace('\n', ' ').replace('\r', ' ')
+    texto = re.sub(r"[^a-zà-ú0-9\s]", " ", texto)
+    return texto
+
+def medir(mensagens, repeticoes):
+    estado = a.novo_estado()
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for entry in mensagens:
+            a.processar_entrada(estado, entry)
+    return len(mensagens) * repeticoes / (time.perf_counter() - inicio)
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark de stemming/tokenização sobre o chat_logs.json.")
+    parser.add_argument("--repeticoes", type=int, default=200)
+    args = parser.parse_args()
+
+    mensagens = carregar_modelos_de_mensagem(CHAT_LOG_PATH)
+    otimizados = a.stem, a.limpar_texto
+    a.stem, a.limpar_texto = a.st.stem, limpar_texto_original
+    try:
+        antes = medir(mensagens, args.repeticoes)
+    finally:
+        a.stem, a.limpar_texto = otimizados
+    a.stem.cache_clear()
+    depois = medir(mensagens, args.repeticoes)
+
+    print(f"{len(mensagens)} mensagens × {args.repeticoes} repetições")
+    print(f"antes : {antes:>10.0f} mensagens/s")
+    print(f"depois: {depois:>10.0f} mensagens/s  ({depois / antes:.1f}x)")
+    print(f"cache de stems: {a.stem.cache_info()}")
+
+if __name__ == "__main__":
+    main()
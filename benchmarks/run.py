@@ -0,0 +1,200 @@
+# run.py — suíte de benchmarks reprodutível (datasheets + logs), com baseline
+#
+# Uso: python benchmarks/run.py [--trilhas datasheet logs] [--tamanhos 10000 100000 1000000]
+#                               [--paginas 1 10 50] [--repeticoes 5]
+#                               [--saida resultados.json] [--baseline benchmarks/baseline.json]
+#                               [--salvar-baseline] [--tolerancia 0.15]
+#
+# Trilha "datasheet": os PDFs de uploads/ (detectados pelo cabeçalho %PDF) e
+# datasheets sintéticos com número crescente de páginas (gerar_pdf_datasheet),
+# medindo extrair_texto_do_pdf e analisar_datasheet separadamente.
+# Trilha "logs": chat_logs sintéticos (gerar_chat_logs, semente fixa) de
+# 10k/100k/1M linhas passando pelo analisar_chat completo.
+#
+# Cada caso roda num processo novo (este mesmo script com --caso), para o pico
+# de RSS ser só daquele caso. Tudo é gerado localmente: roda offline.
+# Os resultados vão para um JSON; com --baseline, cada métrica (tempos em
+# segundos e pico de RSS, menor é melhor) é comparada com a do baseline e as
+# que pioraram mais que --tolerancia são marcadas — o código de saída vira 1.
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sinteticos import ROOT_DIR, gerar_chat_logs, gerar_pdf_datasheet
+
+sys.path.insert(0, os.path.join(ROOT_DIR, "comparador_datasheet"))
+from catalogo_specs import listar_pdfs
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+UPLOADS_DIR = os.path.join(ROOT_DIR, "uploads")
+TAMANHOS_PADRAO = [10_000, 100_000, 1_000_000]
+PAGINAS_PADRAO = [1, 10, 50]
+TOLERANCIA_PADRAO = 0.15
+
+# ===== Casos (rodam no processo filho) =====
+def pico_rss_kb():
+    import resource
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico // 1024 if sys.platform == "darwin" else pico
+
+def cronometrar(funcao, repeticoes):
+    """Mediana dos tempos de `repeticoes` chamadas e o retorno da última."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        retorno = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos), retorno
+
+def caso_datasheet(caminhos, repeticoes):
+    sys.path.insert(0, os.path.join(ROOT_DIR, "comparador_datasheet"))
+    import analisador as a
+    extracao, textos = cronometrar(lambda: [a.extrair_texto_do_pdf(c) for c in caminhos], repeticoes)
+    textos = [t for t in textos if t]
+    analise, _ = cronometrar(lambda: [a.analisar_datasheet(t) for t in textos], repeticoes)
+    return {
+        "metricas": {"extrair_texto_s": extracao, "analisar_datasheet_s": analise, "pico_rss_kb": pico_rss_kb()},
+        "info": {"pdfs": len(caminhos), "caracteres": sum(map(len, textos)),
+                 "pdfs_por_s_extracao": len(caminhos) / extracao if extracao else None,
+                 "pdfs_por_s_analise": len(textos) / analise if analise else None},
+    }
+
+def caso_logs(caminho_logs, pasta):
+    sys.path.insert(0, os.path.join(ROOT_DIR, "backend_py"))
+    import analisar_logs as a
+    a.CHAT_LOG_PATH = caminho_logs
+    a.OUTPUT_PATH = os.path.join(pasta, "analise_logs.json")
+    a.RESUMO_DIARIO_PATH = os.path.join(pasta, "resumo_diario.json")
+    a.ESTADO_PATH = os.path.join(pasta, "analise_estado.json")
+    a.BUCKETS_DIR = os.path.join(pasta, "buckets_diarios")
+    segundos, estado = cronometrar(a.analisar_chat, 1)
+    mensagens = estado["total_mensagens"] if estado else 0
+    return {
+        "metricas": {"analisar_chat_s": segundos, "pico_rss_kb": pico_rss_kb()},
+        "info": {"mensagens": mensagens, "mensagens_por_s": mensagens / segundos if segundos else None,
+                 "estagios_s": dict(estado["tempos"]) if estado else {}},
+    }
+
+def executar_caso(especificacao):
+    if especificacao["trilha"] == "datasheet":
+        return caso_datasheet(especificacao["caminhos"], especificacao["repeticoes"])
+    return caso_logs(especificacao["logs"], especificacao["pasta"])
+
+# ===== Orquestração (processo pai) =====
+def rodar_em_processo_novo(especificacao):
+    saida = subprocess.run([sys.executable, os.path.abspath(__file__), "--caso", json.dumps(especificacao)],
+                           capture_output=True, text=True)
+    if saida.returncode != 0:
+        raise RuntimeError(f"Caso {especificacao['nome']} falhou:\n{saida.stderr[-2000:]}")
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+def casos_datasheet(pasta, paginas, repeticoes):
+    uploads = list(listar_pdfs(UPLOADS_DIR))
+    if uploads:
+        yield {"nome": "datasheet/uploads", "trilha": "datasheet", "caminhos": uploads, "repeticoes": repeticoes}
+    for n in paginas:
+        caminho = gerar_pdf_datasheet(os.path.join(pasta, f"sintetico_{n}p.pdf"), n)
+        yield {"nome": f"datasheet/sintetico_{n}p", "trilha": "datasheet", "caminhos": [caminho], "repeticoes": repeticoes}
+
+def casos_logs(pasta, tamanhos):
+    for total in tamanhos:
+        caminho = gerar_chat_logs(os.path.join(pasta, f"chat_{total}.json"), total)
+        saida = os.path.join(pasta, f"saida_{total}")
+        os.makedirs(saida, exist_ok=True)
+        yield {"nome": f"logs/{total}", "trilha": "logs", "logs": caminho, "pasta": saida}
+        os.remove(caminho)  # 1M linhas são centenas de MB: não deixa acumular
+
+def versao_git():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def comparar_com_baseline(casos, baseline, tolerancia):
+    """Lista de (caso, métrica, base, atual, variação) das métricas que pioraram além da tolerância."""
+    regressoes = []
+    for nome, resultado in casos.items():
+        base = baseline.get("casos", {}).get(nome)
+        if not base:
+            continue
+        for metrica, atual in resultado["metricas"].items():
+            anterior = base["metricas"].get(metrica)
+            if anterior and atual > anterior * (1 + tolerancia):
+                regressoes.append((nome, metrica, anterior, atual, atual / anterior - 1))
+    return regressoes
+
+def formatar_metrica(metrica, valor):
+    return f"{valor / 1024:.1f} MB" if metrica == "pico_rss_kb" else f"{valor * 1000:.1f} ms"
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do analisador de datasheets e do analisador de logs.")
+    parser.add_argument("--trilhas", nargs="+", choices=("datasheet", "logs"), default=["datasheet", "logs"])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS_PADRAO, help="linhas de log por caso")
+    parser.add_argument("--paginas", type=int, nargs="+", default=PAGINAS_PADRAO, help="páginas dos datasheets sintéticos")
+    parser.add_argument("--repeticoes", type=int, default=5, help="repetições por caso de datasheet (vale a mediana)")
+    parser.add_argument("--saida", help="JSON com os resultados (padrão: benchmarks/resultados_<data>.json)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="resultados anteriores para detectar regressões")
+    parser.add_argument("--salvar-baseline", action="store_true", help="grava estes resultados como o novo baseline")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO,
+                        help="piora relativa tolerada antes de marcar regressão (0.15 = 15%%)")
+    parser.add_argument("--caso", help=argparse.SUPPRESS)  # uso interno: roda um caso e imprime o JSON
+    args = parser.parse_args()
+
+    if args.caso:
+        print(json.dumps(executar_caso(json.loads(args.caso))))
+        return 0
+    if sys.platform.startswith("win"):
+        print("A suíte usa o módulo 'resource' para o pico de RSS e só roda em Linux/macOS.")
+        return 1
+
+    resultados = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "git": versao_git(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "casos": {},
+    }
+    with tempfile.TemporaryDirectory() as pasta:
+        geradores = {"datasheet": lambda: casos_datasheet(pasta, args.paginas, args.repeticoes),
+                     "logs": lambda: casos_logs(pasta, args.tamanhos)}
+        for trilha in args.trilhas:
+            for especificacao in geradores[trilha]():
+                resultado = rodar_em_processo_novo(especificacao)
+                resultados["casos"][especificacao["nome"]] = resultado
+                metricas = ", ".join(f"{m} {formatar_metrica(m, v)}" for m, v in resultado["metricas"].items())
+                print(f"{especificacao['nome']:<28} {metricas}", flush=True)
+
+    saida = args.saida or os.path.join(BENCH_DIR, f"resultados_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, ensure_ascii=False, indent=2)
+    print(f"Resultados salvos em {saida}")
+
+    codigo = 0
+    if os.path.exists(args.baseline) and not args.salvar_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressoes = comparar_com_baseline(resultados["casos"], baseline, args.tolerancia)
+        for nome, metrica, anterior, atual, variacao in regressoes:
+            print(f"REGRESSÃO {nome} {metrica}: {formatar_metrica(metrica, anterior)} -> "
+                  f"{formatar_metrica(metrica, atual)} (+{100 * variacao:.0f}%)")
+        if regressoes:
+            codigo = 1
+        else:
+            print(f"Sem regressões acima de {100 * args.tolerancia:.0f}% em relação a {args.baseline} (git {baseline.get('git')}).")
+    if args.salvar_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"Baseline salvo em {args.baseline}")
+    return codigo
+
+if __name__ == "__main__":
+    sys.exit(main())
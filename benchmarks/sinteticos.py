@@ -0,0 +1,92 @@
+# sinteticos.py — geradores de dados sintéticos para os benchmarks (rodam offline)
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHAT_LOG_PATH = os.path.join(ROOT_DIR, "chat_logs.json")
+
+PREFIXOS_MODELO = ["vip", "mhdx", "nvd", "tip", "sg", "ap", "xpe", "ss", "ivp", "gnb", "emp", "sf"]
+USUARIOS = ["admin", "ana", "bruno", "carla", "diego", "elisa"]
+
+def carregar_modelos_de_mensagem(caminho=CHAT_LOG_PATH):
+    modelos = []
+    with open(caminho, "r", encoding="utf-8") as f:
+        for linha in f:
+            linha = linha.strip()
+            if linha:
+                modelos.append(json.loads(linha))
+    return modelos
+
+def gerar_entrada(rng, modelos, inicio, indice):
+    """Uma mensagem real com códigos de produto aleatórios, para o vocabulário de n-gramas crescer."""
+    base = rng.choice(modelos)
+    modelo = f"{rng.choice(PREFIXOS_MODELO)} {rng.randint(1000, 9999)}"
+    entry = {
+        "pergunta": f"{base.get('pergunta', '')} {modelo}",
+        "resposta": f"{base.get('resposta', '')} {modelo}",
+        "data": (inicio + timedelta(minutes=indice)).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        "origem": rng.choice(["usuario", "usuario", "gpt"]),
+    }
+    if rng.random() < 0.8:
+        entry["username"] = rng.choice(USUARIOS)
+    return entry
+
+def gerar_chat_logs(caminho, total, semente=42):
+    """Escreve `total` linhas JSONL no formato do chat_logs.json."""
+    rng = random.Random(semente)
+    modelos = carregar_modelos_de_mensagem()
+    inicio = datetime(2025, 9, 1)
+    with open(caminho, "w", encoding="utf-8") as f:
+        for i in range(total):
+            f.write(json.dumps(gerar_entrada(rng, modelos, inicio, i), ensure_ascii=False) + "\n")
+    return caminho
+
+# ===== Datasheets sintéticos =====
+CAPA_DATASHEET = """Intelbras {modelo}
+Câmera IP {tipo} com inteligência de vídeo
+Datasheet técnico - revisão {revisao}"""
+
+TABELA_DATASHEET = """Especificações técnicas
+Sensor de imagem
+1/2.8" Progressive Scan CMOS
+Resolução máxima: {largura} x {altura}
+Lente: {lente} mm
+Compressão de vídeo: H.265+, H.265, H.264+, H.264
+WDR: {wdr} dB
+Protocolos: IPv4, IPv6, HTTP, HTTPS, RTSP, ONVIF
+Alimentação: 12 Vdc / PoE (802.3af)
+Consumo: {consumo} W
+Grau de proteção: IP{ip}
+Temperatura de operação: -{tmin} °C a {tmax} °C
+Peso: {peso} g
+Dimensões: {d1} mm x {d2} mm x {d3} mm"""
+
+MARKETING_DATASHEET = ("Tecnologia de ponta para o seu projeto de segurança. A linha {modelo} oferece "
+                       "imagens nítidas de dia e de noite, instalação simples e integração com o "
+                       "ecossistema de gravação. ")
+
+def gerar_pdf_datasheet(caminho, paginas, semente=42):
+    """
+    PDF de `paginas` páginas no formato dos datasheets: capa com o modelo,
+    uma página de especificações a cada cinco e o resto texto de marketing.
+    """
+    import fitz  # só os benchmarks de datasheet precisam do PyMuPDF
+    rng = random.Random(semente)
+    modelo = f"VIP {rng.randint(1000, 9999)} {rng.choice(['B', 'D', 'SD IR', 'B G4', 'D FC+'])}"
+    with fitz.open() as doc:
+        for i in range(paginas):
+            if i == 0:
+                texto = CAPA_DATASHEET.format(modelo=modelo, tipo=rng.choice(["bullet", "dome"]), revisao=rng.randint(1, 9))
+            elif i % 5 == 1:
+                texto = TABELA_DATASHEET.format(
+                    largura=rng.choice([1920, 2560, 2688, 3840]), altura=rng.choice([1080, 1440, 1520, 2160]),
+                    lente=rng.choice(["2.8", "3.6", "2.8 - 12"]), wdr=rng.choice([120, 130]), consumo=rng.randint(3, 9),
+                    ip=rng.choice([66, 67]), tmin=rng.choice([10, 30]), tmax=rng.choice([50, 60]), peso=rng.randint(200, 900),
+                    d1=rng.randint(60, 200), d2=rng.randint(60, 200), d3=rng.randint(60, 200))
+            else:
+                texto = "\n".join(MARKETING_DATASHEET.format(modelo=modelo)[j:j + 90] for j in range(0, 90 * 12, 90))
+            doc.new_page().insert_text((50, 72), texto, fontsize=9)
+        doc.save(caminho)
+    return caminho
@@ -1,25 +1,41 @@
 # analisador.py (Versão Refinada com Pós-Processadores)
+import copy
 import os
 import fitz
 import re
 import json
 import sys
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 
 # =========================
 # Utilidades
 # =========================
+def abrir_pdf(origem):
+    # Aceita um caminho ou os bytes do PDF já em memória (sem arquivo temporário)
+    if isinstance(origem, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=origem, filetype="pdf")
+    return fitz.open(origem)
+
+def descrever_origem(origem):
+    return f"PDF em memória ({len(origem)} bytes)" if isinstance(origem, (bytes, bytearray, memoryview)) else origem
+
 def extrair_texto_do_pdf(pdf_path):
     try:
-        with fitz.open(pdf_path) as doc:
+        with abrir_pdf(pdf_path) as doc:
             return "".join(page.get_text() for page in doc)
     except Exception as e:
-        print(f"[ERRO] Não foi possível ler {pdf_path}: {e}")
+        print(f"[ERRO] Não foi possível ler {descrever_origem(pdf_path)}: {e}")
         return None
 
+RE_SIMBOLOS = re.compile(r'[»¹²³⁴⁵⁶⁷⁸⁹®™©]')
+RE_ESPACOS = re.compile(r'\s+')
+
 def clean_value(text):
     if not text:
         return ""
-    text = re.sub(r'[»¹²³⁴⁵⁶⁷⁸⁹®™©]', '', text)
+    text = RE_SIMBOLOS.sub('', text)
     text = text.replace("", " ").replace("•", " ")
     lixo = [
         "intelbras.com", "www.hikvision.com", "avigilon.com", "Material do case",
@@ -32,7 +48,7 @@ def clean_value(text):
         text = text.replace(l, '')
     
     # ✨ REFINAMENTO: Strip menos agressivo para não remover parênteses ou vírgulas úteis
-    return re.sub(r'\s+', ' ', text).strip(" :–;.")
+    return RE_ESPACOS.sub(' ', text).strip(" :–;.")
 
 # =========================
 # Funções de busca (sem alteração)
@@ -52,9 +68,10 @@ def buscar_valor(texto, padrao):
                 valor_encontrado = candidato
     return valor_encontrado
 
+RE_TEMPERATURA = re.compile(r"(?:Temperatura de operação|Operating Conditions|Environment)[\s\S]{{0,50}}((?:[-–—−]\s*|\(\-\)\s*)?\d+\s*°[CF]\s*(?:a|to|~)\s*(?:[-–—−]\s*)?\d+\s*°[CF])", re.IGNORECASE)
+
 def buscar_temperatura(texto):
-    padrao = r"(?:Temperatura de operação|Operating Conditions|Environment)[\s\S]{{0,50}}((?:[-–—−]\s*|\(\-\)\s*)?\d+\s*°[CF]\s*(?:a|to|~)\s*(?:[-–—−]\s*)?\d+\s*°[CF])"
-    match = re.search(padrao, texto, re.IGNORECASE)
+    match = RE_TEMPERATURA.search(texto)
     if match:
         return match.group(1)
     return buscar_valor(texto, r"(?:Temperatura de operação|Operating Conditions|Environment)")
@@ -62,20 +79,25 @@ def buscar_temperatura(texto):
 # =========================
 # ✨ NOVO: Pós-Processadores "Especialistas" em Limpeza ✨
 # =========================
+RE_WDR = re.compile(r'(\d+\s*dB)', re.IGNORECASE)
+RE_CONSUMO = re.compile(r'([<>]?\s*\d[\d,.]*\s*W)', re.IGNORECASE)
+RE_PARENTESES = re.compile(r'\(.*?\)')
+RE_SEPARADOR_CODECS = re.compile(r'[;/|]')
+
 def limpar_wdr(valor):
     # Pega apenas o primeiro valor numérico seguido de "dB"
-    match = re.search(r'(\d+\s*dB)', valor, re.IGNORECASE)
+    match = RE_WDR.search(valor)
     return match.group(1) if match else valor
 
 def limpar_consumo(valor):
     # Pega a primeira ocorrência de um número com "W"
-    match = re.search(r'([<>]?\s*\d[\d,.]*\s*W)', valor, re.IGNORECASE)
+    match = RE_CONSUMO.search(valor)
     return match.group(1).replace(',', '.') if match else valor
 
 def limpar_compressao(valor):
     # Remove textos entre parênteses e pega os 4 primeiros codecs
-    limpo = re.sub(r'\(.*?\)', '', valor)
-    codecs = [c.strip() for c in re.split(r'[;/|]', limpo) if c.strip()]
+    limpo = RE_PARENTESES.sub('', valor)
+    codecs = [c.strip() for c in RE_SEPARADOR_CODECS.split(limpo) if c.strip()]
     return ' / '.join(codecs[:4])
 
 POST_PROCESSORS = {
@@ -88,9 +110,16 @@ POST_PROCESSORS = {
 # =========================
 # Normalizadores e Formatadores (sem alteração)
 # =========================
+RE_RESOLUCAO = re.compile(r"(\d{3,4})\s*[xX×\n\s]*\s*(\d{3,4})")
+RE_NUMEROS_TEMPERATURA = re.compile(r'-\s*\d+|\d+')
+RE_NUMERO_PESO = re.compile(r"(\d[\d,.]*)")
+RE_LENTE_VARIFOCAL = re.compile(r"(\d+\.?\d*)\s*(?:mm)?\s*(?:to|-|~|até)\s*(\d+\.?\d*)\s*mm")
+RE_LENTE_FIXA = re.compile(r"(\d+\.?\d*)\s*mm")
+RE_SEPARADOR_LISTA = re.compile(r'[;,/]')
+
 def formatar_resolucao(valor):
     if not valor: return None
-    match = re.search(r"(\d{3,4})\s*[xX×\n\s]*\s*(\d{3,4})", valor)
+    match = RE_RESOLUCAO.search(valor)
     if match:
         w, h = map(int, match.groups())
         if w < 640 or h < 480: return None
@@ -103,7 +132,7 @@ def normalizar_temperatura(valor):
     temp_part = valor.split('/')[0]
     temp_part = temp_part.replace("–", "-").replace("—", "-").replace("−", "-")
     temp_part = temp_part.replace("(-)", "-")
-    nums_str = re.findall(r'-\s*\d+|\d+', temp_part)
+    nums_str = RE_NUMEROS_TEMPERATURA.findall(temp_part)
     if not nums_str: return {"min": None, "max": None, "unidade": "°C"}
     nums = [int(n.replace(" ", "")) for n in nums_str]
     min_temp, max_temp = (min(nums), max(nums)) if len(nums) > 1 else (nums[0], nums[0])
@@ -115,7 +144,7 @@ def normalizar_temperatura(valor):
 # ... (outros normalizadores sem alteração) ...
 def normalizar_peso(valor):
     if not valor: return "Não encontrado"
-    num_search = re.search(r"(\d[\d,.]*)", valor)
+    num_search = RE_NUMERO_PESO.search(valor)
     if not num_search: return "Não encontrado"
     num_str = num_search.group(1).replace(",", ".")
     try:
@@ -131,22 +160,35 @@ def normalizar_peso(valor):
 def normalizar_lente(valor):
     if not valor: return "Não encontrado"
     v = valor.replace(",", ".").lower().strip()
-    m_range = re.search(r"(\d+\.?\d*)\s*(?:mm)?\s*(?:to|-|~|até)\s*(\d+\.?\d*)\s*mm", v)
+    m_range = RE_LENTE_VARIFOCAL.search(v)
     if m_range: return f"{m_range.group(1)} mm - {m_range.group(2)} mm (Varifocal)"
-    m_fixed = re.search(r"(\d+\.?\d*)\s*mm", v)
+    m_fixed = RE_LENTE_FIXA.search(v)
     if m_fixed: return f"{m_fixed.group(1)} mm (Fixa)"
     return valor
 
 def normalizar_protocolos(valor):
     if not valor: return []
-    candidatos = re.split(r'[;,/]', valor)
+    candidatos = RE_SEPARADOR_LISTA.split(valor)
     return sorted(set([clean_value(v) for v in candidatos if v.strip() and len(v) > 2]))
 
 def normalizar_navegadores(valor):
     if not valor: return []
-    candidatos = re.split(r"[,;/]", valor)
+    candidatos = RE_SEPARADOR_LISTA.split(valor)
     return [v.strip() for v in candidatos if v.strip()]
 
+def normalizar_campo(chave, valor_bruto):
+    """Valor final de um campo de PATTERNS a partir do bruto do MotorExtracao."""
+    # Aplica normalizadores genéricos primeiro
+    if chave == "peso": valor_final = normalizar_peso(valor_bruto)
+    elif chave == "protocolos": valor_final = normalizar_protocolos(valor_bruto)
+    elif chave == "navegador": valor_final = normalizar_navegadores(valor_bruto)
+    else: valor_final = clean_value(valor_bruto)
+
+    # ✨ REFINAMENTO: Aplica o pós-processador "especialista" se ele existir
+    if chave in POST_PROCESSORS:
+        valor_final = POST_PROCESSORS[chave](valor_final)
+    return valor_final if valor_final else "Não encontrado"
+
 # =========================
 # Tags e Padrões (sem alteração)
 # =========================
@@ -170,16 +212,139 @@ PATTERNS = {
 }
 PATTERNS_HIKVISION_CORRIGIDO = { "video": { "wdr": r"(?:WDR|Wide Dynamic Range)", } }
 
+# =========================
+# Motor de extração compilado: uma varredura do texto para todos os campos
+# =========================
+RE_ROTULO_ALTERNANCIA = re.compile(r"(?:\\b)?\((?:\?:)?(.+)\)(?:\\b)?")
+RE_METACARACTERES = re.compile(r"[\\.()\[\]{}*+?^$|]")
+
+def literais_do_rotulo(padrao):
+    # r"(?:Max\. Resolution|\bLAN\b)" -> ["max. resolution", "lan"]; None se o rótulo não for
+    # só uma alternância de textos fixos (aí o motor cai na varredura por regex)
+    match = RE_ROTULO_ALTERNANCIA.fullmatch(padrao)
+    if not match:
+        return None
+    literais = []
+    for alternativa in match.group(1).split("|"):
+        alternativa = alternativa.replace(r"\b", "")
+        literal = alternativa.replace(r"\.", ".").lower()
+        if not literal or RE_METACARACTERES.search(alternativa.replace(r"\.", "")) or not _caixa_simples(literal):
+            return None
+        literais.append(literal)
+    return literais
+
+def _caixa_simples(texto):
+    # Sem letras fora do Latin-1 (nem µ, ß, ÿ), str.lower() preserva as posições
+    # e compara igual ao re.IGNORECASE — condição para a busca por literais
+    return not any((ord(c) > 0xFF and c.lower() != c.upper()) or c in "µßÿ" for c in set(texto))
+
+def _ocorrencias(texto, literal):
+    inicio = texto.find(literal)
+    while inicio != -1:
+        yield inicio
+        inicio = texto.find(literal, inicio + 1)
+
+class MotorExtracao:
+    """
+    Equivalente a chamar buscar_valor(texto, padrao) para cada campo de
+    PATTERNS, mas com as regexes compiladas uma vez só e os rótulos
+    localizados numa passada: str.find dos textos fixos de cada rótulo sobre
+    o texto em minúsculas (ou, se não der, uma alternância de todos os
+    rótulos). As duas estratégias do buscar_valor ("rótulo: valor" e
+    "rótulo\nvalor") só são testadas, ancoradas, nas posições onde o rótulo
+    do campo aparece — na mesma ordem do re.search, então o resultado é
+    idêntico.
+    """
+    def __init__(self, padroes):
+        self.campos = []
+        for categoria, campos in padroes.items():
+            for chave, padrao in campos.items():
+                self.campos.append((
+                    (categoria, chave),
+                    re.compile(padrao, re.IGNORECASE),
+                    re.compile(rf"{padrao}\s*[:\-]?\s*([^\n\r]{{3,}})", re.IGNORECASE),
+                    re.compile(rf"{padrao}(?:\s*\n)+\s*([^\n]+)", re.IGNORECASE),
+                    literais_do_rotulo(padrao),
+                ))
+        self.varredura = re.compile("|".join(f"(?:{campo[1].pattern})" for campo in self.campos), re.IGNORECASE)
+
+    def _posicoes(self, texto, campos):
+        # Para cada campo, os inícios do rótulo em ordem crescente (incluindo sobrepostos)
+        if all(campo[4] for campo in campos) and _caixa_simples(texto):
+            minusculo = texto.lower()
+            return [[p for p in sorted({p for literal in literais for p in _ocorrencias(minusculo, literal)}) if rotulo.match(texto, p)]
+                    for _, rotulo, _, _, literais in campos]
+        posicoes = [[] for _ in campos]
+        buscar = self.varredura.search
+        match = buscar(texto)
+        while match:
+            inicio = match.start()
+            for lista, campo in zip(posicoes, campos):
+                if campo[1].match(texto, inicio):
+                    lista.append(inicio)
+            match = buscar(texto, inicio + 1)
+        return posicoes
+
+    def extrair(self, texto, apenas=None, tempos=None):
+        # {(categoria, chave): valor bruto}; `apenas` restringe a um conjunto de campos.
+        # Com `tempos` (dict), soma nele os segundos de cada campo ("categoria.chave")
+        # e da localização dos rótulos ("_rotulos"), que é feita para todos de uma vez.
+        campos = self.campos if apenas is None else [c for c in self.campos if c[0] in apenas]
+        valores = {}
+        antes = time.perf_counter()
+        todas_posicoes = self._posicoes(texto, campos)
+        if tempos is not None:
+            agora = time.perf_counter()
+            tempos["_rotulos"] = tempos.get("_rotulos", 0.0) + agora - antes
+            antes = agora
+        for (campo, rotulo, estrategia1, estrategia2, _), posicoes in zip(campos, todas_posicoes):
+            valores[campo] = ""
+            for estrategia in (estrategia1, estrategia2):
+                match = next(filter(None, (estrategia.match(texto, p) for p in posicoes)), None)
+                if match:
+                    candidato = clean_value(match.group(1))
+                    if not rotulo.search(candidato):
+                        valores[campo] = candidato
+                        break
+            if tempos is not None:
+                agora = time.perf_counter()
+                nome = ".".join(campo)
+                tempos[nome] = tempos.get(nome, 0.0) + agora - antes
+                antes = agora
+        return valores
+
+MOTOR_PADRAO = MotorExtracao(PATTERNS)
+MOTOR_HIKVISION = MotorExtracao({categoria: {chave: PATTERNS_HIKVISION_CORRIGIDO.get(categoria, {}).get(chave, padrao)
+                                             for chave, padrao in campos.items()}
+                                 for categoria, campos in PATTERNS.items()})
+
 # =========================
 # Analisador principal
 # =========================
-def analisar_datasheet(texto_original):
+RE_LENTE = re.compile(r"(\d+\.?\d*\s*(?:mm)?\s*(?:to|-)\s*\d+\.?\d*\s*mm|\b\d+\.?\d*\s*mm\b)", re.IGNORECASE)
+RE_GRAU_PROTECAO = re.compile(r"(IP\d{2})", re.IGNORECASE)
+RE_DIMENSOES = re.compile(r"(\d[\d\.]+\s*mm\s*[xX×]\s*\d[\d\.]+\s*mm\s*[xX×]\s*\d[\d\.]+\s*mm)")
+
+def somar_tempo(tempos, estagio, segundos):
+    # `tempos` é o dict de processar_pdf_medido ({"estagios": {...}, "campos": {...}}) ou None
+    if tempos is not None:
+        tempos["estagios"][estagio] = tempos["estagios"].get(estagio, 0.0) + segundos
+
+def identificar_fabricante(texto):
+    minusculo = texto.lower()
+    if "intelbras" in minusculo: return "Intelbras"
+    elif "hikvision" in minusculo: return "Hikvision"
+    elif "avigilon" in minusculo: return "Avigilon"
+    return "Desconhecido"
+
+def motor_do_fabricante(fabricante):
+    return MOTOR_HIKVISION if fabricante == "Hikvision" else MOTOR_PADRAO
+
+def analisar_datasheet(texto_original, tempos=None):
+    inicio = time.perf_counter()
     especificacoes = {"video": {}, "audio": {}, "rede": {}, "inteligencia": {}, "energia": {}, "fisico": {}}
     # ... (identificação de fabricante e modelo continua igual) ...
-    if "intelbras" in texto_original.lower(): especificacoes["fabricante"] = "Intelbras"
-    elif "hikvision" in texto_original.lower(): especificacoes["fabricante"] = "Hikvision"
-    elif "avigilon" in texto_original.lower(): especificacoes["fabricante"] = "Avigilon"
-    else: especificacoes["fabricante"] = "Desconhecido"
+    especificacoes["fabricante"] = identificar_fabricante(texto_original)
     stop_words = r"(?:Sensor|Pixels|Lente|Especificações|Câmera|Distância|Compressão|Resolução)"
     intelbras_pattern = rf"\b(VIP(?:\s|[C|M|W])*?\d{{3,5}}(?:[\s\-]+[A-Z\d\+\.\/]+(?!\s*{stop_words})){{0,4}})\b"
     hikvision_pattern = r"\b(DS-2[CD|DE][\w\d\-]+)\b"
@@ -188,31 +353,23 @@ def analisar_datasheet(texto_original):
     modelo_produto = ", ".join(sorted(set([m[0].strip() for m in modelos if m[0]]))) or "Não encontrado"
     especificacoes["modelo_produto"] = clean_value(modelo_produto)
     especificacoes["tags"] = extrair_tags_por_nome(modelo_produto, texto_original)
-    lente_m = re.search(r"(\d+\.?\d*\s*(?:mm)?\s*(?:to|-)\s*\d+\.?\d*\s*mm|\b\d+\.?\d*\s*mm\b)", texto_original, re.IGNORECASE)
+    lente_m = RE_LENTE.search(texto_original)
     especificacoes["distancia_focal"] = normalizar_lente(lente_m.group(1) if lente_m else "")
-    ip_match = re.search(r"(IP\d{2})", texto_original, re.IGNORECASE)
+    ip_match = RE_GRAU_PROTECAO.search(texto_original)
     especificacoes["fisico"]["grau_protecao"] = ip_match.group(1).upper() if ip_match else "Não encontrado"
-    dimensoes_m = re.search(r"(\d[\d\.]+\s*mm\s*[xX×]\s*\d[\d\.]+\s*mm\s*[xX×]\s*\d[\d\.]+\s*mm)", texto_original)
+    dimensoes_m = RE_DIMENSOES.search(texto_original)
     especificacoes["fisico"]["dimensoes"] = clean_value(dimensoes_m.group(1) if dimensoes_m else "Não encontrado")
 
-    padroes_esp = PATTERNS_HIKVISION_CORRIGIDO if especificacoes["fabricante"] == "Hikvision" else {}
+    motor = motor_do_fabricante(especificacoes["fabricante"])
+    t0 = time.perf_counter()
+    somar_tempo(tempos, "identificacao", t0 - inicio)
+    valores_brutos = motor.extrair(texto_original, tempos=tempos["campos"] if tempos is not None else None)
+    t1 = time.perf_counter()
+    somar_tempo(tempos, "campos", t1 - t0)
     for categoria, campos in PATTERNS.items():
-        for chave, padrao in campos.items():
-            padrao_final = padroes_esp.get(categoria, {}).get(chave, padrao)
-            valor_bruto = buscar_valor(texto_original, padrao_final)
-            
-            # Aplica normalizadores genéricos primeiro
-            if chave == "peso": valor_final = normalizar_peso(valor_bruto)
-            elif chave == "protocolos": valor_final = normalizar_protocolos(valor_bruto)
-            elif chave == "navegador": valor_final = normalizar_navegadores(valor_bruto)
-            else: valor_final = clean_value(valor_bruto)
-            
-            # ✨ REFINAMENTO: Aplica o pós-processador "especialista" se ele existir
-            if chave in POST_PROCESSORS:
-                valor_final = POST_PROCESSORS[chave](valor_final)
-
-            especificacoes[categoria][chave] = valor_final if valor_final else "Não encontrado"
-            
+        for chave in campos:
+            especificacoes[categoria][chave] = normalizar_campo(chave, valores_brutos[(categoria, chave)])
+
     # ... (Lógica híbrida de resolução e heurística de temperatura continuam iguais) ...
     resolucao_formatada = formatar_resolucao(especificacoes["video"]["resolucao_maxima"])
     placeholders_invalidos = ["h x v", "scaling", ""]
@@ -232,23 +389,360 @@ def analisar_datasheet(texto_original):
             if temp_obj["min"] > 0:
                 especificacoes["fisico"]["temperatura_operacao"]["min"] = -abs(temp_obj["min"])
 
+    somar_tempo(tempos, "normalizacao", time.perf_counter() - t1)
     return especificacoes
 
+# =========================
+# Normalização em lote (re-normalizar um catálogo inteiro depois de mudar uma regra)
+# =========================
+def formatar_resolucao_bruta(valor_bruto):
+    # Resolução a partir do bruto do campo, como no analisar_datasheet (sem o fallback no texto)
+    return formatar_resolucao(normalizar_campo("resolucao_maxima", valor_bruto))
+
+NORMALIZADORES_ESPECIAIS = {
+    "resolucao_maxima": formatar_resolucao_bruta,
+    "temperatura_operacao": normalizar_temperatura,
+    "distancia_focal": normalizar_lente,
+}
+CHAVES_DE_PATTERNS = {chave for campos in PATTERNS.values() for chave in campos}
+
+def normalizador_da_coluna(chave):
+    if chave in NORMALIZADORES_ESPECIAIS:
+        return NORMALIZADORES_ESPECIAIS[chave]
+    if chave in CHAVES_DE_PATTERNS:
+        return lambda valor_bruto: normalizar_campo(chave, valor_bruto)
+    raise KeyError(f"Coluna sem normalizador: {chave}")
+
+def normalizar_em_lote(colunas):
+    """
+    {chave: [valor bruto de cada datasheet]} -> {chave: [valor normalizado]}.
+    As chaves são as de PATTERNS (normalizar_campo) e as de
+    NORMALIZADORES_ESPECIAIS; o valor de cada posição é o mesmo da função
+    item a item. Cada coluna é normalizada uma vez por valor distinto — num
+    catálogo os brutos se repetem muito ("", "IP67", "H.265 / H.264") — e
+    espalhada de volta pela lista. Resultados mutáveis (dict da temperatura,
+    listas de protocolos/navegadores) são copiados por linha, para que editar
+    um datasheet não altere os outros.
+
+    É memoização por valor distinto, não operação vetorizada: cada distinto
+    ainda passa pelo normalizador em Python. O ganho depende só da repetição
+    (benchmarks/bench_normalizacao.py, 20 mil datasheets): ~2,6-2,9x com 18,8%
+    de distintos (o mais perto que os geradores chegam dos 45% dos PDFs de
+    uploads/) e ~12,7x com --distintos 0.05 (3,1% alcançados).
+    """
+    saida = {}
+    for chave, valores in colunas.items():
+        normalizar = normalizador_da_coluna(chave)
+        distintos = {valor: normalizar(valor) for valor in dict.fromkeys(valores)}
+        if any(isinstance(v, (dict, list)) for v in distintos.values()):
+            saida[chave] = [copy.copy(distintos[valor]) for valor in valores]
+        else:
+            saida[chave] = list(map(distintos.__getitem__, valores))
+    return saida
+
+# =========================
+# Especificações achatadas (uma linha por datasheet, para o catálogo)
+# =========================
+RE_MEGAPIXELS = re.compile(r"^(\d+(?:\.\d+)?) MP")
+RE_GRAMAS = re.compile(r"^(\d+) g$")
+RE_MILIMETROS = re.compile(r"(\d+(?:\.\d+)?) mm")
+
+def _encontrado(valor):
+    return None if valor in (None, "", "Não encontrado") else valor
+
+def achatar_especificacoes(especificacoes):
+    """
+    Reduz a saída do analisar_datasheet aos campos comparáveis/consultáveis,
+    já como números: resolução em MP, temperatura mín./máx. em °C, peso em
+    gramas, grau IP, lente (texto e distâncias focais em mm) e tags.
+    Campos "Não encontrado" viram None.
+    """
+    resolucao = _encontrado(especificacoes["video"].get("resolucao_maxima"))
+    megapixels = RE_MEGAPIXELS.match(resolucao) if resolucao else None
+    peso = _encontrado(especificacoes["fisico"].get("peso"))
+    gramas = RE_GRAMAS.match(peso) if peso else None
+    temperatura = especificacoes["fisico"].get("temperatura_operacao") or {}
+    lente = _encontrado(especificacoes.get("distancia_focal"))
+    focais = [float(mm) for mm in RE_MILIMETROS.findall(lente)] if lente else []
+    modelo = _encontrado(especificacoes.get("modelo_produto"))
+    return {
+        "fabricante": especificacoes.get("fabricante"),
+        "modelo": modelo,
+        "modelos": [m.strip() for m in modelo.split(",") if m.strip()] if modelo else [],
+        "resolucao": resolucao,
+        "resolucao_mp": float(megapixels.group(1)) if megapixels else None,
+        "temp_min": temperatura.get("min"),
+        "temp_max": temperatura.get("max"),
+        "peso_g": int(gramas.group(1)) if gramas else None,
+        "grau_protecao": _encontrado(especificacoes["fisico"].get("grau_protecao")),
+        "lente": lente,
+        "lente_min_mm": min(focais) if focais else None,
+        "lente_max_mm": max(focais) if focais else None,
+        "tags": list(especificacoes.get("tags") or []),
+    }
+
+def _campos_pontilhados(especificacoes, prefixo=""):
+    # {"fisico": {"temperatura_operacao": {"min": -30}}} -> ("fisico.temperatura_operacao.min", -30)
+    for chave, valor in especificacoes.items():
+        if isinstance(valor, dict):
+            yield from _campos_pontilhados(valor, f"{prefixo}{chave}.")
+        else:
+            yield f"{prefixo}{chave}", valor
+
+def montar_matriz(resultados, nomes, digests=None):
+    """
+    Alinha N resultados do analisar_datasheet numa matriz campo × câmera:
+    uma linha por campo (os numéricos do achatar_especificacoes primeiro,
+    depois todos os campos detalhados, em notação "categoria.campo"), com um
+    valor por câmera na ordem de `nomes` — None onde o campo não foi
+    encontrado ou a câmera falhou. `diferente` marca as linhas que variam.
+    """
+    cameras, colunas = [], []
+    for i, (nome, dados) in enumerate(zip(nomes, resultados)):
+        camera = {"nome": nome, "sha256": digests[i] if digests else None}
+        if not dados or "erro" in dados:
+            camera["erro"] = (dados or {}).get("erro") or f"Não foi possível ler o arquivo {nome}"
+            cameras.append(camera)
+            colunas.append({})
+            continue
+        achatado = achatar_especificacoes(dados)
+        camera.update(fabricante=achatado["fabricante"], modelo=achatado["modelo"])
+        coluna = {f"resumo.{chave}": valor for chave, valor in achatado.items() if chave not in ("fabricante", "modelo", "modelos")}
+        coluna.update((campo, _encontrado(valor)) for campo, valor in _campos_pontilhados(dados)
+                      if campo not in ("fabricante", "modelo_produto"))
+        cameras.append(camera)
+        colunas.append(coluna)
+
+    campos = list(dict.fromkeys(campo for coluna in colunas for campo in coluna))
+    linhas = []
+    for campo in campos:
+        valores = [coluna.get(campo) for coluna in colunas]
+        presentes = [json.dumps(v, sort_keys=True, ensure_ascii=False) for v, c in zip(valores, colunas) if c]
+        linhas.append({"campo": campo, "valores": valores, "diferente": len(set(presentes)) > 1})
+    return {"cameras": cameras, "campos": linhas}
+
+# =========================
+# Extração preguiçosa: só as páginas de especificação, até resolver os campos
+# =========================
+RE_TITULO_SPECS = re.compile(r"especifica[çc](?:õ|o)es|specifications|dados t[ée]cnicos|caracter[íi]sticas t[ée]cnicas|technical data", re.IGNORECASE)
+PROPORCAO_LINHAS_CURTAS = 0.85   # páginas de tabela: quase só linhas curtas (rótulo / valor)
+MIN_LINHAS_TABELA = 30
+
+def iterar_paginas(doc):
+    # Uma extração por página (a saída "blocks" concatenada é igual ao get_text())
+    for pagina in doc:
+        inicio = time.perf_counter()
+        blocos = [b for b in pagina.get_text("blocks") if b[6] == 0]
+        yield pagina.number, blocos, time.perf_counter() - inicio
+
+def classificar_pagina(numero, blocos):
+    if numero == 0:
+        return "capa"  # sempre lida: fabricante e modelo costumam estar aqui
+    linhas = [l for b in blocos for l in b[4].splitlines() if l.strip()]
+    curtas = [l for l in linhas if len(l) < 60]
+    if any(RE_TITULO_SPECS.search(l) for l in curtas):
+        return "especificacao"
+    if len(linhas) >= MIN_LINHAS_TABELA and len(curtas) / len(linhas) >= PROPORCAO_LINHAS_CURTAS:
+        return "especificacao"
+    return "marketing"
+
+def _campos_pendentes():
+    pendentes = {(categoria, chave): padrao for categoria, campos in PATTERNS.items() for chave, padrao in campos.items()}
+    pendentes[("fisico", "temperatura_operacao")] = None
+    pendentes[("fisico", "grau_protecao")] = None
+    pendentes[("fisico", "dimensoes")] = None
+    return pendentes
+
+def _resolvidos(pendentes, texto, motor):
+    # Campos pendentes que esta página já resolve (os de PATTERNS numa varredura só)
+    valores = motor.extrair(texto, apenas=pendentes)
+    resolvidos = [campo for campo, valor in valores.items() if valor]
+    if ("fisico", "temperatura_operacao") in pendentes and buscar_temperatura(texto): resolvidos.append(("fisico", "temperatura_operacao"))
+    if ("fisico", "grau_protecao") in pendentes and RE_GRAU_PROTECAO.search(texto): resolvidos.append(("fisico", "grau_protecao"))
+    if ("fisico", "dimensoes") in pendentes and RE_DIMENSOES.search(texto): resolvidos.append(("fisico", "dimensoes"))
+    return resolvidos
+
+def extrair_texto_do_documento_lazy(doc, max_paginas=None):
+    """
+    Lê as páginas em ordem, mas só a capa e as páginas com cara de tabela de
+    especificações entram no texto analisado; para de extrair assim que todos
+    os campos de PATTERNS (e temperatura, IP, dimensões) foram encontrados,
+    ou ao chegar em `max_paginas` páginas lidas.
+    Devolve (texto, relatorio) com o tempo de cada página e o que foi pulado.
+    """
+    pendentes = _campos_pendentes()
+    total_campos = len(pendentes)
+    motor = MOTOR_PADRAO
+    partes, por_pagina = [], []
+    inicio = time.perf_counter()
+    for numero, blocos, tempo_extracao in iterar_paginas(doc):
+        tipo = classificar_pagina(numero, blocos)
+        tempo_busca = 0.0
+        if tipo != "marketing":
+            texto_pagina = "".join(b[4] for b in blocos)
+            partes.append(texto_pagina)
+            t0 = time.perf_counter()
+            # O motor é o que analisar_datasheet vai usar no texto lido até aqui; se o
+            # fabricante mudar (ex.: Hikvision, com outro padrão de WDR), reavalia as páginas já lidas
+            novo_motor = motor_do_fabricante(identificar_fabricante("".join(partes)))
+            if novo_motor is not motor:
+                motor, pendentes, paginas = novo_motor, _campos_pendentes(), partes
+            else:
+                paginas = [texto_pagina]
+            for texto in paginas:
+                for campo in _resolvidos(pendentes, texto, motor):
+                    del pendentes[campo]
+            tempo_busca = time.perf_counter() - t0
+        por_pagina.append({"pagina": numero + 1, "tipo": tipo,
+                           "extracao_ms": round(tempo_extracao * 1000, 2), "busca_ms": round(tempo_busca * 1000, 2)})
+        if not pendentes or (max_paginas and len(por_pagina) >= max_paginas):
+            break
+
+    lidas = [p["pagina"] for p in por_pagina if p["tipo"] != "marketing"]
+    relatorio = {
+        "paginas_total": doc.page_count,
+        "paginas_analisadas": lidas,
+        "paginas_puladas": doc.page_count - len(lidas),
+        "paginas_nao_extraidas": doc.page_count - len(por_pagina),
+        "campos_resolvidos": f"{total_campos - len(pendentes)}/{total_campos}",
+        "tempo_total_ms": round((time.perf_counter() - inicio) * 1000, 2),
+        "por_pagina": por_pagina,
+    }
+    return "".join(partes), relatorio
+
+def extrair_texto_lazy(pdf_path):
+    try:
+        with abrir_pdf(pdf_path) as doc:
+            return extrair_texto_do_documento_lazy(doc)
+    except Exception as e:
+        print(f"[ERRO] Não foi possível ler {descrever_origem(pdf_path)}: {e}")
+        return None, None
+
+def resumir_relatorio(relatorio):
+    paginas = ", ".join(f"p{p['pagina']}:{p['tipo']}:{p['extracao_ms'] + p['busca_ms']:.1f}ms" for p in relatorio["por_pagina"])
+    return (f"[lazy] {relatorio['paginas_puladas']}/{relatorio['paginas_total']} páginas puladas "
+            f"({relatorio['paginas_nao_extraidas']} nem extraídas), campos {relatorio['campos_resolvidos']}, "
+            f"{relatorio['tempo_total_ms']:.1f} ms [{paginas}]")
+
+# =========================
+# Tarefas para o pool de processos da API
+# =========================
+def inicializar_worker():
+    # Roda uma vez por processo do pool: carrega o PyMuPDF e aquece o cache
+    # do módulo `re` com os padrões que ainda não são pré-compilados (modelo,
+    # normalizadores) antes da primeira requisição real.
+    fitz.open().close()
+    analisar_datasheet("Intelbras VIP 1230 B\nResolução Máxima: 1920 x 1080\nPeso: 300 g\n")
+
+def processar_pdf(origem, max_paginas=None, lazy=False, tempos=None):
+    # `origem` é um caminho ou os bytes do PDF. Na extração completa, PDFs acima de
+    # `max_paginas` são recusados; na lazy, a leitura para nas primeiras `max_paginas`.
+    # O relatório da lazy vai em tempos["lazy"] (o print no stderr é só do CLI)
+    inicio = time.perf_counter()
+    try:
+        with abrir_pdf(origem) as doc:
+            aberto = time.perf_counter()
+            somar_tempo(tempos, "abertura", aberto - inicio)
+            if lazy:
+                texto, relatorio = extrair_texto_do_documento_lazy(doc, max_paginas)
+                if tempos is not None:
+                    tempos["lazy"] = relatorio
+            elif max_paginas and doc.page_count > max_paginas:
+                return {"erro": f"O PDF tem {doc.page_count} páginas; o limite é {max_paginas}."}
+            else:
+                texto = "".join(page.get_text() for page in doc)
+            somar_tempo(tempos, "extracao_texto", time.perf_counter() - aberto)
+    except Exception as e:
+        print(f"[ERRO] Não foi possível ler {descrever_origem(origem)}: {e}", file=sys.stderr)
+        return None
+    return analisar_datasheet(texto, tempos) if texto else None
+
+def processar_pdf_medido(origem, max_paginas=None, lazy=False):
+    """
+    processar_pdf para o pool da API: devolve (resultado, tempos), com os
+    segundos de cada estágio (abertura, extracao_texto, identificacao,
+    campos, normalizacao, total) e de cada campo de PATTERNS, mais o
+    relatório de páginas em "lazy" quando for o caso. As métricas são
+    registradas no processo da API, que recebe os tempos daqui.
+    """
+    tempos = {"estagios": {}, "campos": {}}
+    inicio = time.perf_counter()
+    resultado = processar_pdf(origem, max_paginas, lazy, tempos)
+    tempos["estagios"]["total"] = time.perf_counter() - inicio
+    return resultado, tempos
+
+def comparar_pdfs(caminhos, lazy=False, workers=None):
+    """
+    Analisa N PDFs em paralelo (um processo por PDF distinto: arquivos com o
+    mesmo conteúdo são analisados uma vez só) e devolve a matriz alinhada.
+    """
+    digests = []
+    for caminho in caminhos:
+        try:
+            with open(caminho, "rb") as f:
+                digests.append(hashlib.sha256(f.read()).hexdigest())
+        except OSError:
+            digests.append(None)
+    unicos = {d: c for c, d in zip(caminhos, digests) if d}
+    with ProcessPoolExecutor(max_workers=workers or min(len(unicos), os.cpu_count() or 1) or 1,
+                             initializer=inicializar_worker) as pool:
+        futuros = {d: pool.submit(processar_pdf, c, None, lazy) for d, c in unicos.items()}
+        resultados = [futuros[d].result() if d else None for d in digests]
+    nomes = [os.path.basename(c) for c in caminhos]
+    return montar_matriz(resultados, nomes, digests)
+
 # =========================
 # Execução principal (para ser chamado pelo Node.js)
 # =========================
+PROFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "analisador.prof")
+
 if __name__ == '__main__':
-    if len(sys.argv) != 3:
-        erro = {"erro": "Uso: python analisador.py <caminho_pdf1> <caminho_pdf2>"}
+    # --lazy: extração página a página (relatório de páginas vai para o stderr)
+    # --comparar: N PDFs em paralelo, saída na matriz campo × câmera
+    # --profile: roda sob o cProfile, grava PROFILE_PATH e resume no stderr
+    #            (com --comparar só o processo principal é medido)
+    lazy = "--lazy" in sys.argv[1:]
+    comparar = "--comparar" in sys.argv[1:]
+    argumentos = [a for a in sys.argv[1:] if a not in ("--lazy", "--comparar", "--profile")]
+    if "--profile" in sys.argv[1:]:
+        import atexit, cProfile, pstats
+        perfil = cProfile.Profile()
+
+        def salvar_perfil():
+            # atexit: também roda nos sys.exit() abaixo
+            perfil.disable()
+            perfil.dump_stats(PROFILE_PATH)
+            print(f"Perfil salvo em {PROFILE_PATH}", file=sys.stderr)
+            pstats.Stats(perfil, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
+
+        atexit.register(salvar_perfil)
+        perfil.enable()
+    if comparar:
+        if not argumentos:
+            print(json.dumps({"erro": "Uso: python analisador.py --comparar [--lazy] <pdf1> <pdf2> ... <pdfN>"}))
+            sys.exit(1)
+        try:
+            print(json.dumps(comparar_pdfs(argumentos, lazy=lazy), ensure_ascii=False))
+        except Exception as e:
+            print(json.dumps({"erro": str(e)}))
+            sys.exit(1)
+        sys.exit(0)
+    if len(argumentos) != 2:
+        erro = {"erro": "Uso: python analisador.py [--lazy] <caminho_pdf1> <caminho_pdf2>"}
         print(json.dumps(erro))
         sys.exit(1)
 
-    caminho_pdf1 = sys.argv[1]
-    caminho_pdf2 = sys.argv[2]
+    caminho_pdf1 = argumentos[0]
+    caminho_pdf2 = argumentos[1]
 
     try:
-        texto1 = extrair_texto_do_pdf(caminho_pdf1)
-        texto2 = extrair_texto_do_pdf(caminho_pdf2)
+        if lazy:
+            (texto1, relatorio1), (texto2, relatorio2) = extrair_texto_lazy(caminho_pdf1), extrair_texto_lazy(caminho_pdf2)
+            for relatorio in (relatorio1, relatorio2):
+                if relatorio: print(resumir_relatorio(relatorio), file=sys.stderr)
+        else:
+            texto1 = extrair_texto_do_pdf(caminho_pdf1)
+            texto2 = extrair_texto_do_pdf(caminho_pdf2)
         dados1 = analisar_datasheet(texto1) if texto1 else {"erro": f"Não foi possível ler o primeiro arquivo"}
         dados2 = analisar_datasheet(texto2) if texto2 else {"erro": f"Não foi possível ler o segundo arquivo"}
         resultado_final = { "camera1": dados1, "camera2": dados2 }
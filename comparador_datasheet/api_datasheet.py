@@ -1,23 +1,325 @@
 # api_datasheet.py
-from flask import Flask, request, jsonify
+from flask import Flask, Request, g, request, jsonify, url_for
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+import hashlib
 import os
+import tempfile
+import threading
+import time
+import uuid
 
 # Importa as funções que criamos no nosso script principal de análise
 # O 'analisador' se refere ao arquivo 'analisador.py'
 try:
-    from analisador import analisar_datasheet, extrair_texto_do_pdf
+    from analisador import inicializar_worker, montar_matriz, processar_pdf_medido
 except ImportError:
     # Se der erro na importação, dá uma mensagem de ajuda
     print("ERRO: Verifique se o arquivo 'analisador.py' está na mesma pasta que 'api_datasheet.py'")
     exit()
 
+# Os PDFs ficam em memória desde o parse do multipart. Só uploads acima de
+# DATASHEET_SPOOL_MB vão para disco (e daí para um temporário privado, mkstemp).
+MAX_UPLOAD_MB = int(os.environ.get('DATASHEET_MAX_UPLOAD_MB', 50))
+SPOOL_BYTES = int(float(os.environ.get('DATASHEET_SPOOL_MB', 8)) * 1024 * 1024)
+
+
+class RequisicaoDatasheet(Request):
+    # O Werkzeug, por padrão, manda para disco todo arquivo acima de 500 KB
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES, mode='wb+')
+
+
 # Inicializa a aplicação Flask
 app = Flask(__name__)
+app.request_class = RequisicaoDatasheet
+# Páginas por PDF: acima disso a extração completa recusa o PDF e a lazy para de ler (0 = sem limite)
+MAX_PAGINAS = int(os.environ.get('DATASHEET_MAX_PAGINAS', 500))
+MAX_COMPARACAO = int(os.environ.get('DATASHEET_MAX_COMPARACAO', 12))  # datasheets por /comparar-datasheets
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_MB * 1024 * 1024
+
+# Pool de processos: os PDFs são analisados fora da thread da requisição.
+# Tudo configurável por variável de ambiente.
+POOL_WORKERS = int(os.environ.get('DATASHEET_WORKERS', os.cpu_count() or 2))
+FILA_MAX = int(os.environ.get('DATASHEET_FILA_MAX', 16))        # comparações em andamento
+JOB_TTL = int(os.environ.get('DATASHEET_JOB_TTL', 600))         # segundos que um resultado assíncrono fica guardado
+ESPERA_MAX = int(os.environ.get('DATASHEET_ESPERA_MAX', 30))    # teto do long-poll, em segundos
+
+# Cache de resultados por conteúdo do PDF (memória + SQLite). O banco fica ao
+# lado deste arquivo, seja a API iniciada da raiz (serverAi.js) ou daqui.
+CACHE_DB = os.environ.get(
+    'DATASHEET_CACHE_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache_datasheets.sqlite3'))
+
+_pool = None
+_pool_lock = threading.Lock()
+_vagas = threading.BoundedSemaphore(FILA_MAX)
+_em_andamento = [0]   # comparações ocupando vaga na fila (para a métrica)
+_em_andamento_lock = threading.Lock()
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+# Cache, catálogo e métricas só existem no processo do servidor. No Windows o
+# pool usa spawn e cada worker reimporta este módulo: nada disso pode ser
+# criado no import (os workers só precisam do analisador). inicializar_servidor
+# roda no __main__ e, para quem sobe o app de outro jeito, na primeira requisição.
+cache = None
+catalogo = None
+metricas = None
+LATENCIA_HTTP = ESTAGIOS_PDF = CAMPOS_PDF = PDFS = None
+_servidor_lock = threading.Lock()
+
+
+def inicializar_servidor():
+    global cache, catalogo, metricas, LATENCIA_HTTP, ESTAGIOS_PDF, CAMPOS_PDF, PDFS
+    with _servidor_lock:
+        if metricas is not None:
+            return
+        from cache_datasheet import CacheDatasheet
+        from catalogo_specs import CATALOGO_DB, CatalogoSpecs
+        from metricas import Contador, Histograma, Medidor, Registro
+
+        # Cache de resultados por conteúdo do PDF (memória + SQLite)
+        cache = CacheDatasheet(
+            CACHE_DB,
+            max_memoria=int(os.environ.get('DATASHEET_CACHE_MEMORIA', 256)),
+            max_disco_mb=int(os.environ.get('DATASHEET_CACHE_DISCO_MB', 200)),
+            ttl_segundos=int(os.environ.get('DATASHEET_CACHE_TTL_DIAS', 30)) * 24 * 3600,
+        )
+        # Catálogo de specs indexado em lote (catalogo_specs.py indexar <pasta>)
+        catalogo = CatalogoSpecs(CATALOGO_DB)
+
+        # Métricas expostas em /metrics (formato Prometheus). Os estágios e campos
+        # são medidos dentro dos workers e registrados aqui quando o PDF termina.
+        registro = Registro()
+        LATENCIA_HTTP = registro.registrar(Histograma(
+            "datasheet_http_duracao_segundos", "Latência das requisições HTTP.", ("rota", "metodo", "status")))
+        ESTAGIOS_PDF = registro.registrar(Histograma(
+            "datasheet_estagio_duracao_segundos",
+            "Tempo de cada estágio da análise de um PDF no worker (abertura, extracao_texto, identificacao, campos, normalizacao, total).",
+            ("estagio",)))
+        CAMPOS_PDF = registro.registrar(Histograma(
+            "datasheet_campo_duracao_segundos", "Tempo das regexes de cada campo de PATTERNS por PDF (_rotulos: localização de todos os rótulos).",
+            ("campo",), buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)))
+        PDFS = registro.registrar(Contador(
+            "datasheet_pdfs_total", "PDFs recebidos, por onde veio o resultado (cache, catalogo, pool, erro).", ("origem",)))
+        registro.registrar(Medidor("datasheet_fila_em_uso", "Comparações ocupando vaga na fila do pool.", lambda: _em_andamento[0]))
+        registro.registrar(Medidor("datasheet_fila_capacidade", "Vagas na fila do pool (DATASHEET_FILA_MAX).", lambda: FILA_MAX))
+        registro.registrar(Medidor("datasheet_jobs_guardados", "Jobs assíncronos em memória.", lambda: len(_jobs)))
+        metricas = registro
+
+
+def obter_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS, initializer=inicializar_worker)
+        return _pool
+
+
+def aquecer_pool():
+    # Sobe todos os processos já na inicialização, para a primeira comparação não pagar o custo
+    pool = obter_pool()
+    wait([pool.submit(time.sleep, 0.1) for _ in range(POOL_WORKERS)])
+
+
+def _ocupar_vaga(delta):
+    with _em_andamento_lock:
+        _em_andamento[0] += delta
+
+
+def _remover_arquivos(caminhos):
+    for caminho in caminhos:
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+
+def _liberar_quando_terminar(futuros, caminhos):
+    # Quando os dois PDFs terminam: apaga os temporários e devolve a vaga da fila
+    restantes = [len(futuros)]
+    lock = threading.Lock()
+
+    def concluido(_):
+        with lock:
+            restantes[0] -= 1
+            if restantes[0]:
+                return
+        _remover_arquivos(caminhos)
+        _ocupar_vaga(-1)
+        _vagas.release()
+
+    for futuro in futuros:
+        futuro.add_done_callback(concluido)
+
+
+def _ler_upload(arquivo):
+    """
+    Lê o upload calculando o SHA-256. Devolve (origem, digest, caminho_temp):
+    `origem` são os bytes do PDF ou, acima do limite de spool, o caminho de um
+    temporário com nome (o spool em disco do Werkzeug não tem um para o worker abrir).
+    """
+    stream = arquivo.stream
+    tamanho = stream.seek(0, os.SEEK_END)
+    stream.seek(0)
+    if tamanho <= SPOOL_BYTES:
+        # Ainda em memória no SpooledTemporaryFile: uma leitura, sem disco
+        dados = stream.read()
+        return dados, hashlib.sha256(dados).hexdigest(), None
+
+    sha256 = hashlib.sha256()
+    fd, caminho = tempfile.mkstemp(prefix='datasheet_', suffix='.pdf')
+    with os.fdopen(fd, 'wb') as temporario:
+        while True:
+            bloco = stream.read(1024 * 1024)
+            if not bloco:
+                break
+            sha256.update(bloco)
+            temporario.write(bloco)
+    return caminho, sha256.hexdigest(), caminho
+
+
+def _buscar_pronto(chave, digest, lazy):
+    # Primeiro o cache de resultados; depois o catálogo indexado em lote (só a extração completa)
+    dados = cache.obter(chave)
+    if dados is not None:
+        PDFS.inc(origem="cache")
+        return dados
+    if not lazy:
+        dados = catalogo.obter(digest)
+        if dados:
+            PDFS.inc(origem="catalogo")
+            cache.guardar(chave, dados)
+    return dados
+
+
+def _futuro_pronto(dados):
+    futuro = Future()
+    futuro.set_result(dados)
+    return futuro
+
+
+def _registrar_tempos(futuro_medido, chave):
+    """
+    Futuro com só o resultado de processar_pdf_medido; os tempos que vêm
+    junto do worker vão para os histogramas assim que ele termina. O
+    resultado vai para o cache antes de o futuro ser resolvido: quem acordar
+    com ele e reenviar o mesmo PDF já encontra o cache preenchido.
+    """
+    futuro = Future()
+
+    def concluido(f):
+        try:
+            dados, tempos = f.result()
+        except BaseException as e:
+            PDFS.inc(origem="erro")
+            futuro.set_exception(e)
+            return
+        for estagio, segundos in tempos["estagios"].items():
+            ESTAGIOS_PDF.observar(segundos, estagio=estagio)
+        for campo, segundos in tempos["campos"].items():
+            CAMPOS_PDF.observar(segundos, campo=campo)
+        PDFS.inc(origem="pool" if dados and "erro" not in dados else "erro")
+        if dados and "erro" not in dados:
+            cache.guardar(chave, dados)
+        futuro.set_result(dados)
+
+    futuro_medido.add_done_callback(concluido)
+    return futuro
+
+
+def _submeter(lidos, lazy):
+    """
+    Um futuro por upload, na mesma ordem: do cache/catálogo quando possível,
+    senão do pool. Uploads idênticos (mesmo SHA-256) compartilham o futuro e
+    são analisados uma vez só. Devolve None se a fila estiver cheia.
+    """
+    caminhos = [caminho for _, _, caminho in lidos if caminho]
+    por_digest = {}
+    for origem, digest, _ in lidos:
+        if digest not in por_digest:
+            chave = cache.chave_do_digest(digest, 'lazy' if lazy else '')
+            por_digest[digest] = (origem, chave, _buscar_pronto(chave, digest, lazy))
+
+    if all(dados for _, _, dados in por_digest.values()):
+        _remover_arquivos(caminhos)
+        futuros = {digest: _futuro_pronto(dados) for digest, (_, _, dados) in por_digest.items()}
+        return [futuros[digest] for _, digest, _ in lidos]
+
+    # Fila cheia: recusa em vez de enfileirar sem limite
+    if not _vagas.acquire(blocking=False):
+        _remover_arquivos(caminhos)
+        return None
+    _ocupar_vaga(1)
+
+    try:
+        # Os PDFs que faltam são extraídos e analisados em paralelo no pool,
+        # direto dos bytes (ou do temporário, se o upload era grande)
+        pool = obter_pool()
+        futuros = {}
+        for digest, (origem, chave, dados) in por_digest.items():
+            if dados:
+                futuros[digest] = _futuro_pronto(dados)
+                continue
+            futuros[digest] = _registrar_tempos(pool.submit(processar_pdf_medido, origem, MAX_PAGINAS, lazy), chave)
+    except Exception:
+        _ocupar_vaga(-1)
+        _vagas.release()
+        _remover_arquivos(caminhos)
+        raise
+
+    # Os temporários (se houver) são apagados e a vaga liberada quando o pool terminar
+    _liberar_quando_terminar(list(futuros.values()), caminhos)
+    return [futuros[digest] for _, digest, _ in lidos]
 
-# Define uma pasta para salvar os PDFs que chegam pela API temporariamente
-UPLOAD_FOLDER = 'temp_uploads'
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+
+def _resposta_fila_cheia():
+    resposta = jsonify({"erro": "Servidor ocupado processando outras comparações. Tente novamente em instantes."})
+    resposta.headers['Retry-After'] = '5'
+    return resposta, 503
+
+
+def _resultados(futuros, nomes):
+    resultados = []
+    for futuro, nome in zip(futuros, nomes):
+        try:
+            dados = futuro.result()
+        except Exception as e:
+            dados = {"erro": f"Erro ao processar o arquivo {nome}: {str(e)}"}
+        resultados.append(dados if dados else {"erro": f"Não foi possível ler o arquivo {nome}"})
+    return resultados
+
+
+def _montar_resultado(futuros, nomes):
+    return {f"camera{i}": dados for i, dados in enumerate(_resultados(futuros, nomes), start=1)}
+
+
+def _montar_matriz(futuros, nomes, digests):
+    return montar_matriz(_resultados(futuros, nomes), nomes, digests)
+
+
+def _criar_job(futuros, montar):
+    # `montar` produz o resultado final quando todos os futuros terminarem
+    _limpar_jobs_expirados()
+    job_id = uuid.uuid4().hex
+    with _jobs_lock:
+        _jobs[job_id] = {"futuros": futuros, "montar": montar, "expira": None}
+    for futuro in set(futuros):
+        futuro.add_done_callback(lambda _, job_id=job_id: _marcar_expiracao(job_id))
+    return jsonify({"job_id": job_id, "status_url": url_for('consultar_job', job_id=job_id)}), 202
+
+
+def _limpar_jobs_expirados():
+    agora = time.time()
+    with _jobs_lock:
+        for job_id in [j for j, job in _jobs.items() if job["expira"] and job["expira"] < agora]:
+            del _jobs[job_id]
+
+
+def _marcar_expiracao(job_id):
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job and all(f.done() for f in job["futuros"]):
+            job["expira"] = time.time() + JOB_TTL
 
 
 @app.route('/processar-datasheets', methods=['POST'])
@@ -25,6 +327,8 @@ def processar_datasheets():
     """
     Esta é a rota da nossa API. Ela vai receber os dois PDFs,
     processá-los com nosso script e devolver o JSON com os dados.
+    Com ?async=1 devolve na hora um job_id para consultar em /jobs/<job_id>.
+    Com ?lazy=1 só as páginas de especificação de cada PDF são analisadas.
     """
     # 1. Verifica se os arquivos foram enviados corretamente na requisição
     if 'datasheet1' not in request.files or 'datasheet2' not in request.files:
@@ -37,37 +341,140 @@ def processar_datasheets():
     if datasheet1.filename == '' or datasheet2.filename == '':
         return jsonify({"erro": "Um ou mais arquivos não foram selecionados."}), 400
 
+    # 2. Datasheets já analisados voltam direto do cache (ou do catálogo), sem abrir o PDF
+    lazy = request.args.get('lazy') == '1'
+    nomes = [datasheet1.filename, datasheet2.filename]
+    lidos = [_ler_upload(datasheet1), _ler_upload(datasheet2)]
+
+    # 3. Os que faltam vão para o pool (o mesmo PDF enviado duas vezes é analisado uma vez só)
     try:
-        # 2. Salva os arquivos em uma pasta temporária para poderem ser lidos
-        path1 = os.path.join(app.config['UPLOAD_FOLDER'], datasheet1.filename)
-        path2 = os.path.join(app.config['UPLOAD_FOLDER'], datasheet2.filename)
-        datasheet1.save(path1)
-        datasheet2.save(path2)
-
-        # 3. Usa nossas funções importadas para fazer a extração e análise
-        texto1 = extrair_texto_do_pdf(path1)
-        texto2 = extrair_texto_do_pdf(path2)
-
-        # Analisa cada texto e prepara a resposta
-        dados1 = analisar_datasheet(texto1) if texto1 else {"erro": f"Não foi possível ler o arquivo {datasheet1.filename}"}
-        dados2 = analisar_datasheet(texto2) if texto2 else {"erro": f"Não foi possível ler o arquivo {datasheet2.filename}"}
-
-        # 4. Limpa os arquivos temporários após o uso
-        os.remove(path1)
-        os.remove(path2)
-
-        # 5. Retorna o resultado final em formato JSON para o seu backend Node.js
-        return jsonify({
-            "camera1": dados1,
-            "camera2": dados2
-        })
+        futuros = _submeter(lidos, lazy)
+    except Exception as e:
+        return jsonify({"erro": f"Ocorreu um erro no servidor Python: {str(e)}"}), 500
+    if futuros is None:
+        return _resposta_fila_cheia()
+
+    if request.args.get('async') == '1':
+        return _criar_job(futuros, lambda: _montar_resultado(futuros, nomes))
+
+    # 4. Retorna o resultado final em formato JSON para o seu backend Node.js
+    return jsonify(_montar_resultado(futuros, nomes))
 
+
+@app.route('/comparar-datasheets', methods=['POST'])
+def comparar_datasheets():
+    """
+    Compara N datasheets numa requisição só (campo 'datasheets' repetido no
+    multipart). Os PDFs são analisados em paralelo, uploads idênticos uma vez
+    só, e a resposta é a matriz campo × câmera de montar_matriz.
+    Aceita ?async=1 e ?lazy=1 como /processar-datasheets.
+    """
+    arquivos = [a for a in request.files.getlist('datasheets') if a.filename]
+    if len(arquivos) < 2:
+        return jsonify({"erro": "Envie pelo menos dois arquivos no campo 'datasheets'."}), 400
+    if len(arquivos) > MAX_COMPARACAO:
+        return jsonify({"erro": f"No máximo {MAX_COMPARACAO} datasheets por comparação."}), 400
+
+    lazy = request.args.get('lazy') == '1'
+    nomes = [a.filename for a in arquivos]
+    lidos = [_ler_upload(a) for a in arquivos]
+    digests = [digest for _, digest, _ in lidos]
+    try:
+        futuros = _submeter(lidos, lazy)
     except Exception as e:
-        # Em caso de qualquer outro erro, retorna uma mensagem de erro genérica
         return jsonify({"erro": f"Ocorreu um erro no servidor Python: {str(e)}"}), 500
+    if futuros is None:
+        return _resposta_fila_cheia()
+
+    if request.args.get('async') == '1':
+        return _criar_job(futuros, lambda: _montar_matriz(futuros, nomes, digests))
+    return jsonify(_montar_matriz(futuros, nomes, digests))
+
+
+@app.before_request
+def _iniciar_cronometro():
+    inicializar_servidor()
+    g.inicio = time.perf_counter()
+
+
+@app.after_request
+def _medir_requisicao(resposta):
+    inicio = getattr(g, 'inicio', None)
+    if inicio is not None:
+        rota = request.url_rule.rule if request.url_rule else 'desconhecida'
+        LATENCIA_HTTP.observar(time.perf_counter() - inicio, rota=rota, metodo=request.method, status=resposta.status_code)
+    return resposta
+
+
+@app.route('/metrics', methods=['GET'])
+def exportar_metricas():
+    """Métricas no formato texto do Prometheus."""
+    from metricas import TIPO_CONTEUDO
+    return app.response_class(metricas.exportar(), content_type=TIPO_CONTEUDO)
+
+
+@app.errorhandler(413)
+def upload_grande_demais(_):
+    return jsonify({"erro": f"Upload maior que o limite de {MAX_UPLOAD_MB} MB."}), 413
+
+
+@app.route('/cache/estatisticas', methods=['GET'])
+def estatisticas_cache():
+    """Hits, misses, taxa de acerto e ocupação do cache de datasheets."""
+    return jsonify(cache.estatisticas())
+
+
+@app.route('/catalogo/consultar', methods=['GET'])
+def consultar_catalogo():
+    """
+    Filtra o catálogo de specs sem abrir PDFs. Ex.:
+    /catalogo/consultar?ip=IP67&tag=Full Color&min_mp=4
+    (tag e ip podem se repetir; tags exigem todas, ip aceita qualquer um).
+    """
+    try:
+        numeros = {campo: conversor(request.args[campo])
+                   for campo, conversor in (('min_mp', float), ('temp_min_ate', int), ('temp_max_desde', int), ('limite', int))
+                   if request.args.get(campo)}
+    except ValueError:
+        return jsonify({"erro": "min_mp, temp_min_ate, temp_max_desde e limite devem ser números."}), 400
+
+    resultados = catalogo.consultar(
+        fabricante=request.args.get('fabricante'),
+        modelo=request.args.get('modelo'),
+        tags=request.args.getlist('tag'),
+        graus_protecao=[ip.upper() for ip in request.args.getlist('ip')],
+        **numeros,
+    )
+    return jsonify({"total": len(resultados), "resultados": resultados})
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def consultar_job(job_id):
+    """
+    Consulta um job assíncrono. Com ?esperar=N segura a requisição por até
+    N segundos (limitado a DATASHEET_ESPERA_MAX) esperando o resultado.
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        return jsonify({"erro": "Job não encontrado ou expirado."}), 404
+
+    try:
+        esperar = min(max(float(request.args.get('esperar', 0)), 0), ESPERA_MAX)
+    except ValueError:
+        return jsonify({"erro": "O parâmetro 'esperar' deve ser um número de segundos."}), 400
+
+    _, pendentes = wait(job["futuros"], timeout=esperar)
+    if pendentes:
+        return jsonify({"job_id": job_id, "status": "processando"}), 202
+    return jsonify({"job_id": job_id, "status": "concluido", "resultado": job["montar"]()})
 
 
 if __name__ == '__main__':
-    # Roda o servidor Flask na porta 5001 em modo de desenvolvimento (debug=True)
-    # O seu serverAi.js vai se comunicar com ele através de http://localhost:5000
-    app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
+    # Abre cache e catálogo e sobe o pool antes de aceitar requisições
+    inicializar_servidor()
+    aquecer_pool()
+    # Roda o servidor Flask na porta 5001. O modo debug (com o reloader, que
+    # duplicaria o pool de processos) só liga com DATASHEET_DEBUG=1.
+    # O seu serverAi.js vai se comunicar com ele através de http://localhost:5001
+    app.run(host='0.0.0.0', port=5001, debug=os.environ.get('DATASHEET_DEBUG') == '1', threaded=True, use_reloader=False)
@@ -0,0 +1,120 @@
+# cache_datasheet.py
+# Cache dos resultados de analisar_datasheet, chaveado pelo SHA-256 do PDF
+# enviado + uma versão do analisador. Dois níveis: LRU em memória e SQLite
+# em disco (sobrevive a reinícios). Um datasheet repetido volta sem abrir o PDF.
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+ANALISADOR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "analisador.py")
+
+
+def calcular_versao_analisador(caminho=ANALISADOR_PATH):
+    # Qualquer mudança no analisador invalida o cache inteiro
+    with open(caminho, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+VERSAO_ANALISADOR = calcular_versao_analisador()
+
+
+class CacheDatasheet:
+    def __init__(self, caminho_db, max_memoria=256, max_disco_mb=200, ttl_segundos=30 * 24 * 3600):
+        self.caminho_db = caminho_db
+        self.max_memoria = max_memoria
+        self.max_disco_bytes = max_disco_mb * 1024 * 1024
+        self.ttl = ttl_segundos
+        self._memoria = OrderedDict()  # chave -> (criado, dados)
+        self._lock = threading.Lock()
+        self._stats = {"hits_memoria": 0, "hits_disco": 0, "misses": 0, "evictions": 0}
+        self._db = sqlite3.connect(caminho_db, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS resultados ("
+            " chave TEXT PRIMARY KEY, dados TEXT NOT NULL, tamanho INTEGER NOT NULL,"
+            " criado REAL NOT NULL, acessado REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_resultados_acessado ON resultados (acessado)")
+        self._db.commit()
+
+    @staticmethod
+    def chave(conteudo_pdf):
+        return CacheDatasheet.chave_do_digest(hashlib.sha256(conteudo_pdf).hexdigest())
+
+    @staticmethod
+    def chave_do_digest(sha256_hex, variante=""):
+        # `variante` separa resultados do mesmo PDF obtidos de modos diferentes (ex.: extração lazy)
+        return f"{sha256_hex}:{VERSAO_ANALISADOR}{':' + variante if variante else ''}"
+
+    def obter(self, chave):
+        agora = time.time()
+        with self._lock:
+            item = self._memoria.get(chave)
+            if item and agora - item[0] <= self.ttl:
+                self._memoria.move_to_end(chave)
+                self._stats["hits_memoria"] += 1
+                return item[1]
+            if item:
+                del self._memoria[chave]
+
+            linha = self._db.execute("SELECT dados, criado FROM resultados WHERE chave = ?", (chave,)).fetchone()
+            if linha and agora - linha[1] <= self.ttl:
+                self._db.execute("UPDATE resultados SET acessado = ? WHERE chave = ?", (agora, chave))
+                self._db.commit()
+                dados = json.loads(linha[0])
+                self._guardar_memoria(chave, linha[1], dados)
+                self._stats["hits_disco"] += 1
+                return dados
+
+            self._stats["misses"] += 1
+            return None
+
+    def guardar(self, chave, dados):
+        agora = time.time()
+        serializado = json.dumps(dados, ensure_ascii=False)
+        with self._lock:
+            self._guardar_memoria(chave, agora, dados)
+            self._db.execute(
+                "INSERT OR REPLACE INTO resultados (chave, dados, tamanho, criado, acessado) VALUES (?, ?, ?, ?, ?)",
+                (chave, serializado, len(serializado.encode("utf-8")), agora, agora),
+            )
+            self._evictar_disco(agora)
+            self._db.commit()
+
+    def _guardar_memoria(self, chave, criado, dados):
+        self._memoria[chave] = (criado, dados)
+        self._memoria.move_to_end(chave)
+        while len(self._memoria) > self.max_memoria:
+            self._memoria.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _evictar_disco(self, agora):
+        # Por idade: tudo que passou do TTL. Por tamanho: os menos acessados primeiro.
+        removidos = self._db.execute("DELETE FROM resultados WHERE criado < ?", (agora - self.ttl,)).rowcount
+        total = self._db.execute("SELECT COALESCE(SUM(tamanho), 0) FROM resultados").fetchone()[0]
+        if total > self.max_disco_bytes:
+            for chave, tamanho in self._db.execute("SELECT chave, tamanho FROM resultados ORDER BY acessado").fetchall():
+                if total <= self.max_disco_bytes:
+                    break
+                self._db.execute("DELETE FROM resultados WHERE chave = ?", (chave,))
+                total -= tamanho
+                removidos += 1
+        self._stats["evictions"] += removidos
+
+    def estatisticas(self):
+        with self._lock:
+            stats = dict(self._stats)
+            entradas, tamanho = self._db.execute("SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM resultados").fetchone()
+            stats["entradas_memoria"] = len(self._memoria)
+        consultas = stats["hits_memoria"] + stats["hits_disco"] + stats["misses"]
+        stats.update({
+            "consultas": consultas,
+            "taxa_acerto": round((stats["hits_memoria"] + stats["hits_disco"]) / consultas, 4) if consultas else 0.0,
+            "entradas_disco": entradas,
+            "bytes_disco": tamanho,
+            "versao_analisador": VERSAO_ANALISADOR,
+        })
+        return stats
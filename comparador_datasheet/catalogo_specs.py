@@ -0,0 +1,250 @@
+# catalogo_specs.py
+# Catálogo local (SQLite) das especificações já extraídas dos datasheets.
+# Uma pasta inteira de PDFs é indexada de uma vez, num pool de processos; as
+# specs achatadas (MP, temperatura, peso, IP, lente, tags) ficam em colunas
+# indexadas e as consultas ("IP67 + Full Color + ≥ 4 MP") não abrem nenhum PDF.
+#
+# Uso:
+#   python catalogo_specs.py indexar ../uploads [--workers 4] [--db catalogo_specs.sqlite3]
+#   python catalogo_specs.py consultar --ip IP67 --tag "Full Color" --min-mp 4
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from analisador import achatar_especificacoes, inicializar_worker, processar_pdf
+from cache_datasheet import VERSAO_ANALISADOR
+
+# Ao lado deste arquivo: o indexar rodado daqui e a API iniciada da raiz usam o mesmo banco
+CATALOGO_DB = os.environ.get(
+    'DATASHEET_CATALOGO_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalogo_specs.sqlite3'))
+COLUNAS = ("sha256", "caminho", "fabricante", "modelo", "resolucao", "resolucao_mp", "temp_min", "temp_max",
+           "peso_g", "grau_protecao", "lente", "lente_min_mm", "lente_max_mm")
+
+
+def listar_pdfs(pasta):
+    # Os uploads não têm extensão: o PDF é reconhecido pelo cabeçalho %PDF
+    for raiz, _, nomes in os.walk(pasta):
+        for nome in sorted(nomes):
+            caminho = os.path.join(raiz, nome)
+            try:
+                with open(caminho, "rb") as f:
+                    if f.read(4) == b"%PDF":
+                        yield caminho
+            except OSError:
+                continue
+
+
+def hash_arquivo(caminho):
+    sha256 = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(bloco)
+    return sha256.hexdigest()
+
+
+class CatalogoSpecs:
+    def __init__(self, caminho_db=CATALOGO_DB):
+        self.caminho_db = caminho_db
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(caminho_db, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")  # consultas da API enquanto um lote é indexado
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS datasheets ("
+            " sha256 TEXT PRIMARY KEY, caminho TEXT, fabricante TEXT COLLATE NOCASE, modelo TEXT COLLATE NOCASE,"
+            " resolucao TEXT, resolucao_mp REAL, temp_min INTEGER, temp_max INTEGER, peso_g INTEGER,"
+            " grau_protecao TEXT COLLATE NOCASE, lente TEXT, lente_min_mm REAL, lente_max_mm REAL,"
+            " especificacoes TEXT NOT NULL, versao_analisador TEXT NOT NULL, indexado REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS modelos (modelo TEXT COLLATE NOCASE NOT NULL, sha256 TEXT NOT NULL,"
+            " PRIMARY KEY (modelo, sha256));"
+            "CREATE TABLE IF NOT EXISTS tags (tag TEXT COLLATE NOCASE NOT NULL, sha256 TEXT NOT NULL,"
+            " PRIMARY KEY (tag, sha256));"
+            "CREATE INDEX IF NOT EXISTS idx_datasheets_fabricante ON datasheets (fabricante);"
+            "CREATE INDEX IF NOT EXISTS idx_datasheets_modelo ON datasheets (modelo);"
+            "CREATE INDEX IF NOT EXISTS idx_datasheets_ip_mp ON datasheets (grau_protecao, resolucao_mp);"
+            "CREATE INDEX IF NOT EXISTS idx_modelos_sha256 ON modelos (sha256);"
+            "CREATE INDEX IF NOT EXISTS idx_tags_sha256 ON tags (sha256);"
+        )
+        self._db.commit()
+
+    def guardar(self, sha256, caminho, especificacoes, commit=True):
+        achatado = achatar_especificacoes(especificacoes)
+        linha = dict(achatado, sha256=sha256, caminho=caminho)
+        with self._lock:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO datasheets ({', '.join(COLUNAS)}, especificacoes, versao_analisador, indexado)"
+                f" VALUES ({', '.join('?' * len(COLUNAS))}, ?, ?, ?)",
+                [linha[c] for c in COLUNAS] + [json.dumps(especificacoes, ensure_ascii=False), VERSAO_ANALISADOR, time.time()],
+            )
+            self._db.execute("DELETE FROM modelos WHERE sha256 = ?", (sha256,))
+            self._db.execute("DELETE FROM tags WHERE sha256 = ?", (sha256,))
+            self._db.executemany("INSERT OR IGNORE INTO modelos (modelo, sha256) VALUES (?, ?)",
+                                 [(m, sha256) for m in achatado["modelos"]])
+            self._db.executemany("INSERT OR IGNORE INTO tags (tag, sha256) VALUES (?, ?)",
+                                 [(t, sha256) for t in achatado["tags"]])
+            if commit:
+                self._db.commit()
+
+    def commit(self):
+        with self._lock:
+            self._db.commit()
+
+    def obter(self, sha256):
+        # Especificações completas de um PDF já indexado (None se indexado por outra versão do analisador)
+        with self._lock:
+            linha = self._db.execute(
+                "SELECT especificacoes FROM datasheets WHERE sha256 = ? AND versao_analisador = ?",
+                (sha256, VERSAO_ANALISADOR),
+            ).fetchone()
+        return json.loads(linha["especificacoes"]) if linha else None
+
+    def indexados(self):
+        with self._lock:
+            return {l["sha256"] for l in self._db.execute(
+                "SELECT sha256 FROM datasheets WHERE versao_analisador = ?", (VERSAO_ANALISADOR,))}
+
+    def consultar(self, fabricante=None, modelo=None, tags=(), graus_protecao=(), min_mp=None,
+                  temp_min_ate=None, temp_max_desde=None, limite=None):
+        """
+        Datasheets que atendem a todos os filtros. `modelo` é prefixo
+        (VIP 32 acha VIP 3225 SD IR), `tags` exige todas, `graus_protecao`
+        aceita qualquer um (ex.: IP66, IP67), `temp_min_ate=-30` acha as que
+        operam a -30 °C ou menos e `temp_max_desde=60` as que vão a 60 °C ou mais.
+        """
+        condicoes, parametros = [], []
+        if fabricante:
+            condicoes.append("d.fabricante = ?")
+            parametros.append(fabricante)
+        if modelo:
+            condicoes.append("d.sha256 IN (SELECT sha256 FROM modelos WHERE modelo LIKE ?)")
+            parametros.append(modelo.replace("%", "").replace("_", "") + "%")
+        for tag in tags:
+            condicoes.append("d.sha256 IN (SELECT sha256 FROM tags WHERE tag = ?)")
+            parametros.append(tag)
+        if graus_protecao:
+            condicoes.append(f"d.grau_protecao IN ({', '.join('?' * len(graus_protecao))})")
+            parametros.extend(graus_protecao)
+        if min_mp is not None:
+            condicoes.append("d.resolucao_mp >= ?")
+            parametros.append(min_mp)
+        if temp_min_ate is not None:
+            condicoes.append("d.temp_min <= ?")
+            parametros.append(temp_min_ate)
+        if temp_max_desde is not None:
+            condicoes.append("d.temp_max >= ?")
+            parametros.append(temp_max_desde)
+
+        sql = f"SELECT {', '.join('d.' + c for c in COLUNAS)} FROM datasheets d"
+        if condicoes:
+            sql += " WHERE " + " AND ".join(condicoes)
+        sql += " ORDER BY d.fabricante, d.modelo"
+        if limite:
+            sql += " LIMIT ?"
+            parametros.append(int(limite))
+
+        with self._lock:
+            linhas = [dict(l) for l in self._db.execute(sql, parametros)]
+            for linha in linhas:
+                linha["tags"] = [t["tag"] for t in self._db.execute(
+                    "SELECT tag FROM tags WHERE sha256 = ? ORDER BY tag", (linha["sha256"],))]
+        return linhas
+
+    def fechar(self):
+        with self._lock:
+            self._db.close()
+
+
+def indexar_pasta(pasta, catalogo, workers=None, reindexar=False, lote_commit=50):
+    """
+    Analisa todos os PDFs da pasta (recursivo) num pool de processos e grava
+    as specs no catálogo. PDFs já indexados pela versão atual do analisador
+    (mesmo SHA-256) são pulados, a não ser com `reindexar`.
+    Devolve um resumo com contagens e tempo.
+    """
+    inicio = time.perf_counter()
+    ja_indexados = set() if reindexar else catalogo.indexados()
+    pendentes, vistos, pulados = [], set(), 0
+    for caminho in listar_pdfs(pasta):
+        digest = hash_arquivo(caminho)
+        if digest in ja_indexados or digest in vistos:
+            pulados += 1
+            continue
+        vistos.add(digest)
+        pendentes.append((digest, caminho))
+
+    indexados, falhas = 0, []
+    if pendentes:
+        with ProcessPoolExecutor(max_workers=workers, initializer=inicializar_worker) as pool:
+            futuros = {pool.submit(processar_pdf, caminho): (digest, caminho) for digest, caminho in pendentes}
+            for futuro in as_completed(futuros):
+                digest, caminho = futuros[futuro]
+                try:
+                    especificacoes = futuro.result()
+                except Exception as e:
+                    especificacoes = {"erro": str(e)}
+                if not especificacoes or "erro" in especificacoes:
+                    falhas.append({"caminho": caminho, "erro": (especificacoes or {}).get("erro", "PDF ilegível")})
+                    continue
+                catalogo.guardar(digest, caminho, especificacoes, commit=False)
+                indexados += 1
+                if indexados % lote_commit == 0:
+                    catalogo.commit()
+        catalogo.commit()
+
+    return {
+        "indexados": indexados,
+        "pulados": pulados,
+        "falhas": falhas,
+        "tempo_s": round(time.perf_counter() - inicio, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Catálogo de especificações de datasheets (SQLite).")
+    parser.add_argument("--db", default=CATALOGO_DB, help="arquivo SQLite do catálogo")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    indexar = comandos.add_parser("indexar", help="analisa todos os PDFs de uma pasta e grava no catálogo")
+    indexar.add_argument("pasta")
+    indexar.add_argument("--workers", type=int, default=None, help="processos do pool (padrão: número de CPUs)")
+    indexar.add_argument("--reindexar", action="store_true", help="reanalisa também os PDFs já indexados")
+
+    consultar = comandos.add_parser("consultar", help="filtra o catálogo sem abrir nenhum PDF")
+    consultar.add_argument("--fabricante")
+    consultar.add_argument("--modelo", help="prefixo do modelo")
+    consultar.add_argument("--tag", action="append", default=[], help="pode repetir; exige todas")
+    consultar.add_argument("--ip", action="append", default=[], help="grau de proteção (pode repetir; qualquer um)")
+    consultar.add_argument("--min-mp", type=float)
+    consultar.add_argument("--temp-min-ate", type=int, help="opera a esta temperatura mínima (°C) ou abaixo")
+    consultar.add_argument("--temp-max-desde", type=int, help="opera a esta temperatura máxima (°C) ou acima")
+    consultar.add_argument("--limite", type=int)
+    args = parser.parse_args()
+
+    catalogo = CatalogoSpecs(args.db)
+    try:
+        if args.comando == "indexar":
+            if not os.path.isdir(args.pasta):
+                print(json.dumps({"erro": f"Pasta não encontrada: {args.pasta}"}, ensure_ascii=False))
+                sys.exit(1)
+            resumo = indexar_pasta(args.pasta, catalogo, workers=args.workers, reindexar=args.reindexar)
+        else:
+            inicio = time.perf_counter()
+            resultados = catalogo.consultar(
+                fabricante=args.fabricante, modelo=args.modelo, tags=args.tag, graus_protecao=[ip.upper() for ip in args.ip],
+                min_mp=args.min_mp, temp_min_ate=args.temp_min_ate, temp_max_desde=args.temp_max_desde, limite=args.limite,
+            )
+            resumo = {"total": len(resultados), "tempo_ms": round((time.perf_counter() - inicio) * 1000, 2),
+                      "resultados": resultados}
+        print(json.dumps(resumo, ensure_ascii=False, indent=2))
+    finally:
+        catalogo.fechar()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+# metricas.py
+# Métricas no formato texto do Prometheus (exposition format 0.0.4), sem
+# dependência externa: contadores e histogramas com rótulos, guardados em
+# memória no processo da API. Os workers do pool só medem (analisador.py
+# devolve os tempos junto com o resultado); quem registra é o processo da API.
+import threading
+
+TIPO_CONTEUDO = "text/plain; version=0.0.4; charset=utf-8"
+
+# Em segundos: de 1 ms (um campo) a 30 s (um PDF grande inteiro)
+BUCKETS_PADRAO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _rotulos(nomes, valores, extra=""):
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Metrica:
+    tipo = None
+
+    def __init__(self, nome, ajuda, rotulos=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _chave(self, rotulos):
+        if set(rotulos) != set(self.rotulos):
+            raise ValueError(f"{self.nome} espera os rótulos {self.rotulos}, recebeu {tuple(rotulos)}")
+        return tuple(str(rotulos[nome]) for nome in self.rotulos)
+
+    def exportar(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+        with self._lock:
+            series = sorted(self._series.items())
+            linhas.extend(self._linhas(chave, valor) for chave, valor in series)
+        return "\n".join(linhas)
+
+
+class Contador(Metrica):
+    tipo = "counter"
+
+    def inc(self, valor=1, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._series[chave] = self._series.get(chave, 0) + valor
+
+    def _linhas(self, chave, valor):
+        return f"{self.nome}{_rotulos(self.rotulos, chave)} {_numero(valor)}"
+
+
+class Medidor(Metrica):
+    """Gauge lido na hora da exportação (`funcao` devolve o valor atual)."""
+    tipo = "gauge"
+
+    def __init__(self, nome, ajuda, funcao):
+        super().__init__(nome, ajuda)
+        self.funcao = funcao
+
+    def exportar(self):
+        return f"# HELP {self.nome} {self.ajuda}\n# TYPE {self.nome} {self.tipo}\n{self.nome} {_numero(self.funcao())}"
+
+
+class Histograma(Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nome, ajuda, rotulos=(), buckets=BUCKETS_PADRAO):
+        super().__init__(nome, ajuda, rotulos)
+        self.buckets = tuple(sorted(buckets))
+
+    def observar(self, valor, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                # [contagem por bucket (não cumulativa)..., +Inf], soma
+                serie = self._series[chave] = [[0] * (len(self.buckets) + 1), 0.0]
+            contagens = serie[0]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    contagens[i] += 1
+                    break
+            else:
+                contagens[-1] += 1
+            serie[1] += valor
+
+    def _linhas(self, chave, serie):
+        contagens, soma = serie
+        linhas, acumulado = [], 0
+        for limite, n in zip(self.buckets + (float("inf"),), contagens):
+            acumulado += n
+            le = "+Inf" if limite == float("inf") else _numero(limite)
+            rotulos = _rotulos(self.rotulos, chave, 'le="' + le + '"')
+            linhas.append(f"{self.nome}_bucket{rotulos} {acumulado}")
+        linhas.append(f"{self.nome}_sum{_rotulos(self.rotulos, chave)} {_numero(soma)}")
+        linhas.append(f"{self.nome}_count{_rotulos(self.rotulos, chave)} {acumulado}")
+        return "\n".join(linhas)
+
+
+class Registro:
+    def __init__(self):
+        self.metricas = []
+
+    def registrar(self, metrica):
+        self.metricas.append(metrica)
+        return metrica
+
+    def exportar(self):
+        return "\n".join(m.exportar() for m in self.metricas) + "\n"
@@ -420,7 +420,7 @@ app.post('/api/executar-analise', (req, res) => {
         return res.status(403).json({ success: false, message: 'Apenas o admin pode executar a análise.' });
     }
     const pythonScriptPath = path.join(__dirname, 'backend_py', 'analisar_logs.py');
-    exec(`python "${pythonScriptPath}"`, (error, stdout, stderr) => {
+    exec(`python "${pythonScriptPath}" --incremental`, (error, stdout, stderr) => {
         if (error) {
             console.error(`Erro ao executar script Python: ${error}`);
             console.error(`Stderr: ${stderr}`);
@@ -0,0 +1,8 @@
+# conftest.py — os scripts importam uns aos outros pelo nome (backend_py/,
+# comparador_datasheet/ e benchmarks/ não são pacotes): os testes também.
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for pasta in ("backend_py", "comparador_datasheet", "benchmarks"):
+    sys.path.insert(0, os.path.join(ROOT_DIR, pasta))
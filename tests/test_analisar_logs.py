@@ -0,0 +1,65 @@
+# test_analisar_logs.py — a análise em paralelo (--workers) tem que sair byte a byte igual à serial
+import os
+
+import nltk.stem
+import pytest
+
+from sinteticos import gerar_chat_logs
+
+SAIDAS = {
+    "OUTPUT_PATH": "analise_logs.json",
+    "RESUMO_DIARIO_PATH": "resumo_diario.json",
+    "ESTADO_PATH": "analise_estado.json",
+    "BUCKETS_DIR": "buckets_diarios",
+}
+
+
+class StemmerDeSufixos:
+    """Substitui o RSLP quando o nltk está sem os dados dele: a paridade não depende do stemmer."""
+
+    def stem(self, palavra):
+        for sufixo in ("ções", "ção", "mente", "s", "a", "o", "e"):
+            if len(palavra) > len(sufixo) + 2 and palavra.endswith(sufixo):
+                return palavra[:-len(sufixo)]
+        return palavra
+
+
+@pytest.fixture(scope="module")
+def analisar_logs():
+    with pytest.MonkeyPatch.context() as mp:
+        try:
+            nltk.stem.RSLPStemmer()
+        except LookupError:  # sem nltk.download("rslp")
+            mp.setattr(nltk.stem, "RSLPStemmer", StemmerDeSufixos)
+        # Os workers do pool são criados por fork e herdam o stemmer do módulo já importado
+        import analisar_logs
+        yield analisar_logs
+
+
+def rodar_analise(analisar_logs, monkeypatch, logs, pasta, **kwargs):
+    """Roda analisar_chat gravando tudo em `pasta`; devolve {caminho relativo: bytes}."""
+    pasta.mkdir()
+    monkeypatch.setattr(analisar_logs, "CHAT_LOG_PATH", str(logs))
+    for nome, arquivo in SAIDAS.items():
+        monkeypatch.setattr(analisar_logs, nome, str(pasta / arquivo))
+    analisar_logs.analisar_chat(**kwargs)
+
+    arquivos = {}
+    for raiz, _, nomes in os.walk(pasta):
+        for nome in nomes:
+            caminho = os.path.join(raiz, nome)
+            with open(caminho, "rb") as f:
+                arquivos[os.path.relpath(caminho, pasta)] = f.read()
+    return arquivos
+
+
+def test_paralelo_igual_ao_serial(analisar_logs, tmp_path, monkeypatch):
+    # ~3,5 dias de mensagens: os buckets diários passam pelo descarregamento em disco
+    logs = gerar_chat_logs(str(tmp_path / "chat_logs.json"), 5000)
+    serial = rodar_analise(analisar_logs, monkeypatch, logs, tmp_path / "serial", workers=1)
+    paralelo = rodar_analise(analisar_logs, monkeypatch, logs, tmp_path / "paralelo", workers=4)
+
+    assert sorted(serial) == sorted(paralelo)
+    assert len([c for c in serial if c.startswith("buckets_diarios")]) > 2
+    for caminho in serial:
+        assert serial[caminho] == paralelo[caminho], caminho
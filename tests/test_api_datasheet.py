@@ -0,0 +1,49 @@
+# test_api_datasheet.py — os arquivos de uploads/ passam pela API com a configuração padrão
+import io
+import os
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("fitz")
+
+import api_datasheet
+import catalogo_specs
+
+UPLOADS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "uploads")
+UPLOADS = sorted(os.path.join(UPLOADS_DIR, nome) for nome in os.listdir(UPLOADS_DIR)
+                 if os.path.isfile(os.path.join(UPLOADS_DIR, nome)))
+
+
+@pytest.fixture
+def cliente(tmp_path, monkeypatch):
+    monkeypatch.setattr(api_datasheet, "CACHE_DB", str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(catalogo_specs, "CATALOGO_DB", str(tmp_path / "catalogo.sqlite3"))
+    monkeypatch.setattr(api_datasheet, "POOL_WORKERS", 2)
+    monkeypatch.setattr(api_datasheet, "metricas", None)
+    yield api_datasheet.app.test_client()
+    if api_datasheet._pool is not None:
+        api_datasheet._pool.shutdown()
+        api_datasheet._pool = None
+
+
+def enviar(cliente, caminhos, lazy):
+    arquivos = {}
+    for campo, caminho in zip(("datasheet1", "datasheet2"), caminhos):
+        with open(caminho, "rb") as f:
+            arquivos[campo] = (io.BytesIO(f.read()), os.path.basename(caminho))
+    resposta = cliente.post("/processar-datasheets" + ("?lazy=1" if lazy else ""), data=arquivos,
+                            content_type="multipart/form-data")
+    assert resposta.status_code == 200
+    return resposta.get_json()
+
+
+@pytest.mark.skipif(len(UPLOADS) < 2, reason="menos de dois arquivos em uploads/")
+@pytest.mark.parametrize("lazy", [False, True])
+def test_uploads_passam_pela_api(cliente, lazy):
+    for i in range(0, len(UPLOADS), 2):
+        par = UPLOADS[i:i + 2] if i + 1 < len(UPLOADS) else [UPLOADS[i], UPLOADS[0]]
+        resultado = enviar(cliente, par, lazy)
+        for camera, caminho in zip(("camera1", "camera2"), par):
+            assert "erro" not in resultado[camera], (caminho, resultado[camera])
+            assert resultado[camera]["fabricante"] != "Desconhecido", caminho
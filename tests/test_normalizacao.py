@@ -0,0 +1,67 @@
+# test_normalizacao.py — normalizar_em_lote tem que dar, posição a posição, o
+# mesmo que normalizar_campo item a item sobre os brutos que o analisar_datasheet vê
+import os
+
+import pytest
+
+pytest.importorskip("fitz")
+
+import analisador as a
+from catalogo_specs import listar_pdfs
+
+UPLOADS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "uploads")
+PDFS = list(listar_pdfs(UPLOADS_DIR))
+
+
+def brutos_do_datasheet(texto):
+    """{chave: bruto} extraídos como no analisar_datasheet (motor do fabricante, temperatura, lente)."""
+    motor = a.motor_do_fabricante(a.identificar_fabricante(texto))
+    brutos = {chave: valor for (_, chave), valor in motor.extrair(texto).items()}
+    brutos["temperatura_operacao"] = a.buscar_temperatura(texto)
+    lente = a.RE_LENTE.search(texto)
+    brutos["distancia_focal"] = lente.group(1) if lente else ""
+    return brutos
+
+
+def item_a_item(chave, bruto):
+    if chave == "resolucao_maxima":
+        return a.formatar_resolucao(a.normalizar_campo(chave, bruto))
+    if chave == "temperatura_operacao":
+        return a.normalizar_temperatura(bruto)
+    if chave == "distancia_focal":
+        return a.normalizar_lente(bruto)
+    return a.normalizar_campo(chave, bruto)
+
+
+@pytest.mark.skipif(not PDFS, reason="nenhum PDF em uploads/")
+def test_em_lote_igual_a_normalizar_campo():
+    textos = [texto for texto in map(a.extrair_texto_do_pdf, PDFS) if texto]
+    # Cada datasheet aparece três vezes, em ordens diferentes: o lote espalha os distintos de volta
+    linhas = [brutos_do_datasheet(texto) for texto in textos]
+    ordem = list(range(len(textos))) * 3
+    ordem[len(textos):] = sorted(ordem[len(textos):], reverse=True)
+    colunas = {chave: [linhas[i][chave] for i in ordem] for chave in linhas[0]}
+
+    lote = a.normalizar_em_lote(colunas)
+
+    assert set(lote) == set(a.CHAVES_DE_PATTERNS) | set(a.NORMALIZADORES_ESPECIAIS)
+    for chave, brutos in colunas.items():
+        assert lote[chave] == [item_a_item(chave, bruto) for bruto in brutos], chave
+        mutaveis = [v for v in lote[chave] if isinstance(v, (dict, list))]
+        assert len({id(v) for v in mutaveis}) == len(mutaveis), chave
+
+    # E os brutos são os do analisar_datasheet: nos campos sem pós-processamento
+    # fora do normalizador, o lote reproduz a saída dele
+    for posicao, i in enumerate(ordem):
+        especificacoes = a.analisar_datasheet(textos[i])
+        for categoria, campos in a.PATTERNS.items():
+            for chave in campos:
+                if chave != "resolucao_maxima":
+                    assert lote[chave][posicao] == especificacoes[categoria][chave], chave
+        assert lote["distancia_focal"][posicao] == especificacoes["distancia_focal"]
+        if lote["resolucao_maxima"][posicao]:
+            assert lote["resolucao_maxima"][posicao] == especificacoes["video"]["resolucao_maxima"]
+        temperatura = dict(lote["temperatura_operacao"][posicao])
+        if especificacoes["fabricante"] == "Intelbras" and temperatura["min"] is not None:
+            temperatura["min"] = -abs(temperatura["min"])  # heurística de sinal do analisar_datasheet
+        assert temperatura == especificacoes["fisico"]["temperatura_operacao"]